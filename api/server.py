@@ -1,13 +1,38 @@
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, Response, g, request, jsonify, send_from_directory, stream_with_context
 import os
 import sys
 import json
+import math
+import time
+import argparse
+import datetime
 import logging
-import requests
-import xml.etree.ElementTree as ET
-import google.generativeai as genai
 from werkzeug.serving import run_simple
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from flightwx.aviationweather import upstream_calls
+from flightwx.cache import cache_stats, cached_metars, cached_tafs, fresh_metars, fresh_tafs
+from flightwx.fetcher import REQUEST_DEADLINE, gather, stream
+from flightwx.flightpath import get_flight_path_icao_codes
+from flightwx.gemini import get_model
+from flightwx.report import assess_reports, fetch_reports, generate_weather_report, route_report, station_weather
+from flightwx.route_cache import normalize_route, route_cache_stats
+from flightwx.route_table import get_route_table
+from flightwx.routing import MAX_CORRIDOR_NM, ROUTE_MODE, ROUTE_MODES
+from flightwx.airports import load_airports
+from flightwx.history import route_history
+from flightwx.metrics import (HTTP_IN_FLIGHT, HTTP_REQUESTS, begin_request, end_request, record_error, render,
+                              server_timing, stage)
+from flightwx.response_cache import RESPONSE_CACHE, encode, encoding_etag, entry_etags, negotiate, observation_version
+from flightwx.resilience import Deadline, set_deadline, upstream_stats
+from flightwx.timeline import GROUND_SPEED_KT, forecast_at_etas, slot_sweep
+from flightwx.riskboard import board_rows, build_columns, score_columns
+from flightwx.poller import start_poller
+from flightwx.scheduler import batching_stats
+from flightwx.subscriptions import HUB, subscription_limit
+from flightwx.serving import SERVER_THREADS, SSE_THREADS, serve, warm_up
+
 # Configure logging
 logging.basicConfig(level=logging.INFO,
                    format='%(asctime)s - %(levelname)s - %(message)s')
@@ -17,136 +42,273 @@ app = Flask(__name__, static_folder='../dist')
 # Replace with your actual Gemini API key
 API_KEY = "YOUR_KEY"
 
-def get_common_flight_path(start_airport_code, destination_airport_code):
+# Add a Server-Timing header with per-stage durations to every response.
+SERVER_TIMING = os.environ.get('SERVER_TIMING', '').lower() in ('1', 'true', 'yes')
+# Most route pairs accepted by one /api/weather/batch request.
+BATCH_MAX_ROUTES = int(os.environ.get('BATCH_MAX_ROUTES', 500))
+# Most departure slots one /api/weather/slots request may evaluate.
+SLOTS_MAX = int(os.environ.get('SLOTS_MAX', 500))
+# Longest window, in days, one /api/history request may cover.
+HISTORY_MAX_DAYS = float(os.environ.get('HISTORY_MAX_DAYS', 366))
+# Seconds between keepalive comments on idle subscription streams, and the
+# reconnect delay suggested to EventSource clients.
+SSE_KEEPALIVE = float(os.environ.get('SSE_KEEPALIVE', 15))
+SSE_RETRY_MS = 5000
+
+def stream_weather_report(city_icao_codes, deadline=None):
     """
-    Retrieves a list of major cities that a flight might pass through
-    between two given Indian airports using the Gemini API.
+    Yields the events of a streamed weather report.
+
+    A "route" event lists the cities in order, then one "station" event per
+    city follows as soon as both its METAR and TAF are in, and a "done"
+    event closes the stream with totals. Stations the cache can serve fresh
+    are sent at once; the rest are fetched with one multi-station call per
+    product.
     """
-    try:
-        genai.configure(api_key=API_KEY)
-        model = genai.GenerativeModel('gemini-2.0-flash')
-
-        prompt = f"""
-            You are an expert travel assistant. A user is planning a trip in India
-            from {start_airport_code} to {destination_airport_code}. Suggest a
-            possible flight path, listing at least 5-10 major cities the flight is likely to
-            pass through. Consider that there may not be direct flights, and provide a
-            reasonable, common route. Do not number the cities.
-            Do not include the starting or destination airport codes in the list.
-            Provide the city names only, separated by commas.
-            If there are no likely cities, or you cannot determine a path, respond with "None".
-
-            Examples:
-            User: DEL to BOM
-            Assistant: Delhi,Jaipur,Ahmedabad,Mumbai
-            User: CCU to GOI
-            Assistant: Kolkata,Bhubaneswar,Hyderabad,Bangalore,Goa
-            User: CJB to TRV
-            Assistant: Coimbatore,Kochi,Thiruvananthapuram
-            User: abcd to xyz
-            Assistant: None
-        """
-
-        if not API_KEY or API_KEY == "YOUR_API_KEY":
-            raise ValueError("API_KEY is not set. Please replace 'YOUR_API_KEY' with your actual API key.")
-
-        response = model.generate_content(prompt)
-        response_text = response.text
-
-        if "None" in response_text:
-            return []
-
-        cities = [city.strip() for city in response_text.split(',')]
-        return cities
+    started = time.monotonic()
+    yield {"event": "route", "route": [{"city": city, "icao_code": icao_code}
+                                        for city, icao_code in city_icao_codes.items()]}
 
-    except Exception as e:
-        logging.error(f"Error in get_common_flight_path: {e}")
-        return None
-
-def get_city_icao_codes(cities):
-    """Retrieves ICAO codes for a list of cities."""
-    icao_codes = {
-        "Delhi": "VIDP",
-        "Jaipur": "VIJP",
-        "Ahmedabad": "VAAH",
-        "Mumbai": "VABB",
-        "Kolkata": "VECC",
-        "Bhubaneswar": "VEBS",
-        "Hyderabad": "VOHY",
-        "Bangalore": "VOBL",
-        "Goa": "VOGO",
-        "Coimbatore": "VOCB",
-        "Kochi": "VOCI",
-        "Thiruvananthapuram": "VOTV"
+    positions = {}
+    for index, (city, icao_code) in enumerate(city_icao_codes.items()):
+        positions.setdefault(icao_code, []).append((index, city))
+    stations = list(positions)
+    reports = {icao_code: {} for icao_code in stations}
+    for product, fresh in (("metar", fresh_metars(stations)), ("taf", fresh_tafs(stations))):
+        for icao_code, report in fresh.items():
+            reports[icao_code][product] = report
+    tasks = {}
+    for product, fetch in (("metar", cached_metars), ("taf", cached_tafs)):
+        missing = [icao_code for icao_code in stations if product not in reports[icao_code]]
+        if missing:
+            tasks[product] = (fetch, missing)
+    risk_scores = []
+    degraded = []
+
+    def station_events(icao_code):
+        products = reports.pop(icao_code)
+        weather = station_weather(icao_code, products.get("metar", "METAR fetch failed"),
+                                  products.get("taf", "TAF fetch failed"), archive=True)
+        if weather["degraded"]:
+            degraded.append(icao_code)
+        for index, city in positions[icao_code]:
+            risk_scores.append(weather["risk_score"])
+            yield {"event": "station", "index": index, "city": city, "icao_code": icao_code, "weather": weather}
+
+    for icao_code in stations:
+        if len(reports[icao_code]) == 2:
+            yield from station_events(icao_code)
+    for product, result in stream(tasks, deadline=deadline):
+        for icao_code, report in result.items():
+            if icao_code in reports:
+                reports[icao_code][product] = report
+                if len(reports[icao_code]) == 2:
+                    yield from station_events(icao_code)
+    for icao_code in list(reports):
+        yield from station_events(icao_code)
+
+    yield {
+        "event": "done",
+        "stations": len(risk_scores),
+        "hazardous": sum(1 for score in risk_scores if score > 0),
+        "max_risk_score": max(risk_scores, default=None),
+        "degraded_stations": degraded,
+        "elapsed_ms": round((time.monotonic() - started) * 1000)
     }
-    
-    return {city: icao_codes.get(city, "Unknown") for city in cities}
 
-def fetch_metar(icao_code):
-    """Fetches METAR data for a given ICAO code."""
-    url = f"https://aviationweather.gov/api/data/metar?ids={icao_code}&format=xml"
-    try:
-        response = requests.get(url)
-        response.raise_for_status()
-        root = ET.fromstring(response.content)
-        metar = root.find('data/METAR/raw_text')
-        return metar.text if metar is not None else "No METAR data"
-    except Exception as e:
-        logging.error(f"Error fetching METAR for {icao_code}: {e}")
-        return "METAR fetch failed"
+def generate_batch_report(routes):
+    """
+    Resolves many routes and reports their weather from one shared fetch.
 
-def fetch_taf(icao_code):
-    """Fetches TAF data for a given ICAO code."""
-    url = f"https://aviationweather.gov/api/data/taf?ids={icao_code}&format=xml"
-    try:
-        response = requests.get(url)
-        response.raise_for_status()
-        root = ET.fromstring(response.content)
-        taf = root.find('data/TAF/raw_text')
-        return taf.text if taf is not None else "No TAF data"
-    except Exception as e:
-        logging.error(f"Error fetching TAF for {icao_code}: {e}")
-        return "TAF fetch failed"
-
-def assess_risk(metar, taf):
-    """Assess weather risk based on METAR and TAF data."""
-    risk_score = 0
-    hazards = ['TS', 'FG', 'BKN', 'OVC', 'LIFR']
-    risk_details = []
-
-    if isinstance(metar, str) and "failed" not in metar and "No METAR" not in metar:
-        if any(term in metar for term in hazards):
-            risk_score += 1
-            risk_details.append("Hazard in METAR")
-    elif not isinstance(metar, str):
-        risk_score = -1
-        risk_details.append("METAR is not a string")
-
-    if isinstance(taf, str) and "failed" not in taf and "No TAF" not in taf:
-        if any(term in taf for term in hazards):
-            risk_score += 1
-            risk_details.append("Hazard in TAF")
-    elif not isinstance(taf, str):
-        risk_score = -1
-        risk_details.append("TAF is not a string")
-    
-    return risk_score, risk_details
-
-def generate_weather_report(icao_list):
-    """Generates a weather report and risk assessment for a list of ICAO codes."""
-    result = {}
-    for airport in icao_list:
-        metar = fetch_metar(airport)
-        taf = fetch_taf(airport)
-        risk_score, risk_details = assess_risk(metar, taf)
-
-        result[airport] = {
-            "metar": metar,
-            "taf": taf,
-            "risk_score": risk_score,
-            "risk_details": risk_details
+    Identical route requests are resolved once, concurrently. The stations
+    of all routes are deduplicated and fetched in one bulk call per product,
+    instead of one pair of calls per route.
+
+    Args:
+        routes (list): /api/weather style request bodies.
+
+    Returns:
+        dict: "routes" holds one result per request in order: its city and
+        ICAO list and risk summary, or an "error" and "status". "stations"
+        maps each ICAO code to its weather entry. "stats" reports timings
+        and upstream calls made versus what separate requests would need.
+    """
+    started = time.monotonic()
+    results = [None] * len(routes)
+    pending = []
+    unique = {}
+    for index, data in enumerate(routes):
+        if not isinstance(data, dict):
+            results[index] = {"error": "Each route must be an object", "status": 400}
+            continue
+        params, error = parse_route_request(data)
+        if error:
+            results[index] = {"start_airport": data.get('start_airport'),
+                              "destination_airport": data.get('destination_airport'),
+                              "error": error[0], "status": error[1]}
+            continue
+        key = normalize_route(params[0], params[1]) + params[2:]
+        unique.setdefault(key, params)
+        pending.append((index, key, params))
+
+    resolved = gather({key: (get_flight_path_icao_codes, *params, API_KEY) for key, params in unique.items()})
+    route_seconds = time.monotonic() - started
+
+    stations = list(dict.fromkeys(icao_code for city_icao_codes in resolved.values() if city_icao_codes
+                                  for icao_code in city_icao_codes.values()))
+    calls_before = sum(upstream_calls().values())
+    weather = generate_weather_report(stations, archive=True) if stations else {}
+    calls_made = sum(upstream_calls().values()) - calls_before
+    weather_seconds = time.monotonic() - started - route_seconds
+
+    station_lookups = 0
+    routed = 0
+    for index, key, params in pending:
+        start_airport, destination_airport = params[:2]
+        city_icao_codes = resolved.get(key)
+        error = route_error(start_airport, destination_airport, city_icao_codes)
+        if error:
+            results[index] = {"start_airport": start_airport, "destination_airport": destination_airport,
+                              "error": error[0], "status": error[1]}
+            continue
+        routed += 1
+        station_lookups += len(city_icao_codes)
+        risk_scores = {icao_code: weather[icao_code]["risk_score"] for icao_code in city_icao_codes.values()}
+        results[index] = {
+            "start_airport": start_airport,
+            "destination_airport": destination_airport,
+            "route": [{"city": city, "icao_code": icao_code} for city, icao_code in city_icao_codes.items()],
+            "max_risk_score": max(risk_scores.values()),
+            "hazardous_stations": [icao_code for icao_code, score in risk_scores.items() if score > 0]
+        }
+
+    # Each separate /api/weather request makes one METAR and one TAF call.
+    unbatched_calls = 2 * routed
+    return {
+        "routes": results,
+        "stations": weather,
+        "stats": {
+            "routes": len(routes),
+            "unique_routes": len(unique),
+            "station_lookups": station_lookups,
+            "unique_stations": len(stations),
+            "upstream_calls": calls_made,
+            "upstream_calls_unbatched": unbatched_calls,
+            "upstream_calls_saved": max(unbatched_calls - calls_made, 0),
+            "degraded_stations": sum(1 for entry in weather.values() if entry["degraded"]),
+            "route_ms": round(route_seconds * 1000),
+            "weather_ms": round(weather_seconds * 1000),
+            "elapsed_ms": round((time.monotonic() - started) * 1000)
         }
-    return result
+    }
+
+def parse_departure(data):
+    """
+    Reads the optional departure_time (ISO 8601, or epoch seconds) and
+    ground_speed_kt of a request body.
+
+    Returns:
+        tuple: ((departure, ground_speed_kt), None), (None, None) when no
+        departure_time was given, or (None, (message, status)).
+    """
+    value = data.get('departure_time') if isinstance(data, dict) else None
+    if value is None:
+        return None, None
+    try:
+        if isinstance(value, (int, float)):
+            departure = datetime.datetime.fromtimestamp(value, datetime.timezone.utc)
+        else:
+            departure = datetime.datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+            if departure.tzinfo is None:
+                departure = departure.replace(tzinfo=datetime.timezone.utc)
+    except (TypeError, ValueError, OverflowError, OSError):
+        return None, ("departure_time must be an ISO 8601 time or epoch seconds", 400)
+    ground_speed_kt = data.get('ground_speed_kt', GROUND_SPEED_KT)
+    if not isinstance(ground_speed_kt, (int, float)) or ground_speed_kt <= 0:
+        return None, ("ground_speed_kt must be a positive number", 400)
+    return (departure, float(ground_speed_kt)), None
+
+def parse_route_request(data):
+    """
+    Validates a /api/weather style request body.
+
+    Returns:
+        tuple: ((start_airport, destination_airport, route_mode, corridor_nm), None)
+        when valid, or (None, (message, status)).
+    """
+    start_airport = data.get('start_airport')
+    destination_airport = data.get('destination_airport')
+
+    if not start_airport or not destination_airport:
+        return None, ("Missing start_airport or destination_airport parameter", 400)
+    if not isinstance(start_airport, str) or not isinstance(destination_airport, str) \
+            or not start_airport.strip() or not destination_airport.strip():
+        return None, ("start_airport and destination_airport must be non-empty strings", 400)
+
+    route_mode = data.get('route_mode', ROUTE_MODE)
+    if route_mode not in ROUTE_MODES:
+        return None, (f"route_mode must be one of {', '.join(ROUTE_MODES)}", 400)
+    corridor_nm = data.get('corridor_nm')
+    # bool is an int subclass; true is not a width.
+    if corridor_nm is not None and (isinstance(corridor_nm, bool) or not isinstance(corridor_nm, (int, float))
+                                    or not 0 < corridor_nm <= MAX_CORRIDOR_NM):
+        return None, (f"corridor_nm must be a number greater than 0 and at most {MAX_CORRIDOR_NM:g}", 400)
+
+    return (start_airport, destination_airport, route_mode, corridor_nm), None
+
+def route_error(start_airport, destination_airport, city_icao_codes):
+    """Returns the (message, status) for a route that did not resolve, or None."""
+    if city_icao_codes is None:
+        return "Could not retrieve flight path. Check API key and try again.", 500
+    if not city_icao_codes:
+        return f"No common flight path found between {start_airport} and {destination_airport}", 404
+    return None
+
+def resolve_route_request(data):
+    """
+    Validates a /api/weather style request body and resolves its route.
+
+    Returns:
+        tuple: (city_icao_codes, None) on success, or (None, (response, status))
+        with the error to send back.
+    """
+    params, error = parse_route_request(data)
+    if error:
+        message, status = error
+        return None, (jsonify({"error": message}), status)
+
+    # Get flight path cities and their ICAO codes
+    city_icao_codes = get_flight_path_icao_codes(*params, api_key=API_KEY)
+
+    error = route_error(params[0], params[1], city_icao_codes)
+    if error:
+        message, status = error
+        return None, (jsonify({"error": message}), status)
+
+    return city_icao_codes, None
+
+@app.before_request
+def start_request_metrics():
+    g.started = time.perf_counter()
+    HTTP_IN_FLIGHT.inc(request.endpoint or "unknown")
+    begin_request()
+    # Every upstream call made for this request, on any thread, ends by then.
+    set_deadline(Deadline(REQUEST_DEADLINE))
+
+@app.after_request
+def finish_request_metrics(response):
+    HTTP_REQUESTS.inc(request.endpoint or "unknown", str(response.status_code))
+    timings = end_request()
+    if SERVER_TIMING and not response.is_streamed:
+        timings.append(("total", time.perf_counter() - g.started))
+        response.headers['Server-Timing'] = server_timing(timings)
+    return response
+
+@app.teardown_request
+def end_request_metrics(error=None):
+    # Runs after a streamed body has been sent, so streams count as in flight throughout.
+    HTTP_IN_FLIGHT.dec(request.endpoint or "unknown")
+    set_deadline(None)
 
 @app.route('/')
 def serve_index():
@@ -158,46 +320,323 @@ def serve_static(path):
 
 @app.route('/api/weather', methods=['POST'])
 def get_weather():
+    """
+    Weather along a route. Responses are cached per resolved route and
+    observation version, pre-serialized and pre-compressed, and carry a
+    strong ETag per encoding; a matching If-None-Match gets 304.
+
+    With a departure_time (and optionally ground_speed_kt), each station
+    also gets its ETA and the TAF forecast valid then; see forecast_at_etas.
+    """
     try:
         data = request.json
-        start_airport = data.get('start_airport')
-        destination_airport = data.get('destination_airport')
-        
-        if not start_airport or not destination_airport:
-            return jsonify({"error": "Missing start_airport or destination_airport parameter"}), 400
-        
-        # Get flight path cities
-        flight_path_cities = get_common_flight_path(start_airport, destination_airport)
-        
-        if flight_path_cities is None:
-            return jsonify({"error": "Could not retrieve flight path. Check API key and try again."}), 500
-        
-        if not flight_path_cities:
-            return jsonify({"error": f"No common flight path found between {start_airport} and {destination_airport}"}), 404
-        
-        # Get ICAO codes for cities
-        city_icao_codes = get_city_icao_codes(flight_path_cities)
-        flight_path_icao = list(city_icao_codes.values())
-        
-        # Generate weather report
-        weather_report = generate_weather_report(flight_path_icao)
-        
-        # Combine city and weather data
-        route_data = []
-        for city, icao_code in city_icao_codes.items():
-            weather = weather_report.get(icao_code, {})
-            route_data.append({
-                "city": city,
-                "icao_code": icao_code,
-                "weather": weather
-            })
+        timing, error = parse_departure(data)
+        if error:
+            return jsonify({"error": error[0]}), error[1]
+        city_icao_codes, error = resolve_route_request(data)
+        if error:
+            return error
         
-        return jsonify(route_data)
+        flight_path_icao = list(dict.fromkeys(city_icao_codes.values()))
+        metars, tafs = fetch_reports(flight_path_icao)
+
+        key = tuple(city_icao_codes.items()) + (timing,)
+        version = observation_version(flight_path_icao, metars, tafs)
+        cached = RESPONSE_CACHE.get(key, version)
+        if cached is None:
+            # Generate weather report
+            weather_report = assess_reports(flight_path_icao, metars, tafs, archive=True)
+            if timing:
+                with stage("eta_forecast"):
+                    etas = forecast_at_etas(list(city_icao_codes.values()), tafs, *timing)
+                for icao_code, weather in weather_report.items():
+                    weather.update(etas[icao_code])
+
+            body = app.json.response(route_report(city_icao_codes, weather_report)).get_data()
+            if any(weather["degraded"] for weather in weather_report.values()):
+                # Partial results are sent once, never served from cache.
+                cached = encode(body)
+            else:
+                cached = RESPONSE_CACHE.put(key, version, body)
+
+        return cached_response(cached)
     except Exception as e:
+        record_error("weather", e)
         logging.error(f"Error processing request: {e}")
         return jsonify({"error": str(e)}), 500
 
+def cached_response(cached):
+    """
+    Sends a CachedResponse in the best accepted encoding, with that
+    encoding's ETag, or 304 when the client holds any of its encodings.
+    """
+    body, encoding = negotiate(cached, request.accept_encodings)
+    etag = encoding_etag(cached, encoding)
+    headers = {"ETag": etag, "Vary": "Accept-Encoding", "Cache-Control": "no-cache"}
+    for tag in [etag] + entry_etags(cached):
+        if request.if_none_match.contains_weak(tag.strip('"')):
+            RESPONSE_CACHE.record_not_modified()
+            headers["ETag"] = tag
+            return Response(status=304, headers=headers)
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(body, mimetype='application/json', headers=headers)
+
+@app.route('/api/weather/stream', methods=['POST'])
+def stream_weather():
+    """Streams the /api/weather result as NDJSON events; see stream_weather_report."""
+    try:
+        city_icao_codes, error = resolve_route_request(request.json)
+        if error:
+            return error
+    except Exception as e:
+        record_error("weather_stream", e)
+        logging.error(f"Error processing request: {e}")
+        return jsonify({"error": str(e)}), 500
+
+    def generate():
+        try:
+            for event in stream_weather_report(city_icao_codes):
+                yield json.dumps(event) + "\n"
+        except Exception as e:
+            record_error("weather_stream", e)
+            logging.error(f"Error streaming weather report: {e}")
+            yield json.dumps({"event": "error", "error": str(e)}) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson',
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.route('/api/weather/subscribe', methods=['GET'])
+def subscribe_weather():
+    """
+    Server-sent events for a route given as query parameters (start_airport,
+    destination_airport, route_mode, corridor_nm). A "route" event carries
+    the same list as /api/weather; after that, a "station" event with the
+    station's new weather entry follows whenever a newer METAR or TAF for
+    one of its stations arrives. Comments keep idle connections open.
+    """
+    try:
+        data = request.args.to_dict()
+        if 'corridor_nm' in data:
+            try:
+                data['corridor_nm'] = float(data['corridor_nm'])
+            except ValueError:
+                pass
+        city_icao_codes, error = resolve_route_request(data)
+        if error:
+            return error
+        stations = list(dict.fromkeys(city_icao_codes.values()))
+        metars, tafs = fetch_reports(stations)
+        snapshot = route_report(city_icao_codes, assess_reports(stations, metars, tafs, archive=True))
+        subscription = HUB.subscribe(stations, metars, tafs)
+        if subscription is None:
+            return jsonify({"error": "Too many open subscriptions, try again later"}), 503
+    except Exception as e:
+        record_error("subscribe", e)
+        logging.error(f"Error processing request: {e}")
+        return jsonify({"error": str(e)}), 500
+
+    def generate():
+        try:
+            yield f"retry: {SSE_RETRY_MS}\nevent: route\ndata: {json.dumps(snapshot)}\n\n"
+            while True:
+                update = subscription.next(SSE_KEEPALIVE)
+                if update is not None:
+                    sequence, event = update
+                    yield f"id: {sequence}\nevent: station\ndata: {event}\n\n"
+                elif subscription.closed:
+                    return
+                else:
+                    yield ": keepalive\n\n"
+        finally:
+            # Also reached when the client goes away and a write fails.
+            HUB.unsubscribe(subscription)
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.route('/api/weather/slots', methods=['POST'])
+def get_weather_slots():
+    """
+    Forecast risk of a route for a sweep of departure times: every
+    step_minutes (default 15) for hours (default 24) from departure_time
+    (default now). Each slot lists the highest risk score at any station's
+    ETA and the stations where it is reached.
+    """
+    try:
+        data = request.json
+        if not isinstance(data, dict):
+            return jsonify({"error": "Request body must be a JSON object"}), 400
+        timing, error = parse_departure({"departure_time": time.time(), **data})
+        if error:
+            return jsonify({"error": error[0]}), error[1]
+        hours = data.get('hours', 24)
+        step_minutes = data.get('step_minutes', 15)
+        if not isinstance(hours, (int, float)) or hours <= 0 or \
+                not isinstance(step_minutes, (int, float)) or step_minutes <= 0:
+            return jsonify({"error": "hours and step_minutes must be positive numbers"}), 400
+        count = int(hours * 60 // step_minutes) + 1
+        if count > SLOTS_MAX:
+            return jsonify({"error": f"At most {SLOTS_MAX} slots per request"}), 400
+
+        city_icao_codes, error = resolve_route_request(data)
+        if error:
+            return error
+        stations = list(dict.fromkeys(city_icao_codes.values()))
+        tafs = fetch_reports(stations)[1]
+
+        departure, ground_speed_kt = timing
+        departures = [departure.timestamp() + i * step_minutes * 60 for i in range(count)]
+        with stage("slot_sweep"):
+            stations, scores = slot_sweep(stations, tafs, departures, ground_speed_kt)
+        maxima = scores.max(axis=1).tolist() if stations else [-1] * count
+        slots = []
+        for i, departs in enumerate(departures):
+            worst = maxima[i]
+            slots.append({
+                "departure_time": datetime.datetime.fromtimestamp(departs, datetime.timezone.utc)
+                .isoformat(timespec='minutes').replace('+00:00', 'Z'),
+                "max_risk_score": worst if worst >= 0 else None,
+                "worst_stations": [station for station, score in zip(stations, scores[i].tolist())
+                                   if score == worst and worst > 0],
+                "uncovered_stations": int((scores[i] < 0).sum()),
+            })
+        return jsonify({"route": [{"city": city, "icao_code": icao_code} for city, icao_code in city_icao_codes.items()],
+                        "ground_speed_kt": ground_speed_kt, "slots": slots})
+    except Exception as e:
+        record_error("slots", e)
+        logging.error(f"Error sweeping departure slots: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/weather/batch', methods=['POST'])
+def get_weather_batch():
+    """Weather for many route pairs at once; see generate_batch_report."""
+    try:
+        data = request.json
+        routes = data.get('routes') if isinstance(data, dict) else None
+        if not isinstance(routes, list) or not routes:
+            return jsonify({"error": "routes must be a non-empty list of route objects"}), 400
+        if len(routes) > BATCH_MAX_ROUTES:
+            return jsonify({"error": f"At most {BATCH_MAX_ROUTES} routes per batch"}), 400
+
+        # Top-level route_mode / corridor_nm apply to routes that do not set their own.
+        defaults = {name: data[name] for name in ('route_mode', 'corridor_nm') if name in data}
+        routes = [{**defaults, **route} if isinstance(route, dict) else route for route in routes]
+        return jsonify(generate_batch_report(routes))
+    except Exception as e:
+        record_error("batch", e)
+        logging.error(f"Error processing batch request: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/risk-board', methods=['GET'])
+def get_risk_board():
+    try:
+        requested = request.args.get('stations')
+        if requested:
+            stations = list(dict.fromkeys(code.strip().upper() for code in requested.split(',') if code.strip()))
+        else:
+            stations = [airport.icao for airport in load_airports()]
+        cities = {airport.icao: airport.city for airport in load_airports()}
+
+        reports = gather({
+            "metar": (cached_metars, stations),
+            "taf": (cached_tafs, stations),
+        })
+        columns = build_columns(stations, reports.get("metar", {}), reports.get("taf", {}))
+        rows = board_rows(score_columns(columns), columns)
+
+        return jsonify([
+            {"icao_code": station, "city": cities.get(station), **rows[station]}
+            for station in stations
+        ])
+    except Exception as e:
+        record_error("risk_board", e)
+        logging.error(f"Error building risk board: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/history', methods=['GET'])
+def get_history():
+    """
+    Flight category and risk history per station, for ?stations=VIDP,VABB or
+    for the stations on ?start_airport=DEL&destination_airport=BOM, over the
+    last ?days=7.
+    """
+    try:
+        try:
+            days = float(request.args.get('days', 7))
+        except ValueError:
+            days = None
+        if days is None or not math.isfinite(days) or not 0 < days <= HISTORY_MAX_DAYS:
+            return jsonify({"error": f"days must be a number greater than 0 and at most {HISTORY_MAX_DAYS:g}"}), 400
+
+        requested = request.args.get('stations')
+        if requested:
+            cities = {}
+            stations = list(dict.fromkeys(code.strip().upper() for code in requested.split(',') if code.strip()))
+        else:
+            city_icao_codes, error = resolve_route_request({
+                "start_airport": request.args.get('start_airport'),
+                "destination_airport": request.args.get('destination_airport'),
+                "route_mode": request.args.get('route_mode', ROUTE_MODE),
+            })
+            if error:
+                return error
+            cities = {icao_code: city for city, icao_code in city_icao_codes.items()}
+            stations = list(dict.fromkeys(city_icao_codes.values()))
+
+        history = route_history(stations, days)
+        return jsonify([
+            {"icao_code": station, "city": cities.get(station), **history[station]}
+            for station in stations
+        ])
+    except Exception as e:
+        record_error("history", e)
+        logging.error(f"Error reading history: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Prometheus text exposition of this process's metrics."""
+    return Response(render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/api/cache/stats', methods=['GET'])
+def get_cache_stats():
+    stats = cache_stats()
+    stats["routes"] = route_cache_stats()
+    stats["route_table"] = get_route_table().stats()
+    stats["upstream"] = upstream_stats()
+    stats["batching"] = batching_stats()
+    stats["responses"] = RESPONSE_CACHE.stats()
+    stats["subscriptions"] = HUB.stats()
+    return jsonify(stats)
+
+def start_worker():
+    """Per-process startup: the Gemini client and, if enabled, the network poller."""
+    get_model(API_KEY)
+    start_poller()
+
 if __name__ == '__main__':
-    port = int(os.environ.get('PORT', 5000))
-    logging.info(f"Starting server on port {port}")
-    run_simple('0.0.0.0', port, app, use_reloader=True, use_debugger=True)
+    parser = argparse.ArgumentParser(description="Flight Weather Assessment API server")
+    parser.add_argument('--dev', action='store_true',
+                        help="Run the single-process development server with reloader and debugger")
+    parser.add_argument('--port', type=int, default=int(os.environ.get('PORT', 5000)))
+    parser.add_argument('--workers', type=int, help="Worker processes (default: SERVER_WORKERS)")
+    parser.add_argument('--threads', type=int, help="Threads per worker (default: SERVER_THREADS, or SSE_THREADS "
+                                                    "with --sse)")
+    parser.add_argument('--sse', action='store_true',
+                        help="Serve subscription streams: one worker with SSE_THREADS threads, for "
+                             "/api/weather/subscribe to be routed to")
+    args = parser.parse_args()
+
+    logging.info(f"Starting server on port {args.port}")
+    if args.dev:
+        # With the reloader this block runs in both the watcher and the serving child.
+        if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+            start_worker()
+        run_simple('0.0.0.0', args.port, app, use_reloader=True, use_debugger=True)
+    else:
+        warm_up()
+        # Streams hold a request thread each; keep enough free for the rest.
+        threads = args.threads or (SSE_THREADS if args.sse else SERVER_THREADS)
+        HUB.max_subscriptions = subscription_limit(threads, dedicated=args.sse)
+        serve(app, '0.0.0.0', args.port, 1 if args.sse else args.workers, threads, worker_init=start_worker)
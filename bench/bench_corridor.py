@@ -0,0 +1,104 @@
+"""
+Latency of corridor station queries on the grid index versus a full scan.
+
+Indexes the bundled airports plus N synthetic stations scattered over the
+region they cover, then times uncached corridor queries between random
+airport pairs on the index and with a linear scan over every station,
+checking that both find the same stations.
+
+Usage:
+    python bench/bench_corridor.py [--stations N] [--width NM] [--queries Q] [--json]
+"""
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from flightwx.airports import EARTH_RADIUS_NM, cross, dot, load_airports, normalize, unit_vector
+from flightwx.spatial import Station, StationIndex, load_stations
+
+
+def synthetic_stations(count, seed):
+    airports = load_airports()
+    lat_lo, lat_hi = min(a.lat for a in airports), max(a.lat for a in airports)
+    lon_lo, lon_hi = min(a.lon for a in airports), max(a.lon for a in airports)
+    rng = random.Random(seed)
+    return [Station(f"Z{i:03X}"[-4:], f"Synthetic {i}", rng.uniform(lat_lo, lat_hi), rng.uniform(lon_lo, lon_hi))
+            for i in range(count)]
+
+
+def scan(index, origin, destination, width_nm):
+    """Reference corridor test over every station."""
+    a, b = unit_vector(origin.lat, origin.lon), unit_vector(destination.lat, destination.lon)
+    length_nm = math.acos(max(-1.0, min(1.0, dot(a, b)))) * EARTH_RADIUS_NM
+    normal = normalize(cross(a, b))
+    toward = cross(normal, a)
+    found = []
+    for i, p in enumerate(index.vectors):
+        cross_nm = math.asin(min(1.0, abs(dot(p, normal)))) * EARTH_RADIUS_NM
+        along_nm = math.atan2(dot(p, toward), dot(p, a)) * EARTH_RADIUS_NM
+        if cross_nm <= width_nm and -width_nm <= along_nm <= length_nm + width_nm:
+            found.append(i)
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Corridor query benchmark.")
+    parser.add_argument("--stations", type=int, default=10000, help="synthetic stations added to the bundled airports")
+    parser.add_argument("--width", type=float, default=100, help="corridor half-width in nautical miles")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    index = StationIndex(load_stations(None) + synthetic_stations(args.stations, args.seed))
+    build_seconds = time.perf_counter() - start
+
+    rng = random.Random(args.seed)
+    airports = index.stations[:len(load_airports())]
+    pairs = [tuple(rng.sample(airports, 2)) for _ in range(args.queries)]
+
+    grid_timings, scan_timings, found = [], [], 0
+    mismatches = 0
+    for origin, destination in pairs:
+        began = time.perf_counter()
+        corridor = index._search(origin, destination, args.width)
+        grid_timings.append(time.perf_counter() - began)
+        began = time.perf_counter()
+        expected = scan(index, origin, destination, args.width)
+        scan_timings.append(time.perf_counter() - began)
+        found += len(corridor)
+        mismatches += sorted(item.station.icao for item in corridor) != \
+            sorted(index.stations[i].icao for i in expected)
+
+    grid_timings.sort()
+    scan_timings.sort()
+    result = {
+        "stations": len(index.stations),
+        "cells": len(index.cells),
+        "width_nm": args.width,
+        "queries": args.queries,
+        "build_ms": round(build_seconds * 1000, 1),
+        "stations_per_corridor": round(found / args.queries, 1),
+        "grid_p50_ms": round(grid_timings[len(grid_timings) // 2] * 1000, 3),
+        "grid_p99_ms": round(grid_timings[int(len(grid_timings) * 0.99)] * 1000, 3),
+        "scan_p50_ms": round(scan_timings[len(scan_timings) // 2] * 1000, 3),
+        "scan_p99_ms": round(scan_timings[int(len(scan_timings) * 0.99)] * 1000, 3),
+        "mismatches": mismatches,
+    }
+
+    if args.json:
+        print(json.dumps(result, indent=4))
+    else:
+        for key, value in result.items():
+            print(f"{key:<24} {value}")
+
+
+if __name__ == "__main__":
+    main()
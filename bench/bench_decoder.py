@@ -0,0 +1,71 @@
+"""
+Micro-benchmark for the METAR/TAF decoder and risk scoring.
+
+Usage:
+    python bench/bench_decoder.py [--iterations N] [--json]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from flightwx.decoder import decode_metar, decode_taf
+from flightwx.risk import assess_risk
+
+METARS = [
+    "VIDP 181030Z 29006KT 2500 HZ NSC 31/12 Q1008 NOSIG",
+    "VABB 181030Z 25010KT 3000 HZ FEW018 SCT100 32/24 Q1006 NOSIG",
+    "VOBL 181030Z 27012G25KT 0800 TSRA FG BKN008 OVC015CB 22/20 Q1012 TEMPO 1500 TSRA",
+    "VECC 180930Z 18008KT 4000 BR SCT020 FEW025CB BKN100 30/26 Q1004 BECMG 3000 RA",
+    "METAR VOMM 181000Z VRB03KT 6000 NSC 33/25 Q1007 NOSIG",
+    "SPECI VIJP 181015Z 30015G28KT 1200 +DS VV005 35/05 Q1002",
+    "VOCI 181000Z 24006KT 9999 -SHRA FEW012 SCT020 BKN080 28/25 Q1009 NOSIG",
+    "VEGT 180900Z 00000KT 0300 FG VV001 19/19 Q1013 RMK FG LIFTING",
+]
+TAFS = [
+    "TAF VIDP 181100Z 1812/1918 30008KT 3000 HZ NSC TEMPO 1900/1903 1500 BR BECMG 1906/1908 5000",
+    "TAF VABB 181100Z 1812/1918 26010KT 3000 HZ FEW018 FM190600 24012KT 6000 SCT020 "
+    "PROB30 TEMPO 1912/1916 TSRA BKN010",
+    "TAF VOBL 181100Z 1812/1918 27010KT 6000 SCT020 BKN080 TEMPO 1812/1816 3000 TSRA FEW015CB "
+    "BECMG 1820/1822 VRB03KT 4000 BR PROB40 1900/1903 0800 FG",
+    "TAF AMD VECC 181030Z 1810/1912 18008KT 4000 HZ SCT020 FM181800 VRB03KT 2000 BR "
+    "FM190400 20008KT 5000 HZ NSC",
+]
+
+
+def measure(label, fn, reports, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for report in reports:
+            fn(report)
+    elapsed = time.perf_counter() - start
+    count = iterations * len(reports)
+    return {"benchmark": label, "reports": count, "seconds": round(elapsed, 4),
+            "reports_per_second": round(count / elapsed)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Decode throughput micro-benchmark.")
+    parser.add_argument("--iterations", type=int, default=5000)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    pairs = list(zip(METARS, TAFS * 2))
+    results = [
+        measure("decode_metar", decode_metar, METARS, args.iterations),
+        measure("decode_taf", decode_taf, TAFS, args.iterations),
+        measure("assess_risk", lambda pair: assess_risk(*pair), pairs, args.iterations),
+    ]
+    if args.json:
+        print(json.dumps(results, indent=4))
+        return
+    for result in results:
+        print(f"{result['benchmark']:<14} {result['reports_per_second']:>10,} reports/s "
+              f"({result['reports']:,} in {result['seconds']:.3f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Sizes and query latency of the observation archive.
+
+Writes N stations x D days of half-hourly synthetic observations into a
+scratch archive, compacts it, and reports bytes per observation before and
+after compaction plus the latency of a route history query.
+
+Usage:
+    python bench/bench_history.py [--stations N] [--days D] [--route R] [--json]
+"""
+import argparse
+import datetime
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import numpy as np
+
+from flightwx.history import HistoryStore, record_dtype
+
+OBSERVATIONS_PER_DAY = 48
+
+
+def synthetic_rows(days, end, seed):
+    rng = np.random.default_rng(seed)
+    count = days * OBSERVATIONS_PER_DAY
+    rows = np.zeros(count, dtype=record_dtype())
+    rows['time'] = int(end.timestamp()) - 1800 * np.arange(count, 0, -1)
+    rows['visibility_m'] = rng.choice([800, 3000, 6000, 10000], size=count)
+    rows['ceiling_ft'] = rng.choice([np.nan, 400, 1500, 4000], size=count)
+    rows['wind_speed'] = rng.integers(0, 30, size=count)
+    rows['wind_gust'] = np.nan
+    rows['flight_category'] = rng.integers(-1, 4, size=count)
+    rows['risk_score'] = rng.integers(0, 3, size=count)
+    rows['metar_flags'] = rng.integers(0, 64, size=count)
+    rows['taf_flags'] = rng.integers(0, 64, size=count)
+    return rows
+
+
+def time_query(store, route, start, end, repeat):
+    timings = []
+    for _ in range(repeat):
+        began = time.perf_counter()
+        store.query(route, start, end + datetime.timedelta(seconds=1))
+        timings.append(time.perf_counter() - began)
+    return timings
+
+
+def median(values):
+    return sorted(values)[len(values) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Observation archive benchmark.")
+    parser.add_argument("--stations", type=int, default=100)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--route", type=int, default=10, help="stations per route query")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix='flightwx-history-')
+    try:
+        store = HistoryStore(directory)
+        end = datetime.datetime.now(datetime.timezone.utc).replace(minute=0, second=0, microsecond=0)
+        stations = [f"S{i:03d}" for i in range(args.stations)]
+
+        start = time.perf_counter()
+        for seed, station in enumerate(stations):
+            store.append(station, synthetic_rows(args.days, end, seed))
+        append_seconds = time.perf_counter() - start
+        observations = args.stations * args.days * OBSERVATIONS_PER_DAY
+        logs = store.stats()
+        route = stations[:args.route]
+        window = end - datetime.timedelta(days=args.days)
+        log_timings = time_query(store, route, window, end, args.repeat)
+
+        start = time.perf_counter()
+        compacted = store.compact(before=(end + datetime.timedelta(days=1)).date())
+        compact_seconds = time.perf_counter() - start
+        segments = store.stats()
+
+        timings = time_query(store, route, window, end, args.repeat)
+        series = store.query(route, window, end + datetime.timedelta(seconds=1))
+        returned = sum(len(columns['time']) for columns in series.values())
+
+        result = {
+            "stations": args.stations,
+            "days": args.days,
+            "observations": observations,
+            "log_bytes": logs["bytes"],
+            "log_files": logs["logs"],
+            "log_bytes_per_observation": round(logs["bytes"] / observations, 1),
+            "segment_bytes": segments["bytes"],
+            "segment_files": segments["segments"],
+            "segment_bytes_per_observation": round(segments["bytes"] / observations, 1),
+            "append_seconds": round(append_seconds, 3),
+            "compact_seconds": round(compact_seconds, 3),
+            "compacted_rows": compacted["rows"],
+            "route_stations": len(route),
+            "route_rows": returned,
+            "route_query_ms_logs": round(median(log_timings) * 1000, 2),
+            "route_query_ms_segments": round(median(timings) * 1000, 2),
+        }
+    finally:
+        shutil.rmtree(directory)
+
+    if args.json:
+        print(json.dumps(result, indent=4))
+    else:
+        for key, value in result.items():
+            print(f"{key:<32} {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Compares per-station assess_station() with the vectorized risk board.
+
+Builds a synthetic network by cycling the sample reports over N stations
+and reports timings. That both paths agree station for station is checked
+by tests/test_riskboard.py.
+
+Usage:
+    python bench/bench_riskboard.py [--stations N] [--json]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from bench_decoder import METARS, TAFS
+from flightwx.risk import assess_station
+from flightwx.riskboard import build_columns, score_columns
+
+EXTRA_REPORTS = ["No METAR data", "METAR fetch failed", None]
+
+
+def synthetic_network(count):
+    stations = [f"S{i:05d}" for i in range(count)]
+    metar_pool = METARS + EXTRA_REPORTS
+    taf_pool = TAFS + ["No TAF data", "TAF fetch failed", None]
+    metars = {station: metar_pool[i % len(metar_pool)] for i, station in enumerate(stations)}
+    tafs = {station: taf_pool[(i * 7) % len(taf_pool)] for i, station in enumerate(stations)}
+    return stations, metars, tafs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vectorized risk board benchmark.")
+    parser.add_argument("--stations", type=int, default=5000)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    stations, metars, tafs = synthetic_network(args.stations)
+
+    start = time.perf_counter()
+    for station in stations:
+        assess_station(metars[station], tafs[station])
+    per_station = time.perf_counter() - start
+
+    start = time.perf_counter()
+    columns = build_columns(stations, metars, tafs)
+    decode = time.perf_counter() - start
+    start = time.perf_counter()
+    score_columns(columns)
+    scoring = time.perf_counter() - start
+
+    result = {
+        "stations": len(stations),
+        "per_station_seconds": round(per_station, 4),
+        "columnar_decode_seconds": round(decode, 4),
+        "vectorized_scoring_seconds": round(scoring, 6),
+    }
+    if args.json:
+        print(json.dumps(result, indent=4))
+    else:
+        for key, value in result.items():
+            print(f"{key:<28} {value}")
+
+
+if __name__ == "__main__":
+    main()
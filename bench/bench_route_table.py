@@ -0,0 +1,101 @@
+"""
+Precomputed route table against per-route Gemini calls.
+
+Builds the route table for the bundled airports against the local fake
+Gemini (bench/fake_upstream.py) through the real client, batching
+--batch-size airport pairs per call, then loads it and times llm-mode route
+lookups answered from the table next to asking Gemini for one route per
+call, as routes missing from the table still are.
+
+Usage:
+    python bench/bench_route_table.py [--batch-size N] [--lookups N] [--gemini-latency-ms MS] [--json]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from fake_upstream import FakeService, gemini_handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Route table benchmark.")
+    parser.add_argument("--batch-size", type=int, default=40, help="airport pairs per Gemini call")
+    parser.add_argument("--lookups", type=int, default=2000, help="route lookups answered from the table")
+    parser.add_argument("--single", type=int, default=20, help="routes asked of Gemini one per call")
+    parser.add_argument("--gemini-latency-ms", type=float, default=50)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    scratch = tempfile.mkdtemp()
+    from flightwx.airports import load_airports
+
+    airports = load_airports()
+    gemini = FakeService('gemini', gemini_handler([airport.city for airport in airports]),
+                         args.gemini_latency_ms, 0, 0, 0, args.seed).start()
+    os.environ['GEMINI_API_ENDPOINT'] = gemini.url
+    os.environ['ROUTE_TABLE_PATH'] = os.path.join(scratch, 'route_table.json')
+    os.environ.setdefault('ROUTE_CACHE_PATH', os.path.join(scratch, 'routes.sqlite3'))
+
+    from flightwx.flightpath import _ask_gemini_for_flight_path, get_flight_path_icao_codes
+    from flightwx.route_table import (ROUTE_TABLE_PATH, airport_pairs, gemini_generate, get_route_table, precompute,
+                                      write_route_table)
+
+    began = time.perf_counter()
+    routes, stats = precompute(airport_pairs(airports), gemini_generate('bench', 120), args.batch_size)
+    build_seconds = time.perf_counter() - began
+    write_route_table(routes, ROUTE_TABLE_PATH, 'fake')
+
+    began = time.perf_counter()
+    table = get_route_table()
+    load_seconds = time.perf_counter() - began
+
+    rng = random.Random(args.seed)
+    codes = [airport.iata or airport.icao for airport in airports]
+    pairs = [rng.sample(codes, 2) for _ in range(args.lookups)]
+    calls_before = sum(gemini.stats().values())
+    began = time.perf_counter()
+    for start, destination in pairs:
+        get_flight_path_icao_codes(start, destination, route_mode="llm", api_key='bench')
+    lookup_seconds = time.perf_counter() - began
+    lookup_calls = sum(gemini.stats().values()) - calls_before
+
+    began = time.perf_counter()
+    for start, destination in pairs[:args.single]:
+        _ask_gemini_for_flight_path(start, destination, 'bench')
+    single_seconds = time.perf_counter() - began
+    gemini.stop()
+
+    result = {
+        "pairs": stats["pairs"],
+        "build_calls": stats["calls"],
+        "build_s": round(build_seconds, 2),
+        "answered": stats["answered"],
+        "missing": stats["missing"],
+        "cities_kept": stats["cities"],
+        "cities_dropped": stats["dropped_cities"],
+        "table_kb": round(os.path.getsize(ROUTE_TABLE_PATH) / 1024, 1),
+        "directed_routes": len(table),
+        "load_ms": round(load_seconds * 1000, 1),
+        "table_lookup_us": round(lookup_seconds / len(pairs) * 1e6, 1),
+        "table_gemini_calls": lookup_calls,
+        "single_call_ms": round(single_seconds / max(min(args.single, len(pairs)), 1) * 1000, 1),
+        "single_calls_for_table": stats["pairs"],
+    }
+
+    if args.json:
+        print(json.dumps(result, indent=4))
+    else:
+        for key, value in result.items():
+            print(f"{key:<24} {value}")
+
+
+if __name__ == "__main__":
+    main()
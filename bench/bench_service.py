@@ -0,0 +1,217 @@
+"""
+End-to-end benchmark of the weather service against local fake upstreams.
+
+Starts the fake aviationweather.gov and Gemini services from
+fake_upstream.py, then drives either the Flask /api/weather endpoint or the
+app.py CLI with a fixed number of requests at a given concurrency. Reports
+throughput, latency percentiles and upstream call counts as JSON, tagged
+with the git commit so runs can be compared across versions.
+
+Usage:
+    python bench/bench_service.py --target flask --requests 200 --concurrency 16 --output flask.json
+    python bench/bench_service.py --target cli --requests 20 --concurrency 4 --route-mode llm
+    python bench/bench_service.py --target flask --url http://127.0.0.1:5000   # an already running server
+"""
+import argparse
+import concurrent.futures
+import datetime
+import json
+import logging
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+import requests
+
+from fake_upstream import add_service_arguments, start_services
+from flightwx.routing import ROUTE_MODES
+
+DEFAULT_ROUTES = "DEL-BOM,DEL-BLR,BOM-BLR,CCU-GOI,MAA-DEL,HYD-CCU,COK-DEL,AMD-GAU"
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def degraded_stations(route_data):
+    """Counts stations whose METAR or TAF could not be fetched."""
+    return sum(1 for stop in route_data
+               if any("failed" in str(stop.get("weather", {}).get(product, "")) for product in ("metar", "taf")))
+
+
+class FlaskTarget:
+    """Posts to /api/weather, on an in-process threaded server unless a URL is given."""
+
+    def __init__(self, args):
+        self.cold = args.cold
+        self._local = threading.local()
+        self._server = None
+        if args.url:
+            self.url = args.url.rstrip('/')
+            self.cold = False
+            return
+
+        sys.path.insert(0, os.path.join(ROOT, 'api'))
+        import server
+        from werkzeug.serving import make_server
+
+        logging.getLogger('werkzeug').setLevel(logging.WARNING)
+        self._server = make_server('127.0.0.1', 0, server.app, threaded=True)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self._server.server_port}"
+
+    def run(self, start, destination, route_mode):
+        if self.cold:
+            from flightwx.cache import METAR_CACHE, TAF_CACHE
+            METAR_CACHE.clear()
+            TAF_CACHE.clear()
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        response = session.post(f"{self.url}/api/weather", timeout=120, json={
+            "start_airport": start, "destination_airport": destination, "route_mode": route_mode})
+        if response.status_code != 200:
+            return False, 0
+        return True, degraded_stations(response.json())
+
+    def close(self):
+        if self._server is not None:
+            self._server.shutdown()
+
+
+class CliTarget:
+    """Runs app.py in a fresh interpreter per request, answering its prompts on stdin."""
+
+    def __init__(self, args):
+        self.env = dict(os.environ)
+
+    def run(self, start, destination, route_mode):
+        completed = subprocess.run(
+            [sys.executable, os.path.join(ROOT, 'app.py'), '--route-mode', route_mode],
+            input=f"{start}\n{destination}\n", capture_output=True, text=True, env=self.env, timeout=300)
+        output = completed.stdout
+        try:
+            route_data = json.loads(output[output.index('['):])
+        except ValueError:
+            return False, 0
+        return completed.returncode == 0, degraded_stations(route_data)
+
+    def close(self):
+        pass
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end service benchmark with fake upstreams.")
+    parser.add_argument("--target", choices=("flask", "cli"), default="flask")
+    parser.add_argument("--url", help="benchmark an already running server instead of an in-process one")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--routes", default=DEFAULT_ROUTES, help="comma-separated START-DEST pairs to cycle through")
+    parser.add_argument("--route-mode", choices=ROUTE_MODES, default="auto")
+    parser.add_argument("--cold", action="store_true",
+                        help="clear the in-process METAR/TAF caches before every Flask request")
+    parser.add_argument("--output", help="write the JSON result to this file")
+    add_service_arguments(parser)
+    args = parser.parse_args()
+
+    scratch = tempfile.mkdtemp(prefix='flightwx-bench-')
+    weather, gemini = start_services(args.latency_ms, args.jitter_ms, args.error_rate, args.gemini_latency_ms,
+                                     args.gemini_jitter_ms, args.gemini_error_rate, seed=args.seed,
+                                     slow_rate=args.slow_rate, slow_ms=args.slow_ms)
+    # Must be set before the app modules are imported (or the CLI started).
+    os.environ.update({
+        'AWC_BASE_URL': f"{weather.url}/api/data",
+        'GEMINI_API_ENDPOINT': gemini.url,
+        'ROUTE_CACHE_PATH': os.path.join(scratch, 'routes.sqlite3'),
+        'HISTORY_PATH': os.path.join(scratch, 'history'),
+    })
+    # The fakes have no rate limit to protect; pass UPSTREAM_RATE to measure the limiter.
+    os.environ.setdefault('UPSTREAM_RATE', '0')
+    target = (FlaskTarget if args.target == "flask" else CliTarget)(args)
+
+    routes = [pair.strip().upper().split('-', 1) for pair in args.routes.split(',') if pair.strip()]
+    latencies = []
+    errors = 0
+    degraded = 0
+
+    def one(i):
+        start, destination = routes[i % len(routes)]
+        began = time.perf_counter()
+        try:
+            ok, bad_stations = target.run(start, destination, args.route_mode)
+        except Exception:
+            ok, bad_stations = False, 0
+        return time.perf_counter() - began, ok, bad_stations
+
+    began = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        for elapsed, ok, bad_stations in pool.map(one, range(args.requests)):
+            latencies.append(elapsed * 1000)
+            errors += not ok
+            degraded += bad_stations
+    duration = time.perf_counter() - began
+    target.close()
+
+    latencies.sort()
+    upstream = {"weather": weather.stats(), "gemini": gemini.stats()}
+    upstream_calls = sum(count for service in upstream.values()
+                         for kind, count in service.items() if kind != 'injected_errors')
+    result = {
+        "target": args.target if not args.url else args.url,
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        "params": {
+            "requests": args.requests, "concurrency": args.concurrency, "routes": args.routes,
+            "route_mode": args.route_mode, "cold": args.cold, "latency_ms": args.latency_ms,
+            "jitter_ms": args.jitter_ms, "error_rate": args.error_rate,
+            "gemini_latency_ms": args.gemini_latency_ms, "gemini_error_rate": args.gemini_error_rate,
+            "slow_rate": args.slow_rate, "slow_ms": args.slow_ms,
+        },
+        "duration_s": round(duration, 3),
+        "throughput_rps": round(len(latencies) / duration, 2) if duration else None,
+        "errors": errors,
+        "degraded_stations": degraded,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 0.50), 2),
+            "p95": round(percentile(latencies, 0.95), 2),
+            "p99": round(percentile(latencies, 0.99), 2),
+            "max": round(latencies[-1], 2),
+            "mean": round(sum(latencies) / len(latencies), 2),
+        },
+        "upstream": upstream,
+        "upstream_calls_per_request": round(upstream_calls / len(latencies), 3),
+    }
+    weather.stop()
+    gemini.stop()
+    shutil.rmtree(scratch, ignore_errors=True)
+
+    text = json.dumps(result, indent=4)
+    if args.output:
+        with open(args.output, 'w') as output:
+            output.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Startup time of the entry points.
+
+Runs each command in a fresh interpreter several times and reports the
+fastest and median wall time, next to a bare interpreter for reference.
+Each entry point is also imported once (without running its main block)
+to list which heavy optional modules it pulls in at startup; the CLIs in
+offline mode should not load Gemini, Flask or NumPy.
+
+Usage:
+    python bench/bench_startup.py [--repeat N] [--json]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+HEAVY_MODULES = ("google.generativeai", "flask", "numpy", "requests")
+
+_PROBE = """
+import runpy, sys, json
+sys.argv = [{path!r}]
+runpy.run_path({path!r}, run_name='probe')
+print(json.dumps([name for name in {heavy!r} if name in sys.modules]))
+"""
+
+
+def timed(command, repeat, stdin=None):
+    timings = []
+    for _ in range(repeat):
+        began = time.perf_counter()
+        subprocess.run(command, cwd=ROOT, input=stdin, capture_output=True, text=True, check=True)
+        timings.append(time.perf_counter() - began)
+    timings.sort()
+    return round(timings[0] * 1000), round(timings[len(timings) // 2] * 1000)
+
+
+def loaded_modules(path):
+    probe = _PROBE.format(path=os.path.join(ROOT, path), heavy=HEAVY_MODULES)
+    completed = subprocess.run([sys.executable, '-c', probe], cwd=ROOT, capture_output=True, text=True, check=True)
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Entry point startup benchmark.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as scratch:
+        # Keep the route cache and observation archive out of the working tree.
+        os.environ.setdefault('ROUTE_CACHE_PATH', os.path.join(scratch, 'routes.sqlite3'))
+        os.environ.setdefault('HISTORY_ENABLED', '0')
+        commands = {
+            "python": ([sys.executable, '-c', 'pass'], None),
+            "app.py --help": ([sys.executable, 'app.py', '--help'], None),
+            "city.py --help": ([sys.executable, 'city.py', '--help'], None),
+            "city.py offline route": ([sys.executable, 'city.py', '--route-mode', 'offline', '--batch', '-'],
+                                      "DEL BOM\n"),
+        }
+        result = {}
+        for name, (command, stdin) in commands.items():
+            fastest, median = timed(command, args.repeat, stdin)
+            result[name] = {"min_ms": fastest, "median_ms": median}
+        for path in ('app.py', 'city.py', 'api/server.py'):
+            result.setdefault(path, {})["heavy_modules"] = loaded_modules(path)
+
+    if args.json:
+        print(json.dumps(result, indent=4))
+    else:
+        for name, values in result.items():
+            print(f"{name:<24} " + "  ".join(f"{key}={value}" for key, value in values.items()))
+
+
+if __name__ == "__main__":
+    main()
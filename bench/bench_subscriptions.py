@@ -0,0 +1,98 @@
+"""
+Fan-out cost of route subscriptions.
+
+Opens N subscriptions spread over random airport pairs (offline routes),
+then times how long the hub takes to turn a network table swap, with a
+share of the subscribed stations changed, into queued events, and counts
+the upstream calls one refresh of every subscribed station makes against
+the local fake aviationweather.gov, next to the two calls per route per
+screen that polling /api/weather would cost.
+
+Usage:
+    python bench/bench_subscriptions.py [--subscriptions N] [--routes R] [--changed F] [--json]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from fake_upstream import FakeService, canned_reports, weather_handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Subscription fan-out benchmark.")
+    parser.add_argument("--subscriptions", type=int, default=500)
+    parser.add_argument("--routes", type=int, default=50, help="distinct routes the subscriptions are spread over")
+    parser.add_argument("--changed", type=float, default=0.2, help="share of subscribed stations with a new METAR")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    metars, tafs = canned_reports()
+    weather = FakeService('weather', weather_handler(metars, tafs), 0, 0, 0, 0, args.seed).start()
+    os.environ['AWC_BASE_URL'] = f"{weather.url}/api/data"
+    os.environ.setdefault('HISTORY_ENABLED', '0')
+    os.environ.setdefault('ROUTE_CACHE_PATH', os.path.join(tempfile.mkdtemp(), 'routes.sqlite3'))
+
+    from flightwx.airports import load_airports
+    from flightwx.aviationweather import upstream_calls
+    from flightwx.poller import StationTable
+    from flightwx.routing import offline_flight_path_icao_codes
+    from flightwx.subscriptions import SubscriptionHub
+
+    rng = random.Random(args.seed)
+    codes = [airport.icao for airport in load_airports()]
+    routes = []
+    while len(routes) < args.routes:
+        route = offline_flight_path_icao_codes(*rng.sample(codes, 2))
+        if route:
+            routes.append(list(route.values()))
+
+    hub = SubscriptionHub(refresh=3600)
+    hub._start_refresher = lambda: None
+    subscriptions = [hub.subscribe(routes[i % len(routes)], metars, tafs) for i in range(args.subscriptions)]
+    stations = hub.stations()
+
+    changed = rng.sample(stations, max(int(len(stations) * args.changed), 1))
+    table = dict(metars)
+    for station in changed:
+        table[station] = metars[station].replace(' Q', ' RMK NEW Q', 1)
+    began = time.perf_counter()
+    updated = hub.observe("METAR", StationTable("METAR", table, time.time()).reports)
+    observe_seconds = time.perf_counter() - began
+
+    calls_before = sum(upstream_calls().values())
+    began = time.perf_counter()
+    hub.refresh_once()
+    refresh_seconds = time.perf_counter() - began
+    refresh_calls = sum(upstream_calls().values()) - calls_before
+    weather.stop()
+
+    stats = hub.stats()
+    result = {
+        "subscriptions": len(subscriptions),
+        "routes": stats["routes"],
+        "subscribed_stations": len(stations),
+        "stations_changed": updated,
+        "events_delivered": stats["deliveries"],
+        "observe_ms": round(observe_seconds * 1000, 2),
+        "refresh_ms": round(refresh_seconds * 1000, 1),
+        "refresh_upstream_calls": refresh_calls,
+        "polling_upstream_calls": 2 * len(subscriptions),
+    }
+
+    if args.json:
+        print(json.dumps(result, indent=4))
+    else:
+        for key, value in result.items():
+            print(f"{key:<24} {value}")
+
+
+if __name__ == "__main__":
+    main()
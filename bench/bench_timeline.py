@@ -0,0 +1,99 @@
+"""
+Latency of departure slot sweeps on TAF interval indexes.
+
+Builds a route over the first N bundled airports with the sample TAFs of
+bench_decoder, then scores every departure slot three ways: decoding the
+TAFs again for each slot (what a per-request lookup without an index
+costs), one indexed at() lookup per slot and station, and the vectorized
+slot_sweep. All three must agree.
+
+Usage:
+    python bench/bench_timeline.py [--stations N] [--hours H] [--step-minutes M] [--repeat R] [--json]
+"""
+import argparse
+import datetime
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from fake_upstream import canned_reports
+from flightwx.airports import load_airports
+from flightwx.cache import report_time
+from flightwx.decoder import decode_taf
+from flightwx.timeline import TIMELINES, TafTimeline, route_offsets, slot_sweep
+
+
+def best_of(repeat, fn):
+    timings = []
+    for _ in range(repeat):
+        began = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - began)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Departure slot sweep benchmark.")
+    parser.add_argument("--stations", type=int, default=10, help="route length in stations")
+    parser.add_argument("--hours", type=float, default=24)
+    parser.add_argument("--step-minutes", type=float, default=15)
+    parser.add_argument("--ground-speed", type=float, default=420)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    now = datetime.datetime.now(datetime.timezone.utc)
+    tafs = canned_reports(now)[1]
+    stations = [airport.icao for airport in load_airports()[:args.stations]]
+    offsets = route_offsets(stations)
+    start = now.timestamp()
+    departures = [start + i * args.step_minutes * 60 for i in range(int(args.hours * 60 // args.step_minutes) + 1)]
+
+    def score(timeline, when):
+        interval = timeline.at(when) if timeline is not None else None
+        return interval.risk_score if interval is not None else -1
+
+    def decode_per_slot():
+        rows = []
+        for departure in departures:
+            rows.append([score(TafTimeline(decode_taf(tafs[station]), report_time(tafs[station], now)),
+                               departure + offset / args.ground_speed * 3600)
+                         for station, offset in zip(stations, offsets)])
+        return rows
+
+    def lookup_per_slot():
+        timelines = [TIMELINES.get(station, tafs[station]) for station in stations]
+        return [[score(timeline, departure + offset / args.ground_speed * 3600)
+                 for timeline, offset in zip(timelines, offsets)] for departure in departures]
+
+    def sweep():
+        return slot_sweep(stations, tafs, departures, args.ground_speed)[1].tolist()
+
+    decode_seconds, expected = best_of(args.repeat, decode_per_slot)
+    lookup_seconds, looked_up = best_of(args.repeat, lookup_per_slot)
+    sweep_seconds, swept = best_of(args.repeat, sweep)
+
+    result = {
+        "stations": len(stations),
+        "slots": len(departures),
+        "decode_per_slot_ms": round(decode_seconds * 1000, 3),
+        "lookup_per_slot_ms": round(lookup_seconds * 1000, 3),
+        "sweep_ms": round(sweep_seconds * 1000, 3),
+        "speedup_vs_decode": round(decode_seconds / sweep_seconds, 1),
+        "mismatches": sum(row != other for row, other in zip(expected, looked_up)) +
+        sum(row != other for row, other in zip(expected, swept)),
+    }
+
+    if args.json:
+        print(json.dumps(result, indent=4))
+    else:
+        for key, value in result.items():
+            print(f"{key:<24} {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+"""
+Local stand-ins for aviationweather.gov and the Gemini API.
+
+Each service runs on its own threaded HTTP server, adds configurable latency,
+jitter and error rate to every call, and counts the calls it serves. The
+weather service answers /api/data/metar and /api/data/taf in the data API's
+XML format from canned reports for every bundled airport. The Gemini service
+answers generateContent with canned en-route cities as JSON, for one route
+or a batch of them.
+
+Point the app at them with AWC_BASE_URL=<weather url>/api/data and
+GEMINI_API_ENDPOINT=<gemini url>.
+
+Usage:
+    python bench/fake_upstream.py [--weather-port P] [--gemini-port P] [--latency-ms MS] ...
+"""
+import argparse
+import collections
+import datetime
+import http.server
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+import urllib.parse
+from xml.sax.saxutils import escape
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from bench_decoder import METARS, TAFS
+from flightwx.airports import load_airports
+
+_TIME_RE = re.compile(r'\b\d{6}Z\b')
+_FLIGHT_RE = re.compile(r'^\s*- (\S+) to (\S+)\s*$', re.MULTILINE)
+
+
+class FakeService:
+    """
+    One fake upstream on a background thread.
+
+    Args:
+        name (str): Label used in reports.
+        handle (callable): handle(method, path, query, body) -> (status, content_type, body).
+        latency_ms (float): Mean added latency per call.
+        jitter_ms (float): Latency varies uniformly by up to this much either way.
+        error_rate (float): Fraction of calls answered with HTTP 503.
+        slow_rate (float): Fraction of calls that stall for slow_ms on top,
+            for a long latency tail.
+    """
+
+    def __init__(self, name, handle, latency_ms=0, jitter_ms=0, error_rate=0, port=0, seed=None,
+                 slow_rate=0, slow_ms=0):
+        self.name = name
+        self.handle = handle
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.slow_rate = slow_rate
+        self.slow_ms = slow_ms
+        self.calls = collections.Counter()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = http.server.ThreadingHTTPServer(('127.0.0.1', port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name=f"fake-{self.name}", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def stats(self):
+        with self._lock:
+            return dict(self.calls)
+
+    def _respond(self, method, path, body):
+        parsed = urllib.parse.urlparse(path)
+        with self._lock:
+            delay = max(0.0, self.latency_ms + self._random.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+            failed = self._random.random() < self.error_rate
+            if self._random.random() < self.slow_rate:
+                delay += self.slow_ms / 1000
+        time.sleep(delay)
+        status, content_type, payload = self.handle(method, parsed.path, urllib.parse.parse_qs(parsed.query), body)
+        if failed:
+            status, content_type, payload = 503, 'text/plain', b'injected failure'
+        with self._lock:
+            self.calls[self._kind(parsed.path)] += 1
+            if failed:
+                self.calls['injected_errors'] += 1
+        return status, content_type, payload
+
+    def _kind(self, path):
+        return path.rstrip('/').rsplit('/', 1)[-1].split(':')[-1]
+
+    def _handler_class(self):
+        service = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                self._serve('GET', b'')
+
+            def do_POST(self):
+                self._serve('POST', self.rfile.read(int(self.headers.get('Content-Length') or 0)))
+
+            def _serve(self, method, body):
+                status, content_type, payload = service._respond(method, self.path, body)
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+        return Handler
+
+
+def canned_reports(now=None):
+    """Returns ({icao: metar}, {icao: taf}) for every bundled airport, stamped with the current time."""
+    now = now or datetime.datetime.now(datetime.timezone.utc)
+    stamp = now.strftime('%d%H%MZ')
+    metars, tafs = {}, {}
+    for i, airport in enumerate(load_airports()):
+        metar = METARS[i % len(METARS)].split()
+        offset = 1 if metar[0] in ('METAR', 'SPECI') else 0
+        metar[offset] = airport.icao
+        metars[airport.icao] = _TIME_RE.sub(stamp, ' '.join(metar))
+        taf = TAFS[i % len(TAFS)].split()
+        offset = 2 if taf[1] == 'AMD' else 1
+        taf[offset] = airport.icao
+        tafs[airport.icao] = _TIME_RE.sub(stamp, ' '.join(taf), count=1)
+    return metars, tafs
+
+
+def weather_handler(metars, tafs):
+    """Handler for the aviationweather.gov data API serving canned reports."""
+    def handle(method, path, query, body):
+        product = path.rstrip('/').rsplit('/', 1)[-1]
+        table, tag = (metars, 'METAR') if product == 'metar' else (tafs, 'TAF')
+        ids = query.get('ids', [''])[0].upper().split(',')
+        elements = ''.join(f"<{tag}><raw_text>{escape(table[station])}</raw_text><station_id>{station}</station_id></{tag}>"
+                           for station in ids if station in table)
+        return 200, 'text/xml', f"<response><data>{elements}</data></response>".encode()
+    return handle
+
+
+def gemini_handler(cities):
+    """
+    Handler for Gemini generateContent answering the flight path prompt: a
+    JSON routes object with en-route cities picked per route for every
+    flight listed after the prompt's last "Flights:".
+    """
+    def handle(method, path, query, body):
+        request = json.loads(body or b'{}')
+        prompt = '\n'.join(part.get('text', '') for content in request.get('contents', [])
+                           for part in content.get('parts', []))
+        routes = []
+        for origin, destination in _FLIGHT_RE.findall(prompt.rsplit('Flights:', 1)[-1]):
+            picker = random.Random(f"{origin}-{destination}")
+            routes.append({"origin": origin, "destination": destination,
+                           "cities": picker.sample(cities, min(5, len(cities)))})
+        text = json.dumps({"routes": routes})
+        response = {"candidates": [{"content": {"parts": [{"text": text}], "role": "model"},
+                                    "finishReason": "STOP", "index": 0}]}
+        return 200, 'application/json', json.dumps(response).encode()
+    return handle
+
+
+def start_services(latency_ms=0, jitter_ms=0, error_rate=0, gemini_latency_ms=None, gemini_jitter_ms=None,
+                   gemini_error_rate=None, weather_port=0, gemini_port=0, seed=None, slow_rate=0, slow_ms=0):
+    """Starts both fake services; Gemini settings default to the weather ones, the latency tail applies to weather only."""
+    metars, tafs = canned_reports()
+    cities = [airport.city for airport in load_airports()]
+    weather = FakeService('weather', weather_handler(metars, tafs), latency_ms, jitter_ms, error_rate,
+                          weather_port, seed, slow_rate, slow_ms).start()
+    gemini = FakeService('gemini', gemini_handler(cities),
+                         latency_ms if gemini_latency_ms is None else gemini_latency_ms,
+                         jitter_ms if gemini_jitter_ms is None else gemini_jitter_ms,
+                         error_rate if gemini_error_rate is None else gemini_error_rate,
+                         gemini_port, seed).start()
+    return weather, gemini
+
+
+def add_service_arguments(parser):
+    parser.add_argument("--latency-ms", type=float, default=50, help="mean upstream latency")
+    parser.add_argument("--jitter-ms", type=float, default=20, help="uniform latency jitter either way")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of upstream calls failing with 503")
+    parser.add_argument("--gemini-latency-ms", type=float, help="Gemini latency (default: --latency-ms)")
+    parser.add_argument("--gemini-jitter-ms", type=float, help="Gemini jitter (default: --jitter-ms)")
+    parser.add_argument("--gemini-error-rate", type=float, help="Gemini error rate (default: --error-rate)")
+    parser.add_argument("--slow-rate", type=float, default=0.0,
+                        help="fraction of weather calls stalled by --slow-ms, for a latency tail")
+    parser.add_argument("--slow-ms", type=float, default=2000, help="stall added to slow weather calls")
+    parser.add_argument("--seed", type=int, default=None, help="seed for latency and error injection")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run fake aviationweather.gov and Gemini services.")
+    parser.add_argument("--weather-port", type=int, default=8765)
+    parser.add_argument("--gemini-port", type=int, default=8766)
+    add_service_arguments(parser)
+    args = parser.parse_args()
+
+    weather, gemini = start_services(args.latency_ms, args.jitter_ms, args.error_rate, args.gemini_latency_ms,
+                                     args.gemini_jitter_ms, args.gemini_error_rate, args.weather_port,
+                                     args.gemini_port, args.seed, args.slow_rate, args.slow_ms)
+    print(f"AWC_BASE_URL={weather.url}/api/data")
+    print(f"GEMINI_API_ENDPOINT={gemini.url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        print(json.dumps({"weather": weather.stats(), "gemini": gemini.stats()}))
+
+
+if __name__ == "__main__":
+    main()
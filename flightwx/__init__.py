@@ -0,0 +1 @@
+"""Shared building blocks for the Flight Weather Assessment tool."""
@@ -0,0 +1,87 @@
+"""Bundled table of Indian airports and great-circle helpers."""
+import collections
+import csv
+import math
+import os
+import threading
+
+AIRPORTS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'airports.csv')
+EARTH_RADIUS_NM = 3440.065
+
+Airport = collections.namedtuple('Airport', 'iata icao name city lat lon aliases')
+
+_lock = threading.Lock()
+_airports = None
+
+
+def load_airports():
+    """Returns the bundled airports as a tuple of Airport records, reading the file once."""
+    global _airports
+    if _airports is None:
+        with _lock:
+            if _airports is None:
+                with open(AIRPORTS_PATH, newline='', encoding='utf-8') as f:
+                    _airports = tuple(
+                        Airport(row['iata'], row['icao'], row['name'], row['city'],
+                                float(row['lat']), float(row['lon']),
+                                tuple(alias for alias in row['aliases'].split('|') if alias))
+                        for row in csv.DictReader(f))
+    return _airports
+
+
+def great_circle_nm(lat1, lon1, lat2, lon2):
+    """Great-circle distance in nautical miles between two points given in degrees."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_NM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def initial_bearing(lat1, lon1, lat2, lon2):
+    """Initial great-circle bearing in radians from the first point to the second."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dlambda = math.radians(lon2 - lon1)
+    y = math.sin(dlambda) * math.cos(phi2)
+    x = math.cos(phi1) * math.sin(phi2) - math.sin(phi1) * math.cos(phi2) * math.cos(dlambda)
+    return math.atan2(y, x)
+
+
+def track_offsets(origin, destination, lat, lon):
+    """
+    Locates a point relative to the great-circle track origin -> destination.
+
+    Returns:
+        tuple: (cross_track_nm, along_track_nm). Cross-track distance is
+        unsigned; along-track distance is negative behind the origin.
+    """
+    d13 = great_circle_nm(origin.lat, origin.lon, lat, lon) / EARTH_RADIUS_NM
+    if d13 == 0:
+        return 0.0, 0.0
+    theta13 = initial_bearing(origin.lat, origin.lon, lat, lon)
+    theta12 = initial_bearing(origin.lat, origin.lon, destination.lat, destination.lon)
+    dxt = math.asin(max(-1.0, min(1.0, math.sin(d13) * math.sin(theta13 - theta12))))
+    cos_ratio = math.cos(d13) / max(math.cos(dxt), 1e-12)
+    dat = math.acos(max(-1.0, min(1.0, cos_ratio)))
+    if math.cos(theta13 - theta12) < 0:
+        dat = -dat
+    return abs(dxt) * EARTH_RADIUS_NM, dat * EARTH_RADIUS_NM
+
+
+def unit_vector(lat, lon):
+    """Unit vector from the Earth's centre through a point given in degrees."""
+    phi, lam = math.radians(lat), math.radians(lon)
+    return (math.cos(phi) * math.cos(lam), math.cos(phi) * math.sin(lam), math.sin(phi))
+
+
+def cross(u, v):
+    return (u[1] * v[2] - u[2] * v[1], u[2] * v[0] - u[0] * v[2], u[0] * v[1] - u[1] * v[0])
+
+
+def dot(u, v):
+    return u[0] * v[0] + u[1] * v[1] + u[2] * v[2]
+
+
+def normalize(u):
+    norm = math.sqrt(dot(u, u)) or 1.0
+    return (u[0] / norm, u[1] / norm, u[2] / norm)
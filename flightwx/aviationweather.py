@@ -0,0 +1,206 @@
+"""Client for the aviationweather.gov data API."""
+import collections
+import contextlib
+import functools
+import gzip
+import logging
+import os
+import re
+import threading
+import xml.etree.ElementTree as ET
+
+import requests
+
+from flightwx.fetcher import FETCH_TIMEOUT, FETCH_WORKERS, http_get
+from flightwx.metrics import record_error
+from flightwx.resilience import CircuitOpenError, DeadlineExceeded, remaining
+from flightwx.scheduler import (BATCH_MAX_STATIONS, BATCH_WINDOW_MS, RATE_LIMITER, BatchScheduler, RateLimited,
+                                register_scheduler)
+
+AWC_BASE_URL = os.environ.get('AWC_BASE_URL', 'https://aviationweather.gov/api/data')
+# Gzipped XML files holding the latest report of every station worldwide.
+# Local file paths work too.
+METAR_CACHE_URL = os.environ.get('METAR_CACHE_URL', 'https://aviationweather.gov/data/cache/metars.cache.xml.gz')
+TAF_CACHE_URL = os.environ.get('TAF_CACHE_URL', 'https://aviationweather.gov/data/cache/tafs.cache.xml.gz')
+
+# Keeps the ids= query string well under common URL length limits.
+MAX_IDS_PER_REQUEST = 100
+# Reported for a station the data API has no report of.
+NO_METAR_DATA = "No METAR data"
+NO_TAF_DATA = "No TAF data"
+_NO_DATA = {"METAR": NO_METAR_DATA, "TAF": NO_TAF_DATA}
+
+_ICAO_RE = re.compile(r'^[A-Z0-9]{4}$')
+
+_calls = collections.Counter()
+_calls_lock = threading.Lock()
+
+
+def fetch_metar_bulk(icao_codes):
+    """
+    Fetches the latest METAR for every station in one upstream call.
+
+    Args:
+        icao_codes (list): ICAO codes, e.g. ["VIDP", "VABB"].
+
+    Returns:
+        dict: Raw METAR text keyed by the ICAO codes as given. Stations
+        missing from the response map to NO_METAR_DATA.
+    """
+    return _fetch_bulk('metar', 'METAR', icao_codes)
+
+
+def fetch_taf_bulk(icao_codes):
+    """
+    Fetches the latest TAF for every station in one upstream call.
+
+    Args:
+        icao_codes (list): ICAO codes, e.g. ["VIDP", "VABB"].
+
+    Returns:
+        dict: Raw TAF text keyed by the ICAO codes as given. Stations
+        missing from the response map to NO_TAF_DATA.
+    """
+    return _fetch_bulk('taf', 'TAF', icao_codes)
+
+
+def upstream_calls():
+    """Returns how many data API requests this process has made, per product."""
+    with _calls_lock:
+        return dict(_calls)
+
+
+def parse_reports(content, tag):
+    """Parses an aviationweather.gov XML response into {station_id: raw_text}."""
+    root = ET.fromstring(content)
+    reports = {}
+    for element in root.iterfind(f'data/{tag}'):
+        station = (element.findtext('station_id') or '').strip().upper()
+        raw_text = element.findtext('raw_text')
+        # The API lists the newest report first; keep only that one.
+        if station and raw_text and station not in reports:
+            reports[station] = raw_text
+    return reports
+
+
+def iter_cache_file(source, tag):
+    """
+    Stream-parses a bulk cache file, yielding (station_id, raw_text) pairs.
+
+    The file is decompressed and parsed incrementally, and each report is
+    discarded once yielded, so memory stays flat however many stations the
+    file holds.
+
+    Args:
+        source (str): http(s) URL or local path of the file. Names ending in
+            ".gz" are gunzipped.
+        tag (str): Report element name, "METAR" or "TAF".
+    """
+    for element in iter_cache_elements(source, tag):
+        station = (element.findtext('station_id') or '').strip().upper()
+        raw_text = element.findtext('raw_text')
+        if station and raw_text:
+            yield station, raw_text
+
+
+def iter_cache_elements(source, tag):
+    """
+    Stream-parses a bulk cache file, yielding each complete tag element.
+
+    Each element is discarded once the caller moves on, so memory stays
+    flat. Takes the same sources as iter_cache_file; also reads the
+    stations cache file (tag "Station").
+    """
+    with _open_source(source) as stream:
+        if source.endswith('.gz'):
+            stream = gzip.GzipFile(fileobj=stream)
+        open_elements = []
+        for event, element in ET.iterparse(stream, events=('start', 'end')):
+            if event == 'start':
+                open_elements.append(element)
+                continue
+            open_elements.pop()
+            if element.tag != tag:
+                continue
+            yield element
+            if open_elements:
+                open_elements[-1].remove(element)
+
+
+@contextlib.contextmanager
+def _open_source(source):
+    if not source.startswith(('http://', 'https://')):
+        with open(source, 'rb') as stream:
+            yield stream
+        return
+    response = http_get(source, stream=True)
+    try:
+        response.raise_for_status()
+        # Undo any transfer Content-Encoding; the .gz payload itself is left alone.
+        response.raw.decode_content = True
+        yield response.raw
+    finally:
+        response.close()
+
+
+def _fetch_bulk(product, tag, icao_codes):
+    stations = []
+    for code in icao_codes:
+        station = code.strip().upper() if isinstance(code, str) else ''
+        if _ICAO_RE.match(station) and station not in stations:
+            stations.append(station)
+
+    reports = {}
+    if BATCH_WINDOW_MS > 0:
+        # Merged with other requests' lookups of the product; see flightwx.scheduler.
+        reports = _SCHEDULERS[product].fetch(stations, lambda station, reason: f"{tag} fetch failed ({reason})")
+    else:
+        for start in range(0, len(stations), MAX_IDS_PER_REQUEST):
+            chunk = stations[start:start + MAX_IDS_PER_REQUEST]
+            reports.update(_fetch_chunk(product, tag, chunk))
+
+    result = {}
+    for code in icao_codes:
+        station = code.strip().upper() if isinstance(code, str) else ''
+        result[code] = reports.get(station) or _NO_DATA[tag]
+    return result
+
+
+def _fetch_chunk(product, tag, stations):
+    ids = ','.join(stations)
+    url = f"{AWC_BASE_URL}/{product}?ids={ids}&format=xml"
+    try:
+        RATE_LIMITER.check(remaining(FETCH_TIMEOUT))
+        with _calls_lock:
+            _calls[product] += 1
+        response = http_get(url)
+        response.raise_for_status()
+        return parse_reports(response.content, tag)
+    except (CircuitOpenError, DeadlineExceeded, RateLimited) as e:
+        # Not attempted: the upstream is degraded, the request is out of time
+        # or the process is at its upstream rate limit.
+        record_error(product, e)
+        logging.warning(f"Skipped {tag} fetch for {ids}: {e}")
+        status = "fetch failed (upstream degraded)" if isinstance(e, CircuitOpenError) else \
+            "fetch failed (rate limited)" if isinstance(e, RateLimited) else "fetch failed (deadline)"
+    except requests.exceptions.RequestException as e:
+        record_error(product, e)
+        logging.error(f"Error fetching {tag} for {ids}: {e}")
+        status = "fetch failed"
+    except ET.ParseError as e:
+        record_error(product, e)
+        logging.error(f"Error parsing {tag} XML for {ids}: {e}")
+        status = "parse failed"
+    except Exception as e:
+        record_error(product, e)
+        logging.error(f"Error processing {tag} for {ids}: {e}")
+        status = "processing failed"
+    return {station: f"{tag} {status}" for station in stations}
+
+
+_SCHEDULERS = {
+    product: register_scheduler(BatchScheduler(product, functools.partial(_fetch_chunk, product, tag),
+                                               max_batch=min(BATCH_MAX_STATIONS, MAX_IDS_PER_REQUEST),
+                                               workers=FETCH_WORKERS))
+    for product, tag in (('metar', 'METAR'), ('taf', 'TAF'))
+}
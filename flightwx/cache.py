@@ -0,0 +1,282 @@
+"""Station-keyed METAR/TAF cache with report-driven expiry."""
+import collections
+import datetime
+import logging
+import os
+import re
+import threading
+
+from flightwx.aviationweather import fetch_metar_bulk, fetch_taf_bulk
+from flightwx.fetcher import get_executor
+from flightwx.metrics import exposition, register_collector
+from flightwx.poller import NETWORK, network_reports
+
+# Byte budget per product cache; least recently used stations go first.
+CACHE_MAX_BYTES = int(os.environ.get('CACHE_MAX_BYTES', 4 * 1024 * 1024))
+# Expected publication cadence of each product, in seconds.
+METAR_INTERVAL = int(os.environ.get('METAR_INTERVAL', 30 * 60))
+TAF_INTERVAL = int(os.environ.get('TAF_INTERVAL', 6 * 60 * 60))
+# Floor for expiry when a report is already older than its cadence, and the
+# lifetime of "No ... data" answers.
+MIN_TTL = 60
+NEGATIVE_TTL = 5 * 60
+
+# Rough per-entry bookkeeping cost on top of the report text.
+_ENTRY_OVERHEAD = 200
+
+_REPORT_TIME_RE = re.compile(r'\b(\d{2})(\d{2})(\d{2})Z\b')
+
+_Entry = collections.namedtuple('_Entry', 'value expires stale_until size')
+
+
+def report_time(raw_text, now=None):
+    """
+    Returns the observation/issue time of a METAR or TAF as an aware UTC
+    datetime, or None when the report carries no DDHHMMZ group.
+
+    Reports only carry day-of-month, so the month is taken from now and
+    stepped back when the day lies in the future.
+    """
+    match = _REPORT_TIME_RE.search(raw_text)
+    if not match:
+        return None
+    now = now or datetime.datetime.now(datetime.timezone.utc)
+    day, hour, minute = (int(group) for group in match.groups())
+    year, month = now.year, now.month
+    if day > now.day:
+        month -= 1
+        if month == 0:
+            year, month = year - 1, 12
+    try:
+        return datetime.datetime(year, month, day, hour, minute, tzinfo=datetime.timezone.utc)
+    except ValueError:
+        return None
+
+
+class ReportCache:
+    """
+    LRU cache of raw reports keyed by ICAO code.
+
+    An entry is fresh until its report is due to be superseded (report time
+    plus the product cadence) and is then served stale for one more cadence
+    while a background refresh runs.
+    """
+
+    def __init__(self, product, interval, max_bytes=CACHE_MAX_BYTES):
+        self.product = product
+        self.interval = interval
+        self.max_bytes = max_bytes
+        self._entries = collections.OrderedDict()
+        self._bytes = 0
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.refreshes = 0
+
+    def get(self, station, now=None):
+        """Returns (value, state) where state is "fresh", "stale" or None on a miss."""
+        now = now or datetime.datetime.now(datetime.timezone.utc)
+        with self._lock:
+            entry = self._entries.get(station)
+            if entry is None or now >= entry.stale_until:
+                if entry is not None:
+                    self._remove(station)
+                self.misses += 1
+                return None, None
+            self._entries.move_to_end(station)
+            if now < entry.expires:
+                self.hits += 1
+                return entry.value, "fresh"
+            self.stale_hits += 1
+            return entry.value, "stale"
+
+    def peek(self, station, now=None):
+        """Returns a fresh entry's value, counted as a hit, or None; misses and stale entries are left to get()."""
+        now = now or datetime.datetime.now(datetime.timezone.utc)
+        with self._lock:
+            entry = self._entries.get(station)
+            if entry is None or now >= entry.expires:
+                return None
+            self._entries.move_to_end(station)
+            self.hits += 1
+            return entry.value
+
+    def put(self, station, value, now=None):
+        """Stores a report; fetch failures are never cached."""
+        if not isinstance(value, str) or "failed" in value:
+            return
+        now = now or datetime.datetime.now(datetime.timezone.utc)
+        if value.startswith("No "):
+            expires = now + datetime.timedelta(seconds=NEGATIVE_TTL)
+            stale_until = expires
+        else:
+            issued = report_time(value, now) or now
+            expires = max(issued + datetime.timedelta(seconds=self.interval),
+                          now + datetime.timedelta(seconds=MIN_TTL))
+            stale_until = expires + datetime.timedelta(seconds=self.interval)
+        size = len(value) + len(station) + _ENTRY_OVERHEAD
+        with self._lock:
+            if station in self._entries:
+                self._remove(station)
+            self._entries[station] = _Entry(value, expires, stale_until, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def claim_refresh(self, stations):
+        """Marks stations as being refreshed and returns the ones not already claimed."""
+        with self._lock:
+            claimed = [station for station in stations if station not in self._refreshing]
+            self._refreshing.update(claimed)
+            return claimed
+
+    def release_refresh(self, stations):
+        with self._lock:
+            self._refreshing.difference_update(stations)
+            self.refreshes += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.stale_hits + self.misses
+            return {
+                "product": self.product,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "hit_ratio": (self.hits + self.stale_hits) / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "refreshes": self.refreshes,
+            }
+
+    def _remove(self, station):
+        entry = self._entries.pop(station)
+        self._bytes -= entry.size
+
+
+METAR_CACHE = ReportCache("METAR", METAR_INTERVAL)
+TAF_CACHE = ReportCache("TAF", TAF_INTERVAL)
+
+
+def cached_fetch(cache, fetch_bulk, icao_codes):
+    """
+    Serves reports from cache, fetching misses in one bulk call.
+
+    Stations found in the network poller's table are served from it first.
+    Stale entries are returned immediately and refreshed in the background.
+
+    Args:
+        cache (ReportCache): Cache for the product.
+        fetch_bulk (callable): Bulk fetcher such as fetch_metar_bulk.
+        icao_codes (list): ICAO codes to look up.
+
+    Returns:
+        dict: Raw report text keyed by the ICAO codes as given.
+    """
+    result = {}
+    missing = []
+    stale = []
+    network = network_reports(cache.product) or {}
+    for code in dict.fromkeys(icao_codes):
+        value = network.get(code.strip().upper()) if isinstance(code, str) else None
+        if value is not None:
+            result[code] = value
+            continue
+        value, state = cache.get(code)
+        if state is None:
+            missing.append(code)
+            continue
+        result[code] = value
+        if state == "stale":
+            stale.append(code)
+
+    if missing:
+        fetched = fetch_bulk(missing)
+        for code in missing:
+            cache.put(code, fetched[code])
+        result.update(fetched)
+
+    if stale:
+        claimed = cache.claim_refresh(stale)
+        if claimed:
+            get_executor().submit(_refresh, cache, fetch_bulk, claimed)
+    return result
+
+
+def fresh_reports(cache, icao_codes):
+    """
+    Returns {code: report} for the codes the network poller's table or the
+    cache can serve fresh, without fetching; the others are left out.
+    """
+    result = {}
+    network = network_reports(cache.product) or {}
+    for code in dict.fromkeys(icao_codes):
+        value = network.get(code.strip().upper()) if isinstance(code, str) else None
+        if value is None:
+            value = cache.peek(code)
+        if value is not None:
+            result[code] = value
+    return result
+
+
+def fresh_metars(icao_codes):
+    """METARs servable without an upstream call; see fresh_reports."""
+    return fresh_reports(METAR_CACHE, icao_codes)
+
+
+def fresh_tafs(icao_codes):
+    """TAFs servable without an upstream call; see fresh_reports."""
+    return fresh_reports(TAF_CACHE, icao_codes)
+
+
+def cached_metars(icao_codes):
+    """Cached counterpart of fetch_metar_bulk."""
+    return cached_fetch(METAR_CACHE, fetch_metar_bulk, icao_codes)
+
+
+def cached_tafs(icao_codes):
+    """Cached counterpart of fetch_taf_bulk."""
+    return cached_fetch(TAF_CACHE, fetch_taf_bulk, icao_codes)
+
+
+def cache_stats():
+    """Returns hit/miss counters for both product caches and the network poller's state."""
+    return {"metar": METAR_CACHE.stats(), "taf": TAF_CACHE.stats(), "network": NETWORK.stats()}
+
+
+def _refresh(cache, fetch_bulk, stations):
+    try:
+        fetched = fetch_bulk(stations)
+        for station in stations:
+            cache.put(station, fetched[station])
+    except Exception as e:
+        logging.error(f"Background {cache.product} refresh failed for {','.join(stations)}: {e}")
+    finally:
+        cache.release_refresh(stations)
+
+
+def _cache_metrics():
+    caches = (METAR_CACHE.stats(), TAF_CACHE.stats())
+    lines = exposition('flightwx_cache_lookups_total', 'counter', "Station cache lookups per product and result.",
+                       [({"product": stats["product"], "result": result}, stats[key])
+                        for stats in caches
+                        for result, key in (("hit", "hits"), ("stale", "stale_hits"), ("miss", "misses"))])
+    lines += exposition('flightwx_cache_hit_ratio', 'gauge', "Share of station cache lookups served from cache.",
+                        [({"product": stats["product"]}, stats["hit_ratio"]) for stats in caches])
+    lines += exposition('flightwx_cache_bytes', 'gauge', "Bytes held by each station cache.",
+                        [({"product": stats["product"]}, stats["bytes"]) for stats in caches])
+    return lines
+
+
+register_collector(_cache_metrics)
@@ -0,0 +1,97 @@
+"""Arguments and batch input shared by the command-line tools."""
+import argparse
+import json
+import logging
+import re
+import sys
+
+from flightwx.routing import MAX_CORRIDOR_NM, ROUTE_MODE, ROUTE_MODES
+
+_PAIR_RE = re.compile(r'[\s,]+')
+
+
+def add_route_arguments(parser):
+    """Adds --route-mode, --corridor-nm and --batch to an argparse parser."""
+    parser.add_argument("--route-mode", choices=ROUTE_MODES, default=ROUTE_MODE,
+                        help="how to find en-route cities (default: %(default)s)")
+    parser.add_argument("--corridor-nm", type=corridor_width, default=None,
+                        help="corridor half-width in nautical miles for the offline and corridor route modes")
+    parser.add_argument("--batch", metavar="FILE",
+                        help="read route pairs from FILE ('-' for stdin) instead of prompting, one per line as "
+                             "'DEL BOM', 'DEL,BOM' or a JSON object with start_airport and destination_airport, "
+                             "and write one JSON result per line")
+
+
+def corridor_width(value):
+    """argparse type for --corridor-nm: a width greater than 0 and at most MAX_CORRIDOR_NM."""
+    try:
+        width = float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid number: {value!r}")
+    if not 0 < width <= MAX_CORRIDOR_NM:
+        raise argparse.ArgumentTypeError(f"must be greater than 0 and at most {MAX_CORRIDOR_NM:g}")
+    return width
+
+
+def iter_route_pairs(lines):
+    """
+    Parses batch input. Blank lines and lines starting with # are skipped.
+
+    Yields:
+        tuple: (start_airport, destination_airport, error) per route line,
+        with the codes upper-cased, or None codes and an error message for
+        a line that is not a route pair.
+    """
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        if line.startswith('{'):
+            try:
+                data = json.loads(line)
+                pair = [data.get('start_airport'), data.get('destination_airport')]
+            except (ValueError, AttributeError):
+                pair = []
+        else:
+            pair = _PAIR_RE.split(line)
+        if len(pair) != 2 or not all(isinstance(code, str) and code.strip() for code in pair):
+            yield None, None, f"line {number}: expected a start and a destination airport"
+            continue
+        yield pair[0].strip().upper(), pair[1].strip().upper(), None
+
+
+def run_batch(source, handle, output=None):
+    """
+    Answers every route pair of a batch file as NDJSON.
+
+    Args:
+        source (str): Path of the batch file, or '-' for stdin.
+        handle (callable): Called as handle(start, destination); returns a
+            JSON-ready dict with the route's result or an "error".
+        output (file): Where results go, stdout by default. Each line is
+            flushed as soon as its route is done.
+
+    Returns:
+        int: Number of routes answered with an error.
+    """
+    output = output or sys.stdout
+    failed = 0
+    stream = sys.stdin if source == '-' else open(source, encoding='utf-8')
+    try:
+        for start_airport, destination_airport, error in iter_route_pairs(stream):
+            record = {"start_airport": start_airport, "destination_airport": destination_airport}
+            if error is None:
+                try:
+                    record.update(handle(start_airport, destination_airport))
+                except Exception as e:
+                    logging.error(f"Error processing {start_airport}-{destination_airport}: {e}")
+                    record["error"] = str(e)
+            else:
+                record["error"] = error
+            failed += "error" in record
+            output.write(json.dumps(record) + "\n")
+            output.flush()
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+    return failed
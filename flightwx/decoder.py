@@ -0,0 +1,315 @@
+"""Single-pass METAR/TAF decoder producing compact typed records."""
+import collections
+import re
+
+METRES_PER_SM = 1609.344
+KT_PER_MPS = 1.943844
+KT_PER_KMH = 0.539957
+# Reported as "9999": 10 km or more.
+UNLIMITED_VISIBILITY_M = 10000
+
+Observation = collections.namedtuple(
+    'Observation',
+    'station time wind_dir wind_speed wind_gust visibility_m weather clouds ceiling_ft '
+    'temperature dewpoint flight_category')
+Observation.__doc__ = """Decoded METAR. time is (day, hour, minute); weather is a tuple of
+groups such as "+TSRA"; clouds is a tuple of (cover, height_ft, type)."""
+
+Forecast = collections.namedtuple('Forecast', 'station issued valid_from valid_to groups')
+Forecast.__doc__ = """Decoded TAF. groups[0] is the BASE forecast; times are (day, hour, minute)."""
+
+ChangeGroup = collections.namedtuple(
+    'ChangeGroup',
+    'kind probability start end wind_dir wind_speed wind_gust visibility_m weather clouds '
+    'ceiling_ft flight_category')
+ChangeGroup.__doc__ = """One TAF period (BASE, FM, BECMG, TEMPO). Conditions not restated in a
+group are carried over from the prevailing forecast, so each group is complete."""
+
+# One alternative per token kind. Tokens are matched whole, so "TS" inside a
+# station id or free text never counts as a thunderstorm.
+_TOKEN_RE = re.compile(r"""
+    (?P<wind>(?P<wind_dir>\d{3}|VRB)(?P<wind_speed>\d{2,3})(?:G(?P<wind_gust>\d{2,3}))?(?P<wind_unit>KT|MPS|KMH))
+  | (?P<wind_variation>\d{3}V\d{3})
+  | (?P<visibility>(?P<vis_m>\d{4})(?:NDV)?)
+  | (?P<visibility_sm>(?P<sm_bound>[PM])?(?:(?P<sm_num>\d{1,2})/(?P<sm_den>\d{1,2})|(?P<sm_whole>\d{1,2}))SM)
+  | (?P<cavok>CAVOK)
+  | (?P<cloud>(?P<cover>FEW|SCT|BKN|OVC|VV)(?P<height>\d{3}|///)(?P<cloud_type>CB|TCU|///)?)
+  | (?P<sky_clear>SKC|CLR|NSC|NCD)
+  | (?P<nsw>NSW)
+  | (?P<time>(?P<day>\d{2})(?P<hour>\d{2})(?P<minute>\d{2})Z)
+  | (?P<period>(?P<from_day>\d{2})(?P<from_hour>\d{2})/(?P<to_day>\d{2})(?P<to_hour>\d{2}))
+  | (?P<fm>FM(?P<fm_day>\d{2})(?P<fm_hour>\d{2})(?P<fm_minute>\d{2}))
+  | (?P<change>BECMG|TEMPO)
+  | (?P<prob>PROB(?P<probability>\d{2}))
+  | (?P<temperature>(?P<temp>M?\d{2})/(?P<dew>M?\d{2})?)
+  | (?P<weather>(?:[-+]|VC)?(?P<descriptor>MI|PR|BC|DR|BL|SH|TS|FZ)?(?P<phenomena>(?:DZ|RA|SN|SG|IC|PL|GR|GS|UP|BR|FG|FU|VA|DU|SA|HZ|PY|PO|SQ|FC|SS|DS)*))
+  | (?P<whole>\d)
+  | (?P<remarks>RMK)
+""", re.X)
+
+_HEADER_WORDS = frozenset(('METAR', 'SPECI', 'TAF', 'AMD', 'COR', 'AUTO'))
+_DESCRIPTORS = frozenset(('MI', 'PR', 'BC', 'DR', 'BL', 'SH', 'TS', 'FZ'))
+_CEILING_COVERS = frozenset(('BKN', 'OVC', 'VV'))
+
+
+def flight_category(visibility_m, ceiling_ft):
+    """
+    Derives the FAA flight category from visibility and ceiling.
+
+    Missing ceiling counts as unlimited. Returns None when neither value is
+    known.
+    """
+    if visibility_m is None and ceiling_ft is None:
+        return None
+    ceiling = ceiling_ft if ceiling_ft is not None else float('inf')
+    visibility = visibility_m if visibility_m is not None else float('inf')
+    if ceiling < 500 or visibility < 1 * METRES_PER_SM:
+        return "LIFR"
+    if ceiling < 1000 or visibility < 3 * METRES_PER_SM:
+        return "IFR"
+    if ceiling <= 3000 or visibility <= 5 * METRES_PER_SM:
+        return "MVFR"
+    return "VFR"
+
+
+def weather_codes(group):
+    """
+    Splits a decoded weather group into its codes.
+
+    Args:
+        group (str): One group of Observation.weather or ChangeGroup.weather,
+            e.g. "+TSRA", "VCFG" or "TSSN".
+
+    Returns:
+        tuple: (intensity, descriptor, phenomena) such as ("+", "TS", ("RA",));
+        intensity is "-", "+", "VC" or "" and descriptor is "" when absent.
+    """
+    intensity = ''
+    if group[:1] in ('-', '+'):
+        intensity, group = group[0], group[1:]
+    elif group.startswith('VC'):
+        intensity, group = 'VC', group[2:]
+    descriptor = ''
+    if group[:2] in _DESCRIPTORS:
+        descriptor, group = group[:2], group[2:]
+    return intensity, descriptor, tuple(group[i:i + 2] for i in range(0, len(group), 2))
+
+
+class _Conditions:
+    """Mutable accumulator for the weather elements of one report or group.
+    None means "not reported"; an empty tuple means "reported as none"."""
+
+    __slots__ = ('wind_dir', 'wind_speed', 'wind_gust', 'visibility_m', 'weather', 'clouds', 'whole_sm')
+
+    def __init__(self):
+        self.wind_dir = self.wind_speed = self.wind_gust = self.visibility_m = None
+        self.weather = self.clouds = None
+        self.whole_sm = None
+
+    def apply(self, kind, match):
+        """Folds one matched token into the conditions; returns False if it was not a condition."""
+        if kind == 'wind':
+            factor = _wind_factor(match.group('wind_unit'))
+            direction = match.group('wind_dir')
+            self.wind_dir = None if direction == 'VRB' else int(direction)
+            self.wind_speed = round(int(match.group('wind_speed')) * factor)
+            gust = match.group('wind_gust')
+            self.wind_gust = round(int(gust) * factor) if gust else None
+        elif kind == 'visibility':
+            self.visibility_m = min(int(match.group('vis_m')), UNLIMITED_VISIBILITY_M)
+        elif kind == 'visibility_sm':
+            if match.group('sm_whole'):
+                miles = int(match.group('sm_whole'))
+            else:
+                miles = int(match.group('sm_num')) / max(int(match.group('sm_den')), 1)
+                miles += self.whole_sm or 0
+            self.visibility_m = min(round(miles * METRES_PER_SM), UNLIMITED_VISIBILITY_M)
+        elif kind == 'cavok':
+            self.visibility_m = UNLIMITED_VISIBILITY_M
+            self.weather = ()
+            self.clouds = ()
+        elif kind == 'cloud':
+            height = match.group('height')
+            layer = (match.group('cover'), None if height == '///' else int(height) * 100,
+                     match.group('cloud_type') if match.group('cloud_type') != '///' else None)
+            self.clouds = (self.clouds or ()) + (layer,)
+        elif kind == 'sky_clear':
+            self.clouds = ()
+        elif kind == 'nsw':
+            self.weather = ()
+        elif kind == 'weather':
+            if not (match.group('descriptor') or match.group('phenomena')):
+                return False
+            self.weather = (self.weather or ()) + (match.group(0),)
+        elif kind != 'wind_variation':
+            return False
+        return True
+
+    def ceiling_ft(self):
+        heights = [height for cover, height, _ in self.clouds or () if cover in _CEILING_COVERS and height is not None]
+        return min(heights) if heights else None
+
+    def overlay(self, base):
+        """Returns a copy of base with every element reported here replacing base's."""
+        merged = _Conditions()
+        for name in ('wind_dir', 'wind_speed', 'wind_gust', 'visibility_m', 'weather', 'clouds'):
+            setattr(merged, name, getattr(base, name))
+        if self.wind_speed is not None:
+            merged.wind_dir, merged.wind_speed, merged.wind_gust = self.wind_dir, self.wind_speed, self.wind_gust
+        if self.visibility_m is not None:
+            merged.visibility_m = self.visibility_m
+        if self.weather is not None:
+            merged.weather = self.weather
+        if self.clouds is not None:
+            merged.clouds = self.clouds
+        return merged
+
+
+def decode_metar(raw_text):
+    """
+    Decodes a METAR/SPECI in one pass over its tokens.
+
+    Args:
+        raw_text (str): The raw report, e.g. "VIDP 181030Z 29006KT 2500 HZ NSC 31/12 Q1008".
+
+    Returns:
+        Observation: The decoded report. Unrecognised tokens are skipped and
+        everything after RMK or a BECMG/TEMPO trend is ignored.
+    """
+    station = time = temperature = dewpoint = None
+    conditions = _Conditions()
+    for token in raw_text.split():
+        if station is None:
+            if token not in _HEADER_WORDS:
+                station = token
+            continue
+        match = _TOKEN_RE.fullmatch(token)
+        if match is None:
+            conditions.whole_sm = None
+            continue
+        kind = match.lastgroup
+        if kind == 'whole':
+            conditions.whole_sm = int(token)
+            continue
+        if kind in ('remarks', 'change'):
+            # Remarks and BECMG/TEMPO trends do not describe observed conditions.
+            break
+        if kind == 'time':
+            time = _day_time(match, 'day', 'hour', 'minute')
+        elif kind == 'temperature':
+            temperature = _temperature(match.group('temp'))
+            dewpoint = _temperature(match.group('dew'))
+        else:
+            conditions.apply(kind, match)
+        conditions.whole_sm = None
+
+    ceiling = conditions.ceiling_ft()
+    return Observation(station, time, conditions.wind_dir, conditions.wind_speed, conditions.wind_gust,
+                       conditions.visibility_m, conditions.weather or (), conditions.clouds or (), ceiling,
+                       temperature, dewpoint, flight_category(conditions.visibility_m, ceiling))
+
+
+def decode_taf(raw_text):
+    """
+    Decodes a TAF in one pass over its tokens.
+
+    Args:
+        raw_text (str): The raw forecast, e.g. "TAF VIDP 181100Z 1812/1918 30008KT 3000 HZ NSC ...".
+
+    Returns:
+        Forecast: The decoded forecast with the BASE group first, followed by
+        FM, BECMG and TEMPO groups in report order. PROBxx groups carry their
+        probability; a bare PROB group is reported with kind "PROB".
+    """
+    station = issued = valid_from = valid_to = None
+    groups = []
+    current = _Conditions()
+    kind, probability, start, end = "BASE", None, None, None
+    prevailing = None
+
+    def close():
+        nonlocal prevailing
+        if prevailing is None:
+            effective = current
+        else:
+            effective = current.overlay(prevailing)
+        if kind in ("BASE", "FM", "BECMG"):
+            prevailing = effective
+        groups.append([kind, probability, start, end, effective])
+
+    for token in raw_text.split():
+        if station is None:
+            if token not in _HEADER_WORDS:
+                station = token
+            continue
+        match = _TOKEN_RE.fullmatch(token)
+        if match is None:
+            current.whole_sm = None
+            continue
+        token_kind = match.lastgroup
+        if token_kind == 'whole':
+            current.whole_sm = int(token)
+            continue
+        if token_kind == 'remarks':
+            break
+        if token_kind == 'time' and issued is None:
+            issued = _day_time(match, 'day', 'hour', 'minute')
+        elif token_kind == 'period':
+            period_start = _day_time(match, 'from_day', 'from_hour')
+            period_end = _day_time(match, 'to_day', 'to_hour')
+            if valid_from is None:
+                valid_from, valid_to = period_start, period_end
+                start, end = period_start, period_end
+            else:
+                start, end = period_start, period_end
+        elif token_kind in ('fm', 'change', 'prob'):
+            if token_kind == 'change' and kind == "PROB" and current.wind_speed is None \
+                    and current.visibility_m is None and current.weather is None and current.clouds is None:
+                # "PROB30 TEMPO": the change word qualifies the open PROB group.
+                kind = token
+                continue
+            close()
+            current = _Conditions()
+            end = None
+            if token_kind == 'fm':
+                kind, probability = "FM", None
+                start = _day_time(match, 'fm_day', 'fm_hour', 'fm_minute')
+            elif token_kind == 'change':
+                kind, probability, start = token, None, None
+            else:
+                kind, probability, start = "PROB", int(match.group('probability')), None
+        else:
+            current.apply(token_kind, match)
+        current.whole_sm = None
+    close()
+
+    # FM groups run until the next FM group or the end of the forecast.
+    next_start = valid_to
+    for group in reversed(groups):
+        if group[0] == "FM":
+            group[3] = next_start
+            next_start = group[2]
+    groups[0][2], groups[0][3] = valid_from, groups[0][3] or valid_to
+
+    return Forecast(station, issued, valid_from, valid_to, tuple(
+        ChangeGroup(kind, probability, start, end, c.wind_dir, c.wind_speed, c.wind_gust, c.visibility_m,
+                    c.weather or (), c.clouds or (), c.ceiling_ft(), flight_category(c.visibility_m, c.ceiling_ft()))
+        for kind, probability, start, end, c in groups))
+
+
+def _wind_factor(unit):
+    if unit == 'MPS':
+        return KT_PER_MPS
+    if unit == 'KMH':
+        return KT_PER_KMH
+    return 1
+
+
+def _day_time(match, day, hour, minute=None):
+    return (int(match.group(day)), int(match.group(hour)), int(match.group(minute)) if minute else 0)
+
+
+def _temperature(value):
+    if not value:
+        return None
+    return -int(value[1:]) if value[0] == 'M' else int(value)
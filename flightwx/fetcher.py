@@ -0,0 +1,235 @@
+"""
+Shared HTTP session and bounded worker pool for upstream calls.
+
+Every call is bounded by the request's deadline (see flightwx.resilience),
+refused fast while its host's circuit is open, and hedged: when it runs past
+the host's recent latency percentile, a duplicate is sent and the first
+answer wins.
+"""
+import concurrent.futures
+import logging
+import os
+import threading
+import time
+import urllib.parse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from flightwx.metrics import UPSTREAM_HEDGES, UPSTREAM_REQUESTS, UPSTREAM_SECONDS
+from flightwx.resilience import breaker, current_deadline, latency, remaining, run_within
+
+# Seconds allowed for a single upstream HTTP call (connect + read).
+FETCH_TIMEOUT = float(os.environ.get('FETCH_TIMEOUT', 10))
+# Seconds allowed for all upstream work behind one user request.
+REQUEST_DEADLINE = float(os.environ.get('REQUEST_DEADLINE', 25))
+FETCH_WORKERS = int(os.environ.get('FETCH_WORKERS', 8))
+POOL_SIZE = int(os.environ.get('FETCH_POOL_SIZE', 16))
+# Calls running past this percentile of their host's recent latency get a
+# duplicate request; 0 disables hedging.
+HEDGE_PERCENTILE = float(os.environ.get('HEDGE_PERCENTILE', 0.95))
+# Seconds a call waits at least before being hedged, and how many latency
+# samples a host needs before its calls are hedged at all.
+HEDGE_MIN_DELAY = float(os.environ.get('HEDGE_MIN_DELAY', 0.05))
+HEDGE_MIN_SAMPLES = 20
+
+_lock = threading.Lock()
+_session = None
+_executor = None
+_hedge_executor = None
+
+
+def get_session():
+    """Returns the process-wide keep-alive session, creating it on first use."""
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                _session = session
+    return _session
+
+
+def get_executor():
+    """Returns the process-wide worker pool, creating it on first use."""
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=FETCH_WORKERS, thread_name_prefix='flightwx-fetch')
+    return _executor
+
+
+def _get_hedge_executor():
+    # Separate from the fetch pool: hedged calls are made from fetch workers,
+    # which must never wait on tasks queued behind themselves.
+    global _hedge_executor
+    if _hedge_executor is None:
+        with _lock:
+            if _hedge_executor is None:
+                _hedge_executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=2 * FETCH_WORKERS, thread_name_prefix='flightwx-hedge')
+    return _hedge_executor
+
+
+def http_get(url, timeout=None, stream=False):
+    """
+    GETs a URL over the shared session.
+
+    Args:
+        url (str): URL to fetch.
+        timeout (float): Seconds allowed for the call; defaults to
+            FETCH_TIMEOUT and is cut short by the current deadline.
+        stream (bool): Leave the body unread; streamed calls are not hedged.
+
+    Raises:
+        DeadlineExceeded: The current deadline has already passed.
+        CircuitOpenError: The host has been failing and is not being called.
+        requests.exceptions.RequestException: The call itself failed.
+    """
+    host = urllib.parse.urlsplit(url).netloc
+    timeout = remaining(timeout or FETCH_TIMEOUT)
+    breaker(host).check()
+    delay = None if stream or not HEDGE_PERCENTILE else latency(host).percentile(HEDGE_PERCENTILE, HEDGE_MIN_SAMPLES)
+    if delay is None or max(delay, HEDGE_MIN_DELAY) >= timeout:
+        return _attempt(host, url, timeout, stream)
+    return _hedged(host, url, timeout, max(delay, HEDGE_MIN_DELAY))
+
+
+def _attempt(host, url, timeout, stream):
+    started = time.perf_counter()
+    try:
+        response = get_session().get(url, timeout=timeout, stream=stream)
+    except Exception as e:
+        UPSTREAM_REQUESTS.inc(host, type(e).__name__)
+        breaker(host).record(False)
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        UPSTREAM_SECONDS.observe(elapsed, host)
+    UPSTREAM_REQUESTS.inc(host, str(response.status_code))
+    healthy = response.status_code < 500 and response.status_code != 429
+    breaker(host).record(healthy)
+    if healthy:
+        latency(host).observe(elapsed)
+    return response
+
+
+def _hedged(host, url, timeout, delay):
+    executor = _get_hedge_executor()
+    primary = executor.submit(_attempt, host, url, timeout, False)
+    try:
+        return primary.result(timeout=delay)
+    except concurrent.futures.TimeoutError:
+        pass
+    if not breaker(host).allow():
+        return primary.result()
+    hedge = executor.submit(_attempt, host, url, timeout - delay, False)
+    UPSTREAM_HEDGES.inc(host, "sent")
+    pending = {primary, hedge}
+    error = None
+    while pending:
+        done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+        for future in done:
+            try:
+                response = future.result()
+            except Exception as e:
+                error = error or e
+                continue
+            if future is hedge:
+                UPSTREAM_HEDGES.inc(host, "won")
+            for loser in pending:
+                loser.add_done_callback(_close_response)
+            return response
+    raise error
+
+
+def _close_response(future):
+    if not future.cancelled() and future.exception() is None:
+        future.result().close()
+
+
+def gather(tasks, deadline=None):
+    """
+    Runs independent calls concurrently on the shared worker pool.
+
+    Args:
+        tasks (dict): Maps a key to a (callable, *args) tuple.
+        deadline (float): Seconds to wait for all tasks. Defaults to what
+            is left of the current deadline, else REQUEST_DEADLINE. Tasks
+            run within the current deadline.
+
+    Returns:
+        dict: Results keyed like tasks. Tasks that raised or did not finish
+        before the deadline are left out, so callers can fill in their own
+        fallback values.
+    """
+    executor = get_executor()
+    inherited = current_deadline()
+    futures = {executor.submit(run_within, inherited, *call): key for key, call in tasks.items()}
+    done, pending = concurrent.futures.wait(futures, timeout=_wait_seconds(deadline, inherited))
+
+    results = {}
+    for future in done:
+        key = futures[future]
+        try:
+            results[key] = future.result()
+        except Exception as e:
+            logging.error(f"Upstream task {key} failed: {e}")
+    for future in pending:
+        future.cancel()
+        logging.error(f"Upstream task {futures[future]} missed the request deadline")
+    return results
+
+
+def stream(tasks, deadline=None):
+    """
+    Like gather, but yields (key, result) pairs as each task finishes.
+
+    Tasks that raise are logged and skipped. Once the deadline passes, or
+    the caller stops iterating, the remaining tasks are cancelled.
+    """
+    executor = get_executor()
+    inherited = current_deadline()
+    futures = {executor.submit(run_within, inherited, *call): key for key, call in tasks.items()}
+    try:
+        for future in concurrent.futures.as_completed(futures, timeout=_wait_seconds(deadline, inherited)):
+            key = futures.pop(future)
+            try:
+                result = future.result()
+            except Exception as e:
+                logging.error(f"Upstream task {key} failed: {e}")
+                continue
+            yield key, result
+    except concurrent.futures.TimeoutError:
+        for key in futures.values():
+            logging.error(f"Upstream task {key} missed the request deadline")
+    finally:
+        # Also reached when the consumer stops early, e.g. a client disconnect.
+        for future in futures:
+            future.cancel()
+
+
+def _wait_seconds(deadline, inherited):
+    if deadline:
+        return deadline
+    return inherited.remaining() if inherited is not None else REQUEST_DEADLINE
+
+
+def shutdown():
+    """Stops the worker pools and closes pooled connections."""
+    global _session, _executor, _hedge_executor
+    with _lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+        if _hedge_executor is not None:
+            _hedge_executor.shutdown(wait=False, cancel_futures=True)
+            _hedge_executor = None
+        if _session is not None:
+            _session.close()
+            _session = None
@@ -0,0 +1,220 @@
+"""
+En-route cities and ICAO codes of a flight, shared by the CLIs and the API.
+
+The offline route engine, corridor queries and the precomputed route table
+answer without network access; Gemini is only imported and asked when a
+route needs it.
+"""
+import functools
+import json
+import logging
+import os
+import re
+
+from flightwx.metrics import record_error, stage
+from flightwx.resolver import get_city_icao_codes, resolve
+from flightwx.route_table import get_route_table
+from flightwx.routing import ROUTE_MODE, corridor_icao_codes, offline_flight_path_icao_codes
+
+# Share of a request's deadline that route resolution (the Gemini call) may
+# use; the weather fetch gets the rest.
+ROUTE_BUDGET = float(os.environ.get('ROUTE_BUDGET', 0.5))
+
+# JSON schema of the model's answer. The pinned google-generativeai client
+# cannot pass a response schema, so the prompt carries it and parse_routes()
+# enforces it.
+ROUTES_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "routes": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "origin": {"type": "string"},
+                    "destination": {"type": "string"},
+                    "cities": {"type": "array", "items": {"type": "string"}},
+                },
+                "required": ["origin", "destination", "cities"],
+            },
+        },
+    },
+    "required": ["routes"],
+}
+
+FLIGHT_PATH_PROMPT = """
+    You are an expert travel assistant. For each flight in India listed below,
+    suggest a possible flight path between the two airports, listing at least
+    5-10 major cities the flight is likely to pass through, in order from
+    origin to destination. Consider that there may not be direct flights, and
+    provide a reasonable, common route. Do not include the origin or
+    destination airports in the list. If there are no likely cities, or you
+    cannot determine a path, give an empty list.
+
+    Answer with a single JSON object and nothing else, matching this JSON schema:
+    {schema}
+
+    Example:
+    Flights:
+    - DEL to BOM
+    - abcd to xyz
+    Answer:
+    {{"routes": [{{"origin": "DEL", "destination": "BOM", "cities": ["Jaipur", "Udaipur", "Ahmedabad", "Surat"]}},
+                {{"origin": "abcd", "destination": "xyz", "cities": []}}]}}
+
+    Flights:
+{flights}
+"""
+
+_FENCE_RE = re.compile(r'^```(?:json)?\s*(.*?)\s*```$', re.DOTALL)
+
+
+def flight_path_prompt(pairs):
+    """Returns the prompt asking for the en-route cities of every (start, destination) pair."""
+    flights = "\n".join(f"    - {start} to {destination}" for start, destination in pairs)
+    return FLIGHT_PATH_PROMPT.format(schema=json.dumps(ROUTES_SCHEMA), flights=flights)
+
+
+def parse_routes(response_text):
+    """
+    Parses a reply to flight_path_prompt().
+
+    Args:
+        response_text (str): The model's answer, a JSON object per
+            ROUTES_SCHEMA, optionally inside a Markdown code fence.
+
+    Returns:
+        dict: {(ORIGIN, DESTINATION): [city, ...]} with the codes upper-cased;
+        an empty list means the model knows no path. Route entries that do
+        not match the schema are left out.
+
+    Raises:
+        ValueError: The reply is not a JSON object with a "routes" list.
+    """
+    text = response_text.strip()
+    fenced = _FENCE_RE.match(text)
+    if fenced:
+        text = fenced.group(1)
+    answer = json.loads(text)
+    if not isinstance(answer, dict) or not isinstance(answer.get("routes"), list):
+        raise ValueError("model answer has no routes list")
+    routes = {}
+    for entry in answer["routes"]:
+        if not isinstance(entry, dict):
+            continue
+        origin, destination, cities = entry.get("origin"), entry.get("destination"), entry.get("cities")
+        if not isinstance(origin, str) or not isinstance(destination, str) or not isinstance(cities, list) \
+                or not all(isinstance(city, str) for city in cities):
+            continue
+        routes[(origin.strip().upper(), destination.strip().upper())] = \
+            [city.strip() for city in cities if city.strip()]
+    return routes
+
+
+def get_common_flight_path(start_airport_code, destination_airport_code, api_key):
+    """
+    Retrieves a list of major cities that a flight might pass through
+    between two given Indian airports using the Gemini API.
+
+    Results are cached on disk per route, and concurrent lookups of the
+    same route share one Gemini call. Routes in the precomputed route
+    table never get here; see get_flight_path_icao_codes().
+
+    Args:
+        start_airport_code (str): The IATA code of the starting airport.
+        destination_airport_code (str): The IATA code of the destination airport.
+        api_key (str): Gemini API key.
+
+    Returns:
+        list: A list of major cities on a common flight path, or None on error.
+    """
+    from flightwx.route_cache import cached_flight_path
+
+    return cached_flight_path(start_airport_code, destination_airport_code,
+                              functools.partial(_ask_gemini_for_flight_path, api_key=api_key))
+
+
+def _ask_gemini_for_flight_path(start_airport_code, destination_airport_code, api_key):
+    """Asks Gemini for the en-route cities of one route."""
+    try:
+        if not api_key or api_key == "YOUR_API_KEY":
+            raise ValueError("API_KEY is not set. Please replace 'YOUR_API_KEY' with your actual API key.")
+
+        from flightwx.gemini import generate_content, get_model
+
+        model = get_model(api_key)
+        prompt = flight_path_prompt([(start_airport_code, destination_airport_code)])
+        routes = parse_routes(generate_content(model, prompt).text)
+
+        key = (start_airport_code.strip().upper(), destination_airport_code.strip().upper())
+        if key not in routes:
+            raise ValueError(f"model answer has no route for {key[0]}-{key[1]}")
+        return routes[key]
+
+    except ImportError as e:
+        record_error("gemini", e)
+        logging.error(f"ImportError: {e}. Please ensure you have installed the google-generativeai library.  You can install it using: pip install google-generativeai")
+        return None
+    except Exception as e:
+        record_error("gemini", e)
+        logging.error(f"Error in get_common_flight_path: {e}")
+        return None
+
+
+def get_flight_path_icao_codes(start_airport_code, destination_airport_code, route_mode=ROUTE_MODE, corridor_nm=None,
+                               api_key=None):
+    """
+    Resolves the en-route cities of a flight and their ICAO codes.
+
+    Args:
+        start_airport_code (str): The IATA code of the starting airport.
+        destination_airport_code (str): The IATA code of the destination airport.
+        route_mode (str): "offline" uses the built-in route engine, "llm" looks
+            the route up in the precomputed route table and asks Gemini for
+            routes it lacks, "auto" tries the engine first and falls back to Gemini for
+            airports the engine does not know, "corridor" lists every station
+            in the corridor around the great-circle track.
+        corridor_nm (float): Corridor half-width for the route engine.
+        api_key (str): Gemini API key, needed by the "llm" and "auto" modes.
+
+    Returns:
+        dict: City names mapped to ICAO codes in route order, origin and
+        destination included, empty when there is no path, or None on error.
+    """
+    if route_mode == "corridor":
+        with stage("route_corridor"):
+            return corridor_icao_codes(start_airport_code, destination_airport_code, corridor_nm) or {}
+    if route_mode != "llm":
+        with stage("route_offline"):
+            city_icao_codes = offline_flight_path_icao_codes(start_airport_code, destination_airport_code, corridor_nm)
+        if city_icao_codes is not None or route_mode == "offline":
+            return city_icao_codes or {}
+
+    with stage("route_table"):
+        city_icao_codes = get_route_table().lookup(start_airport_code, destination_airport_code)
+    if city_icao_codes is None:
+        from flightwx.resilience import budget
+
+        with stage("gemini"), budget(ROUTE_BUDGET):
+            flight_path_cities = get_common_flight_path(start_airport_code, destination_airport_code, api_key)
+        if flight_path_cities is None:
+            return None
+        with stage("icao_resolve"):
+            city_icao_codes = get_city_icao_codes(flight_path_cities)
+    return _with_endpoints(start_airport_code, destination_airport_code, city_icao_codes)
+
+
+def _with_endpoints(start_airport_code, destination_airport_code, city_icao_codes):
+    # The model only names en-route cities; the departure and arrival
+    # airports lead and close the route, as in the other route modes.
+    if not city_icao_codes:
+        return city_icao_codes
+    origin, destination = resolve(start_airport_code), resolve(destination_airport_code)
+    endpoints = {airport.icao for airport in (origin, destination) if airport}
+    route = {origin.city: origin.icao} if origin else {}
+    for city, icao_code in city_icao_codes.items():
+        if icao_code not in endpoints:
+            route.setdefault(city, icao_code)
+    if destination:
+        route.setdefault(destination.city, destination.icao)
+    return route
@@ -0,0 +1,86 @@
+"""
+Process-wide Gemini model client.
+
+google.generativeai takes most of a second to import, so it is only
+imported once a model is first needed.
+"""
+import os
+import threading
+import time
+import urllib.parse
+
+from flightwx.metrics import UPSTREAM_REQUESTS, UPSTREAM_SECONDS
+from flightwx.resilience import breaker, latency, remaining
+
+MODEL_NAME = 'gemini-2.0-flash'
+# Alternative API endpoint, e.g. a local stand-in; spoken to over REST.
+GEMINI_API_ENDPOINT = os.environ.get('GEMINI_API_ENDPOINT')
+# Seconds allowed for one generateContent call, cut short by the request's
+# deadline. The call is not retried.
+GEMINI_TIMEOUT = float(os.environ.get('GEMINI_TIMEOUT', 10))
+# Label of the Gemini API in metrics and circuit breaking.
+GEMINI_HOST = urllib.parse.urlsplit(GEMINI_API_ENDPOINT).netloc if GEMINI_API_ENDPOINT \
+    else 'generativelanguage.googleapis.com'
+
+_lock = threading.Lock()
+_models = {}
+
+
+def get_model(api_key, model_name=MODEL_NAME):
+    """Returns the GenerativeModel for api_key, configuring the client on first use."""
+    key = (api_key, model_name)
+    model = _models.get(key)
+    if model is None:
+        with _lock:
+            model = _models.get(key)
+            if model is None:
+                import google.generativeai as genai
+
+                if GEMINI_API_ENDPOINT:
+                    genai.configure(api_key=api_key, transport='rest',
+                                    client_options={'api_endpoint': GEMINI_API_ENDPOINT})
+                else:
+                    genai.configure(api_key=api_key)
+                model = genai.GenerativeModel(model_name)
+                _models[key] = model
+    return model
+
+
+def generate_content(model, prompt, timeout=None):
+    """
+    Bounded counterpart of model.generate_content(prompt).
+
+    The call gets at most timeout seconds (default GEMINI_TIMEOUT, capped by
+    the current deadline), is made once instead of going through the API
+    client's default retries, and is refused fast while the Gemini API's
+    circuit is open.
+
+    Raises:
+        DeadlineExceeded: The current deadline has already passed.
+        CircuitOpenError: Recent Gemini calls have been failing.
+    """
+    from google.generativeai import client as genai_client
+    from google.generativeai.types import generation_types
+
+    timeout = remaining(timeout or GEMINI_TIMEOUT)
+    gate = breaker(GEMINI_HOST)
+    gate.check()
+    # The pinned client's generate_content takes no timeout or retry, so the
+    # request is built and sent the same way with both set explicitly.
+    request = model._prepare_request(contents=prompt)
+    if model._client is None:
+        model._client = genai_client.get_default_generative_client()
+    started = time.perf_counter()
+    try:
+        response = model._client.generate_content(request, timeout=timeout, retry=None)
+    except Exception as e:
+        UPSTREAM_REQUESTS.inc(GEMINI_HOST, type(e).__name__)
+        gate.record(False)
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        UPSTREAM_SECONDS.observe(elapsed, GEMINI_HOST)
+    UPSTREAM_REQUESTS.inc(GEMINI_HOST, "200")
+    gate.record(True)
+    latency(GEMINI_HOST).observe(elapsed)
+    return generation_types.GenerateContentResponse.from_response(response)
@@ -0,0 +1,333 @@
+"""
+Append-only archive of decoded observations for trend queries.
+
+Each observation becomes one fixed-size row appended to a per-station,
+per-day log (STATION/YYYY-MM-DD.log). A single write per row keeps appends
+from several server processes intact. Compaction folds closed day logs into
+a per-station monthly segment (STATION/YYYY-MM.seg), sorted by time with
+duplicates dropped and stored column by column. Reads memory-map segments
+and logs and only touch the columns and time range a query asks for.
+
+NumPy is only imported when the archive is read or written.
+"""
+import datetime
+import logging
+import os
+import re
+import threading
+
+from flightwx.cache import report_time
+from flightwx.decoder import decode_metar, decode_taf
+from flightwx.risk import assess_station, forecast_flags, hazard_flags, is_report
+from flightwx.riskboard import CATEGORY_NAMES
+
+HISTORY_ENABLED = os.environ.get('HISTORY_ENABLED', '1').lower() not in ('0', 'false', 'no')
+HISTORY_PATH = os.environ.get(
+    'HISTORY_PATH',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'history'))
+
+# Columns in segment order: widest first so every column stays aligned.
+COLUMNS = (
+    ('time', '<i8'),
+    ('visibility_m', '<f4'),
+    ('ceiling_ft', '<f4'),
+    ('wind_speed', '<f4'),
+    ('wind_gust', '<f4'),
+    ('flight_category', 'i1'),
+    ('risk_score', 'i1'),
+    ('metar_flags', 'u1'),
+    ('taf_flags', 'u1'),
+)
+
+_SEGMENT_MAGIC = b'FWXC'
+_SEGMENT_HEADER = 16
+_LOG_RE = re.compile(r'^(\d{4})-(\d{2})-(\d{2})\.log$')
+_SEGMENT_RE = re.compile(r'^(\d{4})-(\d{2})\.seg$')
+_STATION_RE = re.compile(r'^[A-Z0-9]{4}$')
+
+_record_dtype = None
+
+
+def record_dtype():
+    """Returns the packed NumPy dtype of one log row."""
+    global _record_dtype
+    if _record_dtype is None:
+        import numpy as np
+        _record_dtype = np.dtype(list(COLUMNS))
+    return _record_dtype
+
+
+class HistoryStore:
+    """Station/day partitioned observation archive under one directory."""
+
+    def __init__(self, path=HISTORY_PATH):
+        self.path = path
+        self._last = {}
+        self._lock = threading.Lock()
+
+    def record(self, station, metar, taf, now=None):
+        """
+        Archives the observation in a METAR, scored together with its TAF.
+
+        Reports that are not real observations are skipped, as are repeats
+        of the last observation this process archived for the station.
+
+        Returns:
+            bool: Whether a row was appended.
+        """
+        if not is_report(metar, "METAR") or not _STATION_RE.match(station or ''):
+            return False
+        observed = report_time(metar, now)
+        if observed is None or self._last.get(station) == observed:
+            return False
+
+        import numpy as np
+
+        observation = decode_metar(metar)
+        risk_score, _, category = assess_station(metar, taf)
+        row = np.zeros(1, dtype=record_dtype())
+        row['time'] = int(observed.timestamp())
+        row['visibility_m'] = _number(observation.visibility_m)
+        row['ceiling_ft'] = _number(observation.ceiling_ft)
+        row['wind_speed'] = _number(observation.wind_speed)
+        row['wind_gust'] = _number(observation.wind_gust)
+        row['flight_category'] = CATEGORY_NAMES.index(category) if category else -1
+        row['risk_score'] = risk_score
+        row['metar_flags'] = hazard_flags(observation)
+        row['taf_flags'] = forecast_flags(decode_taf(taf)) if is_report(taf, "TAF") else 0
+        self.append(station, row)
+        with self._lock:
+            self._last[station] = observed
+        return True
+
+    def append(self, station, rows):
+        """Appends rows (a record_dtype array) to the station's day logs."""
+        import numpy as np
+
+        days = (rows['time'] // 86400).astype(np.int64)
+        directory = os.path.join(self.path, station)
+        os.makedirs(directory, exist_ok=True)
+        for day in np.unique(days):
+            name = datetime.datetime.fromtimestamp(int(day) * 86400, datetime.timezone.utc).strftime('%Y-%m-%d')
+            # One write per call so concurrent appenders never interleave rows.
+            with open(os.path.join(directory, f"{name}.log"), 'ab') as log:
+                log.write(rows[days == day].tobytes())
+
+    def query(self, stations, start, end=None, columns=('time', 'flight_category', 'risk_score')):
+        """
+        Reads the archived observations of stations between two times.
+
+        Args:
+            stations (list): ICAO codes.
+            start (datetime): Aware UTC start of the window, inclusive.
+            end (datetime): Aware UTC end of the window, exclusive. Defaults
+                to now.
+            columns (tuple): Column names to return.
+
+        Returns:
+            dict: {station: {column: ndarray}}, sorted by time, with
+            duplicate observations removed.
+        """
+        import numpy as np
+
+        end = end or datetime.datetime.now(datetime.timezone.utc)
+        lo, hi = int(start.timestamp()), int(end.timestamp())
+        wanted = tuple(dict.fromkeys(('time',) + tuple(columns)))
+        result = {}
+        for station in stations:
+            parts = [part for part in self._station_parts(station, start, end, wanted, lo, hi) if len(part['time'])]
+            if not parts:
+                result[station] = {name: np.empty(0, dtype=dict(COLUMNS)[name]) for name in columns}
+                continue
+            merged = {name: np.concatenate([part[name] for part in parts]) for name in wanted}
+            order = np.argsort(merged['time'], kind='stable')
+            times = merged['time'][order]
+            keep = np.ones(len(times), dtype=bool)
+            keep[:-1] = times[1:] != times[:-1]
+            result[station] = {name: merged[name][order][keep] for name in columns}
+        return result
+
+    def compact(self, before=None):
+        """
+        Folds closed day logs into monthly column segments.
+
+        Args:
+            before (date): Logs for this UTC day and later are left alone,
+                since they may still receive rows. Defaults to yesterday, so
+                late reports near midnight still land in an open log.
+
+        Returns:
+            dict: Counts of stations, logs and rows compacted.
+        """
+        import numpy as np
+
+        before = before or (datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=1)).date()
+        totals = {"stations": 0, "logs": 0, "rows": 0}
+        for station in self._stations():
+            directory = os.path.join(self.path, station)
+            months = {}
+            for name in os.listdir(directory):
+                match = _LOG_RE.match(name)
+                if match and datetime.date(*map(int, match.groups())) < before:
+                    months.setdefault(name[:7], []).append(os.path.join(directory, name))
+            for month, logs in sorted(months.items()):
+                segment = os.path.join(directory, f"{month}.seg")
+                parts = [_read_segment(segment)] if os.path.exists(segment) else []
+                parts.extend(_read_log(log) for log in sorted(logs))
+                merged = {name: np.concatenate([part[name] for part in parts]) for name, _ in COLUMNS}
+                # Sort newest-write-last, then keep the last row of each time.
+                order = np.argsort(merged['time'], kind='stable')
+                times = merged['time'][order]
+                keep = np.ones(len(times), dtype=bool)
+                keep[:-1] = times[1:] != times[:-1]
+                _write_segment(segment, {name: merged[name][order][keep] for name, _ in COLUMNS})
+                for log in logs:
+                    os.remove(log)
+                totals["logs"] += len(logs)
+                totals["rows"] += int(keep.sum())
+            if months:
+                totals["stations"] += 1
+        return totals
+
+    def stats(self):
+        """Returns file counts and bytes on disk."""
+        stats = {"stations": 0, "logs": 0, "segments": 0, "bytes": 0}
+        for station in self._stations():
+            stats["stations"] += 1
+            directory = os.path.join(self.path, station)
+            for name in os.listdir(directory):
+                kind = "logs" if _LOG_RE.match(name) else "segments" if _SEGMENT_RE.match(name) else None
+                if kind:
+                    stats[kind] += 1
+                    stats["bytes"] += os.path.getsize(os.path.join(directory, name))
+        return stats
+
+    def _stations(self):
+        if not os.path.isdir(self.path):
+            return []
+        return sorted(name for name in os.listdir(self.path) if _STATION_RE.match(name))
+
+    def _station_parts(self, station, start, end, wanted, lo, hi):
+        import numpy as np
+
+        directory = os.path.join(self.path, station)
+        if not os.path.isdir(directory):
+            return
+        first_month, last_month = start.strftime('%Y-%m'), end.strftime('%Y-%m')
+        first_day, last_day = start.strftime('%Y-%m-%d'), end.strftime('%Y-%m-%d')
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            if _SEGMENT_RE.match(name) and first_month <= name[:7] <= last_month:
+                segment = _read_segment(path, wanted)
+                # Segments are sorted by time, so the window is a slice.
+                i, j = np.searchsorted(segment['time'], (lo, hi))
+                yield {column: values[i:j] for column, values in segment.items()}
+            elif _LOG_RE.match(name) and first_day <= name[:10] <= last_day:
+                rows = _read_log(path)
+                mask = (rows['time'] >= lo) & (rows['time'] < hi)
+                yield {column: rows[column][mask] for column in wanted}
+
+
+def _read_log(path):
+    import numpy as np
+
+    dtype = record_dtype()
+    # A torn final row from an interrupted append is ignored.
+    count = os.path.getsize(path) // dtype.itemsize
+    if count == 0:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode='r', shape=(count,))
+
+
+def _read_segment(path, columns=None):
+    import numpy as np
+
+    buffer = np.memmap(path, dtype=np.uint8, mode='r')
+    if bytes(buffer[:4]) != _SEGMENT_MAGIC:
+        raise ValueError(f"{path} is not a history segment")
+    count = int(buffer[8:16].view('<u8')[0])
+    result = {}
+    offset = _SEGMENT_HEADER
+    for name, dtype in COLUMNS:
+        dtype = np.dtype(dtype)
+        if columns is None or name in columns:
+            result[name] = np.frombuffer(buffer, dtype=dtype, count=count, offset=offset)
+        offset += count * dtype.itemsize
+    return result
+
+
+def _write_segment(path, columns):
+    import numpy as np
+
+    count = len(columns['time'])
+    temporary = f"{path}.tmp"
+    with open(temporary, 'wb') as segment:
+        segment.write(_SEGMENT_MAGIC + bytes(4) + np.uint64(count).tobytes())
+        for name, dtype in COLUMNS:
+            segment.write(np.ascontiguousarray(columns[name], dtype=dtype).tobytes())
+    os.replace(temporary, path)
+
+
+def _number(value):
+    return float('nan') if value is None else float(value)
+
+
+HISTORY = HistoryStore()
+
+
+def record_observation(station, metar, taf):
+    """Archives a station's observation if history is enabled; never raises."""
+    if not HISTORY_ENABLED:
+        return False
+    try:
+        return HISTORY.record(station, metar, taf)
+    except Exception as e:
+        logging.error(f"Error archiving observation for {station}: {e}")
+        return False
+
+
+def route_history(stations, days=7, now=None):
+    """
+    Summarizes the archived flight categories and risk of stations.
+
+    Args:
+        stations (list): ICAO codes, e.g. those on a route.
+        days (float): Size of the window ending now.
+
+    Returns:
+        dict: {station: {"observations", "time", "flight_category",
+        "risk_score", "categories", "hazardous_fraction",
+        "max_risk_score"}} with times as epoch seconds.
+    """
+    import numpy as np
+
+    now = now or datetime.datetime.now(datetime.timezone.utc)
+    series = HISTORY.query(stations, now - datetime.timedelta(days=days), now)
+    result = {}
+    for station, columns in series.items():
+        categories = columns['flight_category']
+        risk = columns['risk_score']
+        counts = np.bincount(categories[categories >= 0], minlength=len(CATEGORY_NAMES))
+        result[station] = {
+            "observations": len(risk),
+            "time": columns['time'].tolist(),
+            "flight_category": [CATEGORY_NAMES[code] if code >= 0 else None for code in categories.tolist()],
+            "risk_score": risk.tolist(),
+            "categories": dict(zip(CATEGORY_NAMES, counts.tolist())),
+            "hazardous_fraction": float((risk > 0).mean()) if len(risk) else None,
+            "max_risk_score": int(risk.max()) if len(risk) else None,
+        }
+    return result
+
+
+if __name__ == '__main__':
+    import argparse
+    import json
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Observation archive maintenance")
+    parser.add_argument('command', choices=('compact', 'stats'))
+    args = parser.parse_args()
+    if args.command == 'compact':
+        print(json.dumps(HISTORY.compact()))
+    print(json.dumps(HISTORY.stats()))
@@ -0,0 +1,221 @@
+"""
+In-process metrics with Prometheus text exposition.
+
+Counters, gauges and histograms are labelled and thread safe. stage()
+times a block into the stage histogram and, for the request being served on
+the current thread, into its Server-Timing entries. With METRICS_ENABLED
+off every call returns immediately and stage() hands back a shared no-op
+context manager.
+"""
+import bisect
+import os
+import threading
+import time
+
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1').lower() not in ('0', 'false', 'no')
+# Seconds; upper bounds of the latency histogram buckets.
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            lines.extend(self._samples(labels, value))
+        return lines
+
+    def _samples(self, labels, value):
+        return [f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}"]
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, *labels, amount=1):
+        if not METRICS_ENABLED:
+            return
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def inc(self, *labels, amount=1):
+        if not METRICS_ENABLED:
+            return
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels, amount=1):
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, *labels):
+        if not METRICS_ENABLED:
+            return
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def _samples(self, labels, state):
+        counts, total, count = state
+        names = self.labelnames + ('le',)
+        lines = []
+        cumulative = 0
+        for bound, bucket in zip(self.buckets + (float('inf'),), counts):
+            cumulative += bucket
+            le = '+Inf' if bound == float('inf') else _number(bound)
+            lines.append(f"{self.name}_bucket{_labels(names, labels + (le,))} {cumulative}")
+        lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(total)}")
+        lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {count}")
+        return lines
+
+
+class _Stage:
+    __slots__ = ('name', 'started')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self.started
+        STAGE_SECONDS.observe(elapsed, self.name)
+        timings = getattr(_request, 'timings', None)
+        if timings is not None:
+            timings.append((self.name, elapsed))
+        return False
+
+
+class _NoStage:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NO_STAGE = _NoStage()
+_request = threading.local()
+_registry = []
+_collectors = []
+
+
+def _register(metric):
+    _registry.append(metric)
+    return metric
+
+
+STAGE_SECONDS = _register(Histogram(
+    'flightwx_stage_seconds', "Time spent in each request stage.", ('stage',)))
+UPSTREAM_SECONDS = _register(Histogram(
+    'flightwx_upstream_seconds', "Latency of upstream HTTP calls per host.", ('host',)))
+UPSTREAM_REQUESTS = _register(Counter(
+    'flightwx_upstream_requests_total', "Upstream HTTP calls per host and outcome.", ('host', 'outcome')))
+UPSTREAM_HEDGES = _register(Counter(
+    'flightwx_upstream_hedges_total', "Hedged duplicate upstream calls sent, and those that answered first.",
+    ('host', 'outcome')))
+HTTP_REQUESTS = _register(Counter(
+    'flightwx_http_requests_total', "Requests served per endpoint and status code.", ('endpoint', 'status')))
+HTTP_IN_FLIGHT = _register(Gauge(
+    'flightwx_http_requests_in_flight', "Requests currently being served per endpoint.", ('endpoint',)))
+ERRORS = _register(Counter(
+    'flightwx_errors_total', "Errors per stage and exception type.", ('stage', 'type')))
+
+
+def stage(name):
+    """Returns a context manager timing one stage of the current request."""
+    if not METRICS_ENABLED:
+        return _NO_STAGE
+    return _Stage(name)
+
+
+def record_error(stage_name, error):
+    """Counts an error by stage and type; error is an exception or a short type string."""
+    ERRORS.inc(stage_name, error if isinstance(error, str) else type(error).__name__)
+
+
+def begin_request():
+    """Starts collecting stage timings for the request on this thread."""
+    if METRICS_ENABLED:
+        _request.timings = []
+
+
+def end_request():
+    """Stops collecting and returns the [(stage, seconds)] recorded on this thread."""
+    timings = getattr(_request, 'timings', None)
+    _request.timings = None
+    return timings or []
+
+
+def server_timing(timings):
+    """Formats stage timings as a Server-Timing header value, summing repeated stages."""
+    totals = {}
+    for name, seconds in timings:
+        totals[name] = totals.get(name, 0) + seconds
+    return ', '.join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in totals.items())
+
+
+def register_collector(collect):
+    """Registers collect() -> [lines], called on every render for values kept elsewhere."""
+    _collectors.append(collect)
+
+
+def exposition(name, kind, documentation, samples):
+    """Formats [(labels_dict, value)] as the lines of one metric, for collectors."""
+    lines = [f"# HELP {name} {documentation}", f"# TYPE {name} {kind}"]
+    for labels, value in samples:
+        lines.append(f"{name}{_labels(tuple(labels), tuple(labels.values()))} {_number(value)}")
+    return lines
+
+
+def render():
+    """Returns every metric in the Prometheus text exposition format."""
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    for collect in _collectors:
+        lines.extend(collect())
+    return '\n'.join(lines) + '\n'
+
+
+def _labels(names, values):
+    if not names:
+        return ''
+    pairs = ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return '{' + pairs + '}'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _number(value):
+    return str(value) if isinstance(value, int) else repr(float(value))
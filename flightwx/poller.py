@@ -0,0 +1,126 @@
+"""Background poller keeping the latest report of every station in memory."""
+import collections
+import logging
+import os
+import threading
+import time
+
+from flightwx.aviationweather import METAR_CACHE_URL, TAF_CACHE_URL, iter_cache_file
+
+POLL_ENABLED = os.environ.get('NETWORK_POLL', '').lower() in ('1', 'true', 'yes')
+# Seconds between downloads of the bulk cache files.
+POLL_INTERVAL = int(os.environ.get('POLL_INTERVAL', 5 * 60))
+# Tables older than this are not served, so a poller that keeps failing
+# falls back to per-request fetches instead of serving old weather.
+POLL_MAX_AGE = int(os.environ.get('POLL_MAX_AGE', 3 * POLL_INTERVAL))
+
+StationTable = collections.namedtuple('StationTable', 'product reports loaded_at')
+StationTable.__doc__ = """One product's reports for the whole network: {station_id: raw_text}
+and the time.time() at which the table was loaded. Never mutated once built."""
+
+
+class NetworkPoller:
+    """
+    Downloads the bulk METAR/TAF cache files on a fixed cadence and swaps in
+    a fresh StationTable per product. Readers take the current table without
+    locking; a swap is a single reference assignment.
+    """
+
+    def __init__(self, sources=None, interval=POLL_INTERVAL, max_age=POLL_MAX_AGE):
+        self.sources = sources or {"METAR": METAR_CACHE_URL, "TAF": TAF_CACHE_URL}
+        self.interval = interval
+        self.max_age = max_age
+        self._tables = {}
+        self._listeners = []
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self.polls = 0
+        self.failures = 0
+
+    def reports(self, product, now=None):
+        """Returns {station_id: raw_text} for product, or None if there is no fresh table."""
+        table = self._tables.get(product)
+        if table is None or (now or time.time()) - table.loaded_at > self.max_age:
+            return None
+        return table.reports
+
+    def poll(self):
+        """Downloads and swaps in every product once; failures keep the previous table."""
+        for product, source in self.sources.items():
+            started = time.monotonic()
+            try:
+                reports = {}
+                for station, raw_text in iter_cache_file(source, product):
+                    reports.setdefault(station, raw_text)
+            except Exception as e:
+                logging.error(f"Error polling {product} cache file {source}: {e}")
+                with self._lock:
+                    self.failures += 1
+                continue
+
+            table = StationTable(product, reports, time.time())
+            with self._lock:
+                previous = self._tables.get(product)
+                self._tables[product] = table
+                self.polls += 1
+                listeners = list(self._listeners)
+            logging.info(f"Loaded {len(reports)} {product} reports in {(time.monotonic() - started) * 1000:.0f} ms")
+            for listener in listeners:
+                try:
+                    listener(product, previous, table)
+                except Exception as e:
+                    logging.error(f"Error in {product} table listener: {e}")
+
+    def subscribe(self, listener):
+        """Registers listener(product, previous_table, table), called after every swap."""
+        with self._lock:
+            self._listeners.append(listener)
+
+    def start(self):
+        """Starts polling on a daemon thread; the first poll runs immediately."""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='flightwx-poller', daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=None):
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._stop.set()
+            thread.join(timeout)
+
+    def stats(self):
+        now = time.time()
+        with self._lock:
+            return {
+                "running": self._thread is not None,
+                "interval": self.interval,
+                "polls": self.polls,
+                "failures": self.failures,
+                "stations": {product: len(table.reports) for product, table in self._tables.items()},
+                "age": {product: round(now - table.loaded_at, 1) for product, table in self._tables.items()},
+            }
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.poll()
+            self._stop.wait(self.interval)
+
+
+NETWORK = NetworkPoller()
+
+
+def start_poller():
+    """Starts the network poller when NETWORK_POLL is set; returns whether it runs."""
+    if POLL_ENABLED:
+        NETWORK.start()
+    return POLL_ENABLED
+
+
+def network_reports(product):
+    """Returns the polled {station_id: raw_text} table for product, or None."""
+    return NETWORK.reports(product)
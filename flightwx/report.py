@@ -0,0 +1,82 @@
+"""Weather reports and risk assessment for a list of stations, shared by the CLIs and the API."""
+from flightwx.cache import cached_metars, cached_tafs
+from flightwx.fetcher import gather
+from flightwx.metrics import stage
+from flightwx.risk import assess_station
+
+
+def fetch_metar(icao_code):
+    """Fetches METAR data for a given ICAO code from aviationweather.gov."""
+    return cached_metars([icao_code])[icao_code]
+
+
+def fetch_taf(icao_code):
+    """Fetches TAF data for a given ICAO code from aviationweather.gov."""
+    return cached_tafs([icao_code])[icao_code]
+
+
+def generate_weather_report(icao_list, deadline=None, archive=False):
+    """
+    Generates a weather report and risk assessment for a list of ICAO codes.
+
+    METAR and TAF are fetched concurrently; whatever has not arrived within
+    the deadline (seconds, defaults to what is left of the request's
+    deadline) is reported as failed.
+    """
+    metars, tafs = fetch_reports(icao_list, deadline)
+    return assess_reports(icao_list, metars, tafs, archive)
+
+
+def fetch_reports(icao_list, deadline=None):
+    """Returns ({icao: metar}, {icao: taf}), with a failure text for anything not fetched in time."""
+    with stage("weather_fetch"):
+        reports = gather({
+            "metar": (cached_metars, icao_list),
+            "taf": (cached_tafs, icao_list),
+        }, deadline=deadline)
+    metars = reports.get("metar", {})
+    tafs = reports.get("taf", {})
+    return ({airport: metars.get(airport, "METAR fetch failed") for airport in icao_list},
+            {airport: tafs.get(airport, "TAF fetch failed") for airport in icao_list})
+
+
+def assess_reports(icao_list, metars, tafs, archive=False):
+    """Scores every station's fetched reports into its weather entry."""
+    result = {}
+    with stage("risk"):
+        for airport in icao_list:
+            result[airport] = station_weather(airport, metars[airport], tafs[airport], archive)
+    return result
+
+
+def station_weather(icao_code, metar, taf, archive=False):
+    """
+    Builds the weather entry of one station from its raw METAR and TAF.
+    "degraded" is set when a report could not be fetched in time, so the
+    assessment is partial. With archive, the observation is also recorded
+    for trend queries.
+    """
+    if archive:
+        from flightwx.history import record_observation
+
+        record_observation(icao_code, metar, taf)
+    risk_score, risk_details, flight_category = assess_station(metar, taf)
+    return {
+        "metar": metar,
+        "taf": taf,
+        "flight_category": flight_category,
+        "risk_score": risk_score,
+        "risk_details": risk_details,
+        "degraded": is_degraded(metar) or is_degraded(taf)
+    }
+
+
+def route_report(city_icao_codes, weather_report):
+    """Combines a route's cities, in order, with their stations' weather entries."""
+    return [{"city": city, "icao_code": icao_code, "weather": weather_report.get(icao_code, {})}
+            for city, icao_code in city_icao_codes.items()]
+
+
+def is_degraded(report):
+    """True when a report is a fetch failure rather than data or "No ... data"."""
+    return not isinstance(report, str) or "failed" in report
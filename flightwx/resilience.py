@@ -0,0 +1,236 @@
+"""
+Deadline budgets, per-host circuit breakers and latency tracking for upstream calls.
+
+A Deadline is installed for the request being served on the current thread
+with within(); upstream calls read it through remaining() and never wait
+past it. Stages take a share of what is left with budget(), so a slow route
+lookup cannot use up the time the weather fetch needs. gather() and
+stream() carry the caller's deadline over to their worker threads.
+"""
+import collections
+import contextlib
+import os
+import threading
+import time
+
+import requests
+
+from flightwx.metrics import exposition, register_collector
+
+# Consecutive failures that open a host's circuit, and seconds it stays open
+# before one trial call is let through.
+BREAKER_FAILURES = int(os.environ.get('BREAKER_FAILURES', 5))
+BREAKER_RESET = float(os.environ.get('BREAKER_RESET', 30))
+# Recent successful call latencies kept per host for percentiles.
+LATENCY_WINDOW = 200
+
+CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+_local = threading.local()
+
+
+class DeadlineExceeded(requests.exceptions.Timeout):
+    """The request's deadline passed before an upstream call could start."""
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """The upstream host's circuit is open; the call was not attempted."""
+
+
+class Deadline:
+    """A point in time after which no more upstream work is started."""
+
+    def __init__(self, seconds, parent=None):
+        self.expires = time.monotonic() + max(seconds, 0)
+        if parent is not None:
+            self.expires = min(self.expires, parent.expires)
+
+    def remaining(self):
+        """Seconds left, never negative."""
+        return max(self.expires - time.monotonic(), 0.0)
+
+    def expired(self):
+        return time.monotonic() >= self.expires
+
+    def share(self, fraction):
+        """Returns a child deadline ending after fraction of the time left."""
+        return Deadline(self.remaining() * fraction, parent=self)
+
+
+def current_deadline():
+    """Returns the deadline installed on this thread, or None."""
+    return getattr(_local, 'deadline', None)
+
+
+def set_deadline(deadline):
+    """Installs deadline (or None) on this thread, e.g. from request hooks."""
+    _local.deadline = deadline
+
+
+@contextlib.contextmanager
+def within(deadline):
+    """Installs deadline on this thread for the duration of the block."""
+    previous = current_deadline()
+    set_deadline(deadline)
+    try:
+        yield deadline
+    finally:
+        set_deadline(previous)
+
+
+def budget(fraction):
+    """Runs the block within fraction of the current deadline; no-op without one."""
+    deadline = current_deadline()
+    return within(deadline.share(fraction) if deadline is not None else None)
+
+
+def remaining(default):
+    """
+    Seconds an upstream call may take: default, capped by the current deadline.
+
+    Raises:
+        DeadlineExceeded: The current deadline has already passed.
+    """
+    deadline = current_deadline()
+    if deadline is None:
+        return default
+    left = deadline.remaining()
+    if left <= 0:
+        raise DeadlineExceeded("request deadline exceeded")
+    return min(default, left) if default else left
+
+
+def run_within(deadline, fn, *args):
+    """Calls fn(*args) with deadline installed; used to hand it to worker threads."""
+    with within(deadline):
+        return fn(*args)
+
+
+class CircuitBreaker:
+    """
+    Fails calls to one host fast after repeated failures.
+
+    Closed: calls go through and consecutive failures are counted. Open:
+    calls are refused until reset_timeout has passed. Half open: one trial
+    call goes through; its success closes the circuit, its failure opens it
+    again.
+    """
+
+    def __init__(self, host, failures=BREAKER_FAILURES, reset_timeout=BREAKER_RESET):
+        self.host = host
+        self.failure_threshold = failures
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.rejected = 0
+        self.trips = 0
+        self._trial = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Returns whether a call may be made now."""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+                self._trial = False
+            if self.state == HALF_OPEN and not self._trial:
+                self._trial = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record(self, success):
+        with self._lock:
+            if success:
+                self.state = CLOSED
+                self.failures = 0
+                return
+            self.failures += 1
+            if self.state == HALF_OPEN or (self.state == CLOSED and self.failures >= self.failure_threshold):
+                if self.state == CLOSED:
+                    self.trips += 1
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+                self._trial = False
+
+    def check(self):
+        """Raises CircuitOpenError unless a call may be made now."""
+        if not self.allow():
+            raise CircuitOpenError(f"circuit open for {self.host}")
+
+    def stats(self):
+        with self._lock:
+            return {"state": self.state, "failures": self.failures, "trips": self.trips, "rejected": self.rejected}
+
+
+class LatencyTracker:
+    """Sliding window of recent successful call latencies for one host."""
+
+    def __init__(self, size=LATENCY_WINDOW):
+        self._samples = collections.deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, fraction, min_samples=1):
+        """Returns the fraction percentile, or None with fewer than min_samples."""
+        with self._lock:
+            if len(self._samples) < min_samples:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+
+
+_hosts_lock = threading.Lock()
+_breakers = {}
+_latencies = {}
+
+
+def breaker(host):
+    """Returns the process-wide circuit breaker of a host."""
+    found = _breakers.get(host)
+    if found is None:
+        with _hosts_lock:
+            found = _breakers.setdefault(host, CircuitBreaker(host))
+    return found
+
+
+def latency(host):
+    """Returns the process-wide latency tracker of a host."""
+    found = _latencies.get(host)
+    if found is None:
+        with _hosts_lock:
+            found = _latencies.setdefault(host, LatencyTracker())
+    return found
+
+
+def upstream_stats():
+    """Returns each host's circuit state and recent latency percentiles."""
+    stats = {}
+    for host, found in list(_breakers.items()):
+        stats[host] = found.stats()
+        tracker = _latencies.get(host)
+        for name, fraction in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99)):
+            seconds = tracker.percentile(fraction) if tracker else None
+            stats[host][f"{name}_ms"] = round(seconds * 1000, 1) if seconds is not None else None
+    return stats
+
+
+def _breaker_metrics():
+    hosts = sorted(_breakers.items())
+    lines = exposition('flightwx_upstream_circuit_state', 'gauge',
+                       "Circuit state per upstream host: 0 closed, 1 half open, 2 open.",
+                       [({"host": host}, _STATE_VALUES[found.state]) for host, found in hosts])
+    lines += exposition('flightwx_upstream_circuit_rejected_total', 'counter',
+                        "Calls refused by an open circuit per upstream host.",
+                        [({"host": host}, found.rejected) for host, found in hosts])
+    return lines
+
+
+register_collector(_breaker_metrics)
@@ -0,0 +1,135 @@
+"""Indexed lookup of airports by IATA code, ICAO code or city name."""
+import difflib
+import re
+import threading
+import unicodedata
+
+from flightwx.airports import load_airports
+
+# Similarity a fuzzy match needs to be accepted (difflib ratio, 0..1).
+FUZZY_CUTOFF = 0.82
+
+_NAME_NOISE_RE = re.compile(r'\b(international|intl|airport|aerodrome|airfield)\b')
+_NON_ALNUM_RE = re.compile(r'[^a-z0-9]+')
+
+
+def normalize_name(name):
+    """Folds case, diacritics, punctuation and spacing: "Bengalūru " -> "bengaluru"."""
+    decomposed = unicodedata.normalize('NFKD', name)
+    ascii_name = ''.join(ch for ch in decomposed if not unicodedata.combining(ch)).lower()
+    return _NON_ALNUM_RE.sub('', ascii_name)
+
+
+class AirportResolver:
+    """
+    Hash indexes over the airport table. Names resolve through city names
+    first, then aliases, then airport names, then a fuzzy match whose
+    results are memoized.
+    """
+
+    def __init__(self, airports):
+        self.by_iata = {}
+        self.by_icao = {}
+        self.by_name = {}
+        for airport in airports:
+            self.by_icao[airport.icao] = airport
+            if airport.iata:
+                self.by_iata[airport.iata] = airport
+        # Insert weakest keys first so stronger ones overwrite them.
+        for airport in airports:
+            stripped = _NAME_NOISE_RE.sub(' ', airport.name.lower())
+            self.by_name.setdefault(normalize_name(stripped), airport)
+        for airport in airports:
+            for alias in airport.aliases:
+                self.by_name[normalize_name(alias)] = airport
+        for airport in airports:
+            self.by_name[normalize_name(airport.city)] = airport
+
+        self._buckets = {}
+        for key in self.by_name:
+            self._buckets.setdefault(key[:1], []).append(key)
+        self._fuzzy = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, query):
+        """
+        Resolves a code or place name to an Airport record.
+
+        Args:
+            query (str): IATA code, ICAO code, city, alias or airport name.
+
+        Returns:
+            Airport: The matching airport, or None.
+        """
+        if not isinstance(query, str):
+            return None
+        code = query.strip().upper()
+        if len(code) == 3 and code in self.by_iata:
+            return self.by_iata[code]
+        if len(code) == 4 and code in self.by_icao:
+            return self.by_icao[code]
+        key = normalize_name(query)
+        if not key:
+            return None
+        airport = self.by_name.get(key)
+        if airport is None:
+            key = normalize_name(_NAME_NOISE_RE.sub(' ', query.lower())) or key
+            airport = self.by_name.get(key) or self._fuzzy_match(key)
+        return airport
+
+    def resolve_many(self, queries):
+        """Resolves every query; returns {query: Airport or None}."""
+        return {query: self.resolve(query) for query in queries}
+
+    def _fuzzy_match(self, key):
+        if key in self._fuzzy:
+            return self._fuzzy[key]
+        candidates = [name for name in self._buckets.get(key[:1], ()) if abs(len(name) - len(key)) <= 3]
+        matches = difflib.get_close_matches(key, candidates, n=1, cutoff=FUZZY_CUTOFF)
+        airport = self.by_name[matches[0]] if matches else None
+        with self._lock:
+            self._fuzzy[key] = airport
+        return airport
+
+
+_lock = threading.Lock()
+_resolver = None
+
+
+def get_resolver():
+    """Returns the resolver over the bundled airports, building its indexes once."""
+    global _resolver
+    if _resolver is None:
+        with _lock:
+            if _resolver is None:
+                _resolver = AirportResolver(load_airports())
+    return _resolver
+
+
+def resolve(query):
+    """Resolves one code or place name to an Airport record, or None."""
+    return get_resolver().resolve(query)
+
+
+def resolve_many(queries):
+    """Resolves many codes or place names; returns {query: Airport or None}."""
+    return get_resolver().resolve_many(queries)
+
+
+def get_city_icao_codes(cities):
+    """
+    Retrieves ICAO codes for a list of cities.
+
+    Args:
+        cities (list): City names, aliases or airport codes.
+
+    Returns:
+        dict: A dictionary where keys are city names and values are their
+        ICAO codes, or "Unknown" for places the resolver cannot match.
+    """
+    resolver = get_resolver()
+    icao_codes = {}
+    for city in cities:
+        airport = resolver.resolve(city)
+        icao_codes[city] = airport.icao if airport else "Unknown"
+    return icao_codes
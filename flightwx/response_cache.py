@@ -0,0 +1,204 @@
+"""
+Cache of serialized, pre-compressed API responses with strong ETags.
+
+An entry holds one response body as identity, gzip and (when the brotli
+package is installed) brotli bytes, plus an ETag derived from the body.
+Each encoding is a different representation and is sent with its own
+strong ETag (see encoding_etag()).
+Entries are stored per key, e.g. a resolved route, together with the
+observation version they were built from. A lookup with any other version
+misses, so a new METAR or TAF for any station on the route invalidates the
+route's response.
+"""
+import collections
+import gzip
+import hashlib
+import os
+import threading
+
+from flightwx.metrics import exposition, register_collector
+
+RESPONSE_CACHE_MAX_BYTES = int(os.environ.get('RESPONSE_CACHE_MAX_BYTES', 8 * 1024 * 1024))
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+# Bodies smaller than this are not worth compressing.
+MIN_COMPRESS_BYTES = 512
+
+CachedResponse = collections.namedtuple('CachedResponse', 'etag identity gzip br size')
+
+_brotli = None
+_brotli_checked = False
+
+
+def _get_brotli():
+    global _brotli, _brotli_checked
+    if not _brotli_checked:
+        try:
+            import brotli
+            _brotli = brotli
+        except ImportError:
+            _brotli = None
+        _brotli_checked = True
+    return _brotli
+
+
+def observation_version(stations, metars, tafs):
+    """Digest of the reports behind a response; changes with any new report."""
+    digest = hashlib.blake2b(digest_size=16)
+    for station in stations:
+        for report in (metars.get(station), tafs.get(station)):
+            digest.update(str(report).encode())
+            digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def encode(body):
+    """
+    Builds the cached form of a response body.
+
+    Args:
+        body (bytes): The serialized, uncompressed body.
+
+    Returns:
+        CachedResponse: The body in each encoding and the strong ETag of the
+        identity body (a quoted digest of its bytes, equal across processes).
+    """
+    etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+    gzipped = brotlied = None
+    if len(body) >= MIN_COMPRESS_BYTES:
+        gzipped = gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+        brotli = _get_brotli()
+        if brotli is not None:
+            brotlied = brotli.compress(body, quality=BROTLI_QUALITY)
+    size = len(body) + len(gzipped or b'') + len(brotlied or b'')
+    return CachedResponse(etag, body, gzipped, brotlied, size)
+
+
+def encoding_etag(entry, encoding=None):
+    """
+    Returns the strong ETag of the entry's body in encoding: the identity
+    ETag for None, with "-gzip" or "-br" appended inside the quotes for the
+    compressed bodies, so each distinct byte sequence has its own tag.
+    """
+    if encoding is None:
+        return entry.etag
+    return f'{entry.etag[:-1]}-{encoding}"'
+
+
+def entry_etags(entry):
+    """Returns the ETags of every body the entry holds, identity first."""
+    return [encoding_etag(entry, encoding)
+            for encoding, body in ((None, entry.identity), ('gzip', entry.gzip), ('br', entry.br))
+            if body is not None]
+
+
+def negotiate(entry, accept_encodings):
+    """
+    Picks the body to send for a request's Accept-Encoding.
+
+    Args:
+        entry (CachedResponse): Cached response.
+        accept_encodings (MIMEAccept-like): Anything with quality(encoding),
+            e.g. werkzeug's request.accept_encodings.
+
+    Returns:
+        tuple: (body, content_encoding) with content_encoding None for identity.
+    """
+    choices = [(accept_encodings.quality('br'), 2, entry.br, 'br'),
+               (accept_encodings.quality('gzip'), 1, entry.gzip, 'gzip')]
+    for quality, _, body, encoding in sorted(choices, reverse=True, key=lambda choice: choice[:2]):
+        if quality > 0 and body is not None:
+            return body, encoding
+    return entry.identity, None
+
+
+class ResponseCache:
+    """LRU map of key -> (observation version, CachedResponse), bounded by bytes."""
+
+    def __init__(self, max_bytes=RESPONSE_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = collections.OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.not_modified = 0
+        self.evictions = 0
+
+    def get(self, key, version):
+        """Returns the CachedResponse stored for key at version, or None."""
+        with self._lock:
+            stored = self._entries.get(key)
+            if stored is None:
+                self.misses += 1
+                return None
+            if stored[0] != version:
+                # The route has a newer observation; drop the old response.
+                self._remove(key)
+                self.invalidations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return stored[1]
+
+    def put(self, key, version, body):
+        """Encodes body, stores it for key at version and returns the CachedResponse."""
+        entry = encode(body)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (version, entry)
+            self._bytes += entry.size
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+        return entry
+
+    def record_not_modified(self):
+        with self._lock:
+            self.not_modified += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "invalidations": self.invalidations,
+                "not_modified": self.not_modified,
+                "evictions": self.evictions,
+                "brotli": _get_brotli() is not None,
+            }
+
+    def _remove(self, key):
+        _, entry = self._entries.pop(key)
+        self._bytes -= entry.size
+
+
+RESPONSE_CACHE = ResponseCache()
+
+
+def _response_metrics():
+    stats = RESPONSE_CACHE.stats()
+    lines = exposition('flightwx_response_cache_lookups_total', 'counter', "Response cache lookups per result.",
+                       [({"result": "hit"}, stats["hits"]), ({"result": "miss"}, stats["misses"]),
+                        ({"result": "invalidated"}, stats["invalidations"])])
+    lines += exposition('flightwx_response_not_modified_total', 'counter',
+                        "Requests answered 304 Not Modified from the response cache.", [({}, stats["not_modified"])])
+    lines += exposition('flightwx_response_cache_bytes', 'gauge', "Bytes held by the response cache.",
+                        [({}, stats["bytes"])])
+    return lines
+
+
+register_collector(_response_metrics)
@@ -0,0 +1,126 @@
+"""Weather risk scoring over decoded METAR/TAF records."""
+from flightwx.decoder import decode_metar, decode_taf, weather_codes
+
+STRONG_WIND_KT = 20
+STRONG_GUST_KT = 25
+
+# Hazard bits, in the order their details are reported.
+THUNDERSTORM = 1
+FOG = 2
+SEVERE_WEATHER = 4
+LIFR = 8
+IFR = 16
+STRONG_WIND = 32
+HAZARD_NAMES = (
+    (THUNDERSTORM, "Thunderstorm"),
+    (FOG, "Fog"),
+    (SEVERE_WEATHER, "Severe weather"),
+    (LIFR, "LIFR conditions"),
+    (IFR, "IFR conditions"),
+    (STRONG_WIND, "Strong wind"),
+)
+
+_SEVERE_PHENOMENA = frozenset(('GR', 'SQ', 'FC', 'VA', 'DS', 'SS'))
+# Shallow (MI), partial (PR) and patchy (BC) fog leave most of the
+# aerodrome clear, and VCFG is fog near it rather than on it; any
+# visibility they do cost still shows in the flight category.
+_MINOR_FOG_DESCRIPTORS = frozenset(('MI', 'PR', 'BC'))
+
+
+def weather_flags(conditions):
+    """
+    Returns the hazard bits carried by the weather groups and cloud types of
+    one Observation or TAF ChangeGroup.
+
+    Each group is compared code by code, so TSSN is a thunderstorm with snow
+    and not a sandstorm. Thunderstorms count whether reported as weather (TS,
+    VCTS, +TSRA) or as cumulonimbus cloud. Fog counts when it is at the
+    station (FG, FZFG); shallow, partial, patchy and vicinity fog (MIFG,
+    PRFG, BCFG, VCFG) do not.
+    """
+    flags = 0
+    for group in conditions.weather:
+        intensity, descriptor, phenomena = weather_codes(group)
+        if descriptor == 'TS':
+            flags |= THUNDERSTORM
+        if 'FG' in phenomena and intensity != 'VC' and descriptor not in _MINOR_FOG_DESCRIPTORS:
+            flags |= FOG
+        if _SEVERE_PHENOMENA.intersection(phenomena):
+            flags |= SEVERE_WEATHER
+    if any(layer[2] == 'CB' for layer in conditions.clouds):
+        flags |= THUNDERSTORM
+    return flags
+
+
+def hazard_flags(conditions):
+    """Returns the hazard bitmask for one Observation or TAF ChangeGroup."""
+    flags = weather_flags(conditions)
+    if conditions.flight_category == "LIFR":
+        flags |= LIFR
+    elif conditions.flight_category == "IFR":
+        flags |= IFR
+    if (conditions.wind_speed or 0) >= STRONG_WIND_KT or (conditions.wind_gust or 0) >= STRONG_GUST_KT:
+        flags |= STRONG_WIND
+    return flags
+
+
+def forecast_flags(forecast):
+    """Returns the union of hazard bits over every group of a decoded TAF."""
+    flags = 0
+    for group in forecast.groups:
+        flags |= hazard_flags(group)
+    return flags
+
+
+def hazard_details(flags, source):
+    """Turns a hazard bitmask into detail strings such as "Fog in METAR"."""
+    return [f"{name} in {source}" for bit, name in HAZARD_NAMES if flags & bit]
+
+
+def is_report(report, product):
+    """True when report holds real report text rather than a fetch status."""
+    return isinstance(report, str) and "failed" not in report and f"No {product}" not in report
+
+
+def assess_station(metar, taf):
+    """
+    Scores a station from its raw METAR and TAF.
+
+    Each product with at least one hazard adds 1 to the score. A product that
+    is not a string sets the score to -1.
+
+    Returns:
+        tuple: (risk_score, risk_details, flight_category), where
+        flight_category is the METAR's VFR/MVFR/IFR/LIFR or None.
+    """
+    risk_score = 0
+    risk_details = []
+    category = None
+
+    if is_report(metar, "METAR"):
+        observation = decode_metar(metar)
+        category = observation.flight_category
+        flags = hazard_flags(observation)
+        if flags:
+            risk_score += 1
+            risk_details.extend(hazard_details(flags, "METAR"))
+    elif not isinstance(metar, str):
+        risk_score = -1
+        risk_details.append("METAR is not a string")
+
+    if is_report(taf, "TAF"):
+        flags = forecast_flags(decode_taf(taf))
+        if flags:
+            risk_score += 1
+            risk_details.extend(hazard_details(flags, "TAF"))
+    elif not isinstance(taf, str):
+        risk_score = -1
+        risk_details.append("TAF is not a string")
+
+    return risk_score, risk_details, category
+
+
+def assess_risk(metar, taf):
+    """Assess weather risk based on METAR and TAF data."""
+    risk_score, risk_details, _ = assess_station(metar, taf)
+    return risk_score, risk_details
@@ -0,0 +1,178 @@
+"""
+Vectorized risk scoring across many stations at once.
+
+Reports are decoded per station into columnar NumPy arrays; scores, flight
+categories and hazard flags for every station are then computed in one
+array pass. Results match assess_station() station for station.
+
+NumPy is only imported when a board is built.
+"""
+import collections
+
+from flightwx.decoder import METRES_PER_SM, decode_metar, decode_taf
+from flightwx.risk import (IFR, LIFR, STRONG_GUST_KT, STRONG_WIND, STRONG_WIND_KT, hazard_details,
+                           is_report, weather_flags)
+
+# Report status codes used in the *_status columns.
+REPORT_OK = 0
+REPORT_MISSING = 1
+REPORT_INVALID = 2
+
+# Flight category codes; -1 means unknown.
+CATEGORY_NAMES = ("VFR", "MVFR", "IFR", "LIFR")
+
+StationColumns = collections.namedtuple(
+    'StationColumns',
+    'stations metar_status visibility_m ceiling_ft wind_speed wind_gust weather_flags '
+    'taf_status group_station group_visibility_m group_ceiling_ft group_wind_speed group_wind_gust '
+    'group_weather_flags')
+StationColumns.__doc__ = """Decoded observations as parallel arrays, one row per station for the
+METAR columns and one row per TAF change group (tagged with its station's row in
+group_station) for the group_* columns. Unknown numeric values are NaN."""
+
+RiskBoard = collections.namedtuple('RiskBoard', 'stations risk_score flight_category metar_flags taf_flags')
+RiskBoard.__doc__ = """Per-station results: risk_score and flight_category (index into
+CATEGORY_NAMES, -1 unknown) as int8 arrays, hazard bitmasks as uint8 arrays."""
+
+
+def build_columns(stations, metars, tafs):
+    """
+    Decodes reports into StationColumns.
+
+    Args:
+        stations (list): ICAO codes, one row each.
+        metars (dict): Raw METAR per station.
+        tafs (dict): Raw TAF per station.
+    """
+    import numpy as np
+
+    nan = float('nan')
+    metar_rows = []
+    taf_status = []
+    group_rows = []
+    for row, station in enumerate(stations):
+        metar = metars.get(station)
+        if is_report(metar, "METAR"):
+            observation = decode_metar(metar)
+            metar_rows.append((REPORT_OK, _number(observation.visibility_m), _number(observation.ceiling_ft),
+                               _number(observation.wind_speed), _number(observation.wind_gust),
+                               weather_flags(observation)))
+        else:
+            status = REPORT_MISSING if isinstance(metar, str) else REPORT_INVALID
+            metar_rows.append((status, nan, nan, nan, nan, 0))
+
+        taf = tafs.get(station)
+        if is_report(taf, "TAF"):
+            taf_status.append(REPORT_OK)
+            for group in decode_taf(taf).groups:
+                group_rows.append((row, _number(group.visibility_m), _number(group.ceiling_ft),
+                                   _number(group.wind_speed), _number(group.wind_gust), weather_flags(group)))
+        else:
+            taf_status.append(REPORT_MISSING if isinstance(taf, str) else REPORT_INVALID)
+
+    metar_cols = list(zip(*metar_rows)) or [()] * 6
+    group_cols = list(zip(*group_rows)) or [()] * 6
+    return StationColumns(
+        stations=list(stations),
+        metar_status=np.array(metar_cols[0], dtype=np.int8),
+        visibility_m=np.array(metar_cols[1], dtype=np.float64),
+        ceiling_ft=np.array(metar_cols[2], dtype=np.float64),
+        wind_speed=np.array(metar_cols[3], dtype=np.float64),
+        wind_gust=np.array(metar_cols[4], dtype=np.float64),
+        weather_flags=np.array(metar_cols[5], dtype=np.uint8),
+        taf_status=np.array(taf_status, dtype=np.int8),
+        group_station=np.array(group_cols[0], dtype=np.intp),
+        group_visibility_m=np.array(group_cols[1], dtype=np.float64),
+        group_ceiling_ft=np.array(group_cols[2], dtype=np.float64),
+        group_wind_speed=np.array(group_cols[3], dtype=np.float64),
+        group_wind_gust=np.array(group_cols[4], dtype=np.float64),
+        group_weather_flags=np.array(group_cols[5], dtype=np.uint8),
+    )
+
+
+def flight_categories(visibility_m, ceiling_ft):
+    """Vectorized decoder.flight_category: returns int8 codes into CATEGORY_NAMES, -1 if unknown."""
+    import numpy as np
+
+    visibility = np.where(np.isnan(visibility_m), np.inf, visibility_m)
+    ceiling = np.where(np.isnan(ceiling_ft), np.inf, ceiling_ft)
+    category = np.select(
+        [(ceiling < 500) | (visibility < 1 * METRES_PER_SM),
+         (ceiling < 1000) | (visibility < 3 * METRES_PER_SM),
+         (ceiling <= 3000) | (visibility <= 5 * METRES_PER_SM)],
+        [3, 2, 1], default=0).astype(np.int8)
+    category[np.isnan(visibility_m) & np.isnan(ceiling_ft)] = -1
+    return category
+
+
+def score_columns(columns):
+    """
+    Scores every station in one vectorized pass.
+
+    Returns:
+        RiskBoard: Per-station scores, categories and hazard bitmasks.
+    """
+    import numpy as np
+
+    metar_category = flight_categories(columns.visibility_m, columns.ceiling_ft)
+    metar_flags = _hazard_flags(np, columns.weather_flags, metar_category,
+                                columns.wind_speed, columns.wind_gust)
+    metar_flags[columns.metar_status != REPORT_OK] = 0
+
+    group_category = flight_categories(columns.group_visibility_m, columns.group_ceiling_ft)
+    group_flags = _hazard_flags(np, columns.group_weather_flags, group_category,
+                                columns.group_wind_speed, columns.group_wind_gust)
+    taf_flags = np.zeros(len(columns.stations), dtype=np.uint8)
+    np.bitwise_or.at(taf_flags, columns.group_station, group_flags)
+
+    # Same order of operations as assess_station: an invalid METAR resets the
+    # score to -1 before the TAF is added, an invalid TAF resets it at the end.
+    score = np.where(columns.metar_status == REPORT_INVALID, -1, (metar_flags != 0).astype(np.int8))
+    score = score + ((columns.taf_status == REPORT_OK) & (taf_flags != 0))
+    score = np.where(columns.taf_status == REPORT_INVALID, -1, score).astype(np.int8)
+
+    metar_category[columns.metar_status != REPORT_OK] = -1
+    return RiskBoard(columns.stations, score, metar_category, metar_flags, taf_flags)
+
+
+def build_board(stations, metars, tafs):
+    """Decodes and scores a set of stations; see build_columns and score_columns."""
+    return score_columns(build_columns(stations, metars, tafs))
+
+
+def board_rows(board, columns):
+    """
+    Expands a RiskBoard into per-station dicts shaped like generate_weather_report
+    entries: risk_score, risk_details and flight_category.
+    """
+    rows = {}
+    for row, station in enumerate(board.stations):
+        details = []
+        if columns.metar_status[row] == REPORT_OK:
+            details.extend(hazard_details(int(board.metar_flags[row]), "METAR"))
+        elif columns.metar_status[row] == REPORT_INVALID:
+            details.append("METAR is not a string")
+        if columns.taf_status[row] == REPORT_OK:
+            details.extend(hazard_details(int(board.taf_flags[row]), "TAF"))
+        elif columns.taf_status[row] == REPORT_INVALID:
+            details.append("TAF is not a string")
+        category = int(board.flight_category[row])
+        rows[station] = {
+            "flight_category": CATEGORY_NAMES[category] if category >= 0 else None,
+            "risk_score": int(board.risk_score[row]),
+            "risk_details": details,
+        }
+    return rows
+
+
+def _hazard_flags(np, weather, category, wind_speed, wind_gust):
+    flags = weather.copy()
+    flags |= np.where(category == 3, LIFR, 0).astype(np.uint8)
+    flags |= np.where(category == 2, IFR, 0).astype(np.uint8)
+    strong = (np.nan_to_num(wind_speed) >= STRONG_WIND_KT) | (np.nan_to_num(wind_gust) >= STRONG_GUST_KT)
+    flags |= np.where(strong, STRONG_WIND, 0).astype(np.uint8)
+    return flags
+
+
+def _number(value):
+    return float('nan') if value is None else float(value)
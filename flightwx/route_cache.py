@@ -0,0 +1,174 @@
+"""Persistent, single-flight cache for en-route city lookups."""
+import concurrent.futures
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from flightwx.metrics import exposition, register_collector
+
+ROUTE_CACHE_PATH = os.environ.get(
+    'ROUTE_CACHE_PATH',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'route_cache.sqlite3'))
+# Seconds a cached route stays valid; routes change rarely.
+ROUTE_CACHE_TTL = int(os.environ.get('ROUTE_CACHE_TTL', 30 * 24 * 60 * 60))
+
+
+def normalize_route(start_airport_code, destination_airport_code):
+    """Returns the cache key for a route: both codes stripped and upper-cased."""
+    return (start_airport_code.strip().upper(), destination_airport_code.strip().upper())
+
+
+class SingleFlight:
+    """Collapses concurrent calls for the same key into one execution."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.shared = 0
+
+    def do(self, key, fn, *args):
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = concurrent.futures.Future()
+                self._calls[key] = future
+            else:
+                self.shared += 1
+        if not leader:
+            return future.result()
+        try:
+            result = fn(*args)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+
+class RouteCache:
+    """
+    Route -> city list store backed by SQLite, with an in-process copy of
+    every row read or written so repeat lookups skip the database.
+    """
+
+    def __init__(self, path=ROUTE_CACHE_PATH, ttl=ROUTE_CACHE_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._memory = {}
+        self._conn = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, record=True):
+        """Returns the cached city list for a normalized route, or None."""
+        now = time.time()
+        with self._lock:
+            row = self._memory.get(key)
+            if row is None:
+                row = self._select(key)
+                if row is not None:
+                    self._memory[key] = row
+            fresh = row is not None and now - row[1] <= self.ttl
+            if record:
+                if fresh:
+                    self.hits += 1
+                else:
+                    self.misses += 1
+            return row[0] if fresh else None
+
+    def put(self, key, cities):
+        row = (list(cities), time.time())
+        with self._lock:
+            self._memory[key] = row
+            try:
+                self._connect().execute(
+                    "INSERT OR REPLACE INTO routes (start, destination, cities, created) VALUES (?, ?, ?, ?)",
+                    (key[0], key[1], json.dumps(row[0]), row[1]))
+                self._conn.commit()
+            except sqlite3.Error as e:
+                logging.error(f"Error writing route cache {self.path}: {e}")
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._memory), "hits": self.hits, "misses": self.misses}
+
+    def _select(self, key):
+        try:
+            row = self._connect().execute(
+                "SELECT cities, created FROM routes WHERE start = ? AND destination = ?", key).fetchone()
+        except sqlite3.Error as e:
+            logging.error(f"Error reading route cache {self.path}: {e}")
+            return None
+        return (json.loads(row[0]), row[1]) if row else None
+
+    def _connect(self):
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS routes ("
+                "start TEXT NOT NULL, destination TEXT NOT NULL, cities TEXT NOT NULL, "
+                "created REAL NOT NULL, PRIMARY KEY (start, destination))")
+        return self._conn
+
+
+ROUTE_CACHE = RouteCache()
+_flights = SingleFlight()
+
+
+def cached_flight_path(start_airport_code, destination_airport_code, loader):
+    """
+    Looks a route up in the cache, calling loader on a miss.
+
+    Concurrent misses for the same route wait on a single loader call.
+    Failed lookups (loader returns None) are not cached.
+
+    Args:
+        start_airport_code (str): The IATA code of the starting airport.
+        destination_airport_code (str): The IATA code of the destination airport.
+        loader (callable): Called as loader(start, destination) with the
+            normalized codes; returns a city list or None on error.
+
+    Returns:
+        list: The en-route cities, or None on error.
+    """
+    key = normalize_route(start_airport_code, destination_airport_code)
+    cities = ROUTE_CACHE.get(key)
+    if cities is None:
+        cities = _flights.do(key, _load_route, key, loader)
+    return list(cities) if cities is not None else None
+
+
+def route_cache_stats():
+    stats = ROUTE_CACHE.stats()
+    stats["shared_lookups"] = _flights.shared
+    return stats
+
+
+def _load_route(key, loader):
+    # Another leader may have stored the route while this call queued.
+    cities = ROUTE_CACHE.get(key, record=False)
+    if cities is not None:
+        return cities
+    cities = loader(*key)
+    if cities is not None:
+        ROUTE_CACHE.put(key, cities)
+    return cities
+
+
+def _route_metrics():
+    stats = route_cache_stats()
+    return exposition('flightwx_route_cache_lookups_total', 'counter', "Flight path cache lookups per result.",
+                      [({"result": "hit"}, stats["hits"]), ({"result": "miss"}, stats["misses"]),
+                       ({"result": "shared"}, stats["shared_lookups"])])
+
+
+register_collector(_route_metrics)
@@ -0,0 +1,254 @@
+"""
+Precomputed table of Gemini flight paths between the bundled airports.
+
+`python -m flightwx.route_table build` asks Gemini for the en-route cities
+of every pair of bundled airports, many pairs per call, with the answer
+given as JSON (flightwx.flightpath.ROUTES_SCHEMA). Every city in an answer
+is checked against the airport index and cities it cannot resolve are
+dropped, so the table holds known stations only. The table is written as
+one small versioned JSON file of ICAO codes keyed by airport pair; each
+pair is stored once and reversed for the opposite direction.
+
+The server loads the table at startup. A route in the table is answered
+with two resolver lookups and a dict lookup; Gemini is only asked for the
+pairs the table lacks.
+"""
+import json
+import logging
+import os
+import threading
+import time
+
+from flightwx.metrics import exposition, register_collector
+from flightwx.resolver import get_resolver
+
+ROUTE_TABLE_PATH = os.environ.get(
+    'ROUTE_TABLE_PATH',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'route_table.json'))
+# Airport pairs asked for per Gemini call by the build job.
+ROUTE_TABLE_BATCH = int(os.environ.get('ROUTE_TABLE_BATCH', 40))
+# Format of the table file; files of another version are not loaded.
+ROUTE_TABLE_VERSION = 1
+
+
+class RouteTable:
+    """
+    Airport pair -> {city: icao_code} of the en-route stations, both
+    directions built once when the table is loaded.
+
+    Args:
+        routes (dict): {"ORIG-DEST": [icao, ...]} keyed by ICAO codes, as
+            stored in the table file.
+        meta (dict): The file's other fields (version, model, created...).
+    """
+
+    def __init__(self, routes=None, meta=None):
+        self.meta = meta or {}
+        self._routes = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        by_icao = get_resolver().by_icao
+        for key, stations in (routes or {}).items():
+            origin, _, destination = key.partition('-')
+            airports = [by_icao[icao] for icao in stations if icao in by_icao]
+            self._routes[(origin, destination)] = {airport.city: airport.icao for airport in airports}
+            self._routes.setdefault((destination, origin),
+                                    {airport.city: airport.icao for airport in reversed(airports)})
+
+    def __len__(self):
+        return len(self._routes)
+
+    def lookup(self, start_airport_code, destination_airport_code):
+        """
+        Returns the table's {city: icao_code} for a route in route order, an
+        empty dict when the model knew no path, or None when the pair is not
+        in the table.
+        """
+        if not self._routes:
+            return None
+        resolver = get_resolver()
+        start = resolver.resolve(start_airport_code)
+        destination = resolver.resolve(destination_airport_code)
+        route = self._routes.get((start.icao, destination.icao)) if start and destination else None
+        with self._lock:
+            if route is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return dict(route) if route is not None else None
+
+    def stats(self):
+        with self._lock:
+            return {"routes": len(self._routes), "version": self.meta.get("version"),
+                    "model": self.meta.get("model"), "created": self.meta.get("created"),
+                    "hits": self.hits, "misses": self.misses}
+
+
+def read_route_table(path=ROUTE_TABLE_PATH):
+    """
+    Reads a table file.
+
+    Returns:
+        dict: The file's contents, or None when it is missing, unreadable
+        or of another version.
+    """
+    try:
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logging.error(f"Error reading route table {path}: {e}")
+        return None
+    if not isinstance(data, dict) or data.get("version") != ROUTE_TABLE_VERSION \
+            or not isinstance(data.get("routes"), dict):
+        logging.error(f"Ignoring route table {path}: not a version {ROUTE_TABLE_VERSION} table")
+        return None
+    return data
+
+
+def write_route_table(routes, path=ROUTE_TABLE_PATH, model=None):
+    """Writes {"ORIG-DEST": [icao, ...]} as a table file, replacing any previous one atomically."""
+    data = {"version": ROUTE_TABLE_VERSION, "model": model, "created": int(time.time()),
+            "routes": dict(sorted(routes.items()))}
+    partial = f"{path}.tmp"
+    with open(partial, 'w', encoding='utf-8') as f:
+        json.dump(data, f, separators=(',', ':'))
+    os.replace(partial, path)
+    return data
+
+
+_lock = threading.Lock()
+_table = None
+
+
+def get_route_table():
+    """Returns the table loaded from ROUTE_TABLE_PATH, reading the file once; empty when there is none."""
+    global _table
+    if _table is None:
+        with _lock:
+            if _table is None:
+                data = read_route_table() or {}
+                routes = data.pop("routes", {})
+                _table = RouteTable(routes, data)
+                if routes:
+                    logging.info(f"Loaded {len(routes)} precomputed routes from {ROUTE_TABLE_PATH}")
+    return _table
+
+
+def airport_pairs(airports):
+    """Returns every unordered pair of airports, each once."""
+    return [(a, b) for i, a in enumerate(airports) for b in airports[i + 1:]]
+
+
+def precompute(pairs, generate, batch_size=ROUTE_TABLE_BATCH, routes=None, retries=1):
+    """
+    Asks the model for the en-route stations of many airport pairs.
+
+    Args:
+        pairs (list): (origin, destination) Airport record pairs.
+        generate (callable): Called as generate(prompt) with a prompt
+            covering up to batch_size pairs; returns the model's answer text.
+            A stub model is any callable answering per ROUTES_SCHEMA.
+        batch_size (int): Pairs per call.
+        routes (dict): Routes already known, {"ORIG-DEST": [icao, ...]};
+            their pairs are skipped and the new ones are added to it.
+        retries (int): Further rounds for pairs an answer left out or a
+            call failed on.
+
+    Returns:
+        tuple: (routes, stats) with routes as written by write_route_table()
+        and counts of the calls made, pairs answered and missing, and cities
+        kept and dropped.
+    """
+    from flightwx.flightpath import flight_path_prompt, parse_routes
+
+    resolver = get_resolver()
+    routes = {} if routes is None else routes
+    stats = {"calls": 0, "failed_calls": 0, "pairs": len(pairs), "answered": 0, "missing": 0,
+             "cities": 0, "dropped_cities": 0}
+    todo = [(a, b) for a, b in pairs if f"{a.icao}-{b.icao}" not in routes]
+    for _ in range(retries + 1):
+        missed = []
+        for i in range(0, len(todo), batch_size):
+            batch = todo[i:i + batch_size]
+            codes = {(a.iata or a.icao, b.iata or b.icao): (a, b) for a, b in batch}
+            stats["calls"] += 1
+            try:
+                answer = parse_routes(generate(flight_path_prompt(list(codes))))
+            except Exception as e:
+                logging.error(f"Error asking for {len(batch)} routes: {e}")
+                stats["failed_calls"] += 1
+                missed.extend(batch)
+                continue
+            for key, (a, b) in codes.items():
+                cities = answer.get(key)
+                if cities is None:
+                    missed.append((a, b))
+                    continue
+                stations = []
+                for city in cities:
+                    airport = resolver.resolve(city)
+                    if airport is None or airport.icao in (a.icao, b.icao) or airport.icao in stations:
+                        stats["dropped_cities"] += 1
+                        continue
+                    stations.append(airport.icao)
+                routes[f"{a.icao}-{b.icao}"] = stations
+                stats["answered"] += 1
+                stats["cities"] += len(stations)
+            logging.info(f"Route table: {stats['answered']} of {len(pairs)} pairs answered")
+        todo = missed
+        if not todo:
+            break
+    stats["missing"] = len(todo)
+    return routes, stats
+
+
+def gemini_generate(api_key, timeout):
+    """Returns a generate(prompt) callable asking Gemini, with timeout seconds per call."""
+    from flightwx.gemini import generate_content, get_model
+
+    model = get_model(api_key)
+    return lambda prompt: generate_content(model, prompt, timeout).text
+
+
+def _route_table_metrics():
+    stats = get_route_table().stats()
+    lines = exposition('flightwx_route_table_routes', 'gauge', "Directed routes in the precomputed route table.",
+                       [({}, stats["routes"])])
+    lines += exposition('flightwx_route_table_lookups_total', 'counter', "Route table lookups per result.",
+                        [({"result": "hit"}, stats["hits"]), ({"result": "miss"}, stats["misses"])])
+    return lines
+
+
+register_collector(_route_table_metrics)
+
+
+if __name__ == '__main__':
+    import argparse
+
+    from flightwx.airports import load_airports
+    from flightwx.gemini import MODEL_NAME
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Precomputed route table maintenance")
+    parser.add_argument('command', choices=('build', 'stats'))
+    parser.add_argument('--output', default=ROUTE_TABLE_PATH, help="table file (default: %(default)s)")
+    parser.add_argument('--api-key', default=os.environ.get('GEMINI_API_KEY'),
+                        help="Gemini API key (default: $GEMINI_API_KEY)")
+    parser.add_argument('--batch-size', type=int, default=ROUTE_TABLE_BATCH, help="airport pairs per Gemini call")
+    parser.add_argument('--timeout', type=float, default=120, help="seconds allowed per Gemini call")
+    parser.add_argument('--update', action='store_true', help="keep the routes already in --output, ask for the rest")
+    args = parser.parse_args()
+    if args.command == 'build':
+        if not args.api_key:
+            parser.error("a Gemini API key is needed: pass --api-key or set GEMINI_API_KEY")
+        existing = read_route_table(args.output) if args.update else None
+        routes, stats = precompute(airport_pairs(load_airports()), gemini_generate(args.api_key, args.timeout),
+                                   args.batch_size, dict(existing["routes"]) if existing else None)
+        write_route_table(routes, args.output, MODEL_NAME)
+        print(json.dumps(stats))
+    data = read_route_table(args.output) or {}
+    data["pairs"] = len(data.pop("routes", {}))
+    print(json.dumps(data))
@@ -0,0 +1,184 @@
+"""Deterministic offline route engine over the bundled airport table."""
+import collections
+import heapq
+import math
+import os
+import threading
+
+from flightwx.airports import EARTH_RADIUS_NM, cross, dot, great_circle_nm, load_airports, normalize, unit_vector
+from flightwx.resolver import resolve
+from flightwx.spatial import corridor_stations
+
+# "offline" uses this engine, "llm" asks Gemini, "auto" tries the engine first
+# and falls back to Gemini for airports it does not know, and "corridor" takes
+# every station within the corridor around the great-circle track.
+ROUTE_MODES = ("auto", "offline", "llm", "corridor")
+ROUTE_MODE = os.environ.get('ROUTE_MODE', 'auto')
+# Longest hop between consecutive waypoints, in nautical miles.
+MAX_LEG_NM = float(os.environ.get('ROUTE_MAX_LEG_NM', 250))
+# Half-width of the band around the great-circle track that waypoints may
+# be picked from, in nautical miles.
+CORRIDOR_NM = float(os.environ.get('ROUTE_CORRIDOR_NM', 100))
+# Widest corridor a request may ask for; query cost grows with the width.
+MAX_CORRIDOR_NM = float(os.environ.get('MAX_CORRIDOR_NM', 1000))
+# Routes kept in the memo, least recently used dropped first.
+ROUTE_MEMO_SIZE = 4096
+# How many times the corridor is doubled before settling for a direct route.
+CORRIDOR_WIDENINGS = 3
+
+
+class RouteGraph:
+    """
+    Airports joined by every leg no longer than max_leg_nm, weighted by
+    great-circle distance. The latest ROUTE_MEMO_SIZE routes are memoized
+    per (origin, destination, corridor) so repeat lookups are a dict hit.
+    """
+
+    def __init__(self, airports, max_leg_nm=MAX_LEG_NM):
+        self.airports = airports
+        self.max_leg_nm = max_leg_nm
+        self.index = {airport.icao: i for i, airport in enumerate(airports)}
+        # Unit vectors and the full distance matrix make corridor tests and
+        # the A* heuristic plain arithmetic at query time.
+        self.vectors = [unit_vector(airport.lat, airport.lon) for airport in airports]
+        self.distances = [[0.0] * len(airports) for _ in airports]
+        self.edges = [[] for _ in airports]
+        for i, a in enumerate(airports):
+            for j in range(i + 1, len(airports)):
+                b = airports[j]
+                distance = great_circle_nm(a.lat, a.lon, b.lat, b.lon)
+                self.distances[i][j] = self.distances[j][i] = distance
+                if distance <= max_leg_nm:
+                    self.edges[i].append((j, distance))
+                    self.edges[j].append((i, distance))
+        self._routes = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def find_route(self, start, destination, corridor_nm=CORRIDOR_NM):
+        """
+        Computes the waypoint sequence between two airports.
+
+        Args:
+            start (str): IATA/ICAO code or city of the origin.
+            destination (str): IATA/ICAO code or city of the destination.
+            corridor_nm (float): Half-width of the corridor around the
+                great-circle track.
+
+        Returns:
+            list: Airport records from origin to destination inclusive, or
+            None when either airport is not in the table.
+        """
+        origin = self._locate(start)
+        target = self._locate(destination)
+        if origin is None or target is None:
+            return None
+        key = (origin, target, corridor_nm)
+        with self._lock:
+            route = self._routes.get(key)
+            if route is not None:
+                self._routes.move_to_end(key)
+        if route is None:
+            route = self._plan(origin, target, corridor_nm)
+            with self._lock:
+                self._routes[key] = route
+                if len(self._routes) > ROUTE_MEMO_SIZE:
+                    self._routes.popitem(last=False)
+        return [self.airports[i] for i in route]
+
+    def _locate(self, query):
+        airport = resolve(query)
+        return self.index.get(airport.icao) if airport else None
+
+    def _plan(self, origin, target, corridor_nm):
+        if origin == target:
+            return (origin,)
+        width = corridor_nm
+        for _ in range(CORRIDOR_WIDENINGS + 1):
+            path = self._a_star(origin, target, self._corridor(origin, target, width))
+            if path:
+                return path
+            width *= 2
+        return (origin, target)
+
+    def _corridor(self, origin, target, width):
+        a, b = self.vectors[origin], self.vectors[target]
+        normal = normalize(cross(a, b))
+        toward = cross(normal, a)
+        length = self.distances[origin][target]
+        max_cross = math.sin(min(width / EARTH_RADIUS_NM, math.pi / 2))
+        allowed = {origin, target}
+        for i, p in enumerate(self.vectors):
+            if abs(dot(p, normal)) > max_cross:
+                continue
+            along = math.atan2(dot(p, toward), dot(p, a)) * EARTH_RADIUS_NM
+            if -width <= along <= length + width:
+                allowed.add(i)
+        return allowed
+
+    def _a_star(self, origin, target, allowed):
+        remaining = self.distances[target]
+        best = {origin: 0.0}
+        came_from = {}
+        frontier = [(0.0, origin)]
+        while frontier:
+            _, node = heapq.heappop(frontier)
+            if node == target:
+                path = [node]
+                while node in came_from:
+                    node = came_from[node]
+                    path.append(node)
+                return tuple(reversed(path))
+            for neighbour, distance in self.edges[node]:
+                if neighbour not in allowed:
+                    continue
+                cost = best[node] + distance
+                if cost < best.get(neighbour, float('inf')):
+                    best[neighbour] = cost
+                    came_from[neighbour] = node
+                    heapq.heappush(frontier, (cost + remaining[neighbour], neighbour))
+        return None
+
+
+_lock = threading.Lock()
+_graph = None
+
+
+def get_graph():
+    """Returns the route graph over the bundled airports, building it once."""
+    global _graph
+    if _graph is None:
+        with _lock:
+            if _graph is None:
+                _graph = RouteGraph(load_airports())
+    return _graph
+
+
+def find_route(start, destination, corridor_nm=None):
+    """Module-level shortcut for RouteGraph.find_route on the bundled graph."""
+    return get_graph().find_route(start, destination, corridor_nm or CORRIDOR_NM)
+
+
+def offline_flight_path_icao_codes(start_airport_code, destination_airport_code, corridor_nm=None):
+    """
+    Returns {city: icao_code} along the offline route, origin and destination
+    included, or None when either airport is unknown to the engine.
+    """
+    waypoints = find_route(start_airport_code, destination_airport_code, corridor_nm)
+    if waypoints is None:
+        return None
+    return {airport.city: airport.icao for airport in waypoints}
+
+
+def corridor_icao_codes(start_airport_code, destination_airport_code, corridor_nm=None):
+    """
+    Returns {name: icao_code} for every station within corridor_nm of the
+    great-circle track, ordered by along-track distance, or None when either
+    airport is unknown. Names shared by several stations get the ICAO code
+    appended.
+    """
+    stations = corridor_stations(start_airport_code, destination_airport_code, corridor_nm or CORRIDOR_NM)
+    if stations is None:
+        return None
+    names = collections.Counter(item.station.name for item in stations)
+    return {(item.station.name if names[item.station.name] == 1 else f"{item.station.name} ({item.station.icao})"):
+            item.station.icao for item in stations}
@@ -0,0 +1,279 @@
+"""
+Cross-request micro-batching and rate limiting of data API calls.
+
+Station lookups from every request in the process go through one
+BatchScheduler per product. A lookup joins the pending batch and waits;
+BATCH_WINDOW_MS after the first station of a batch arrives (or as soon as
+it is full), a dispatcher thread sends the whole batch as one
+multi-station call and hands each caller its stations' reports. The call
+runs under the latest deadline among the lookups waiting on it. Stations
+already pending or in flight are not requested twice, so concurrent
+requests with overlapping routes share both the call and its result.
+
+Every data API call, batched or not, first takes a token from a
+process-wide TokenBucket, which keeps the process under the upstream's
+rate limit however many requests are being served.
+"""
+import collections
+import concurrent.futures
+import os
+import threading
+import time
+
+from flightwx.metrics import exposition, register_collector
+from flightwx.resilience import Deadline, DeadlineExceeded, current_deadline, remaining, within
+
+# Milliseconds a batch collects stations before it is sent; 0 sends every
+# lookup on its own, as before.
+BATCH_WINDOW_MS = float(os.environ.get('BATCH_WINDOW_MS', 5))
+# Most stations per batched call; a full batch is sent without waiting out
+# the window.
+BATCH_MAX_STATIONS = int(os.environ.get('BATCH_MAX_STATIONS', 100))
+# Data API calls per second allowed on average, and how many may be made in
+# a burst; 0 disables the limit.
+UPSTREAM_RATE = float(os.environ.get('UPSTREAM_RATE', 5))
+UPSTREAM_BURST = int(os.environ.get('UPSTREAM_BURST', 10))
+# Seconds a caller without a request deadline waits for its batch.
+BATCH_WAIT = 30
+
+
+class RateLimited(Exception):
+    """No rate limit token came free before the request's deadline; the call was not made."""
+
+
+class TokenBucket:
+    """Allows rate calls per second on average and up to burst at once."""
+
+    def __init__(self, rate=UPSTREAM_RATE, burst=UPSTREAM_BURST):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.granted = 0
+        self.delayed = 0
+        self.refused = 0
+        self.waited = 0.0
+
+    def acquire(self, timeout):
+        """
+        Takes a token, waiting for one for at most timeout seconds.
+
+        Returns:
+            bool: False when no token came free in time; nothing was taken.
+        """
+        if self.rate <= 0:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # Tokens are handed out in order: a waiter reserves its token
+            # now, driving the balance negative, and sleeps until it is due.
+            wait = max(-(self._tokens - 1) / self.rate, 0.0)
+            if wait > timeout:
+                self.refused += 1
+                return False
+            self._tokens -= 1
+            self.granted += 1
+            if wait:
+                self.delayed += 1
+                self.waited += wait
+        if wait:
+            time.sleep(wait)
+        return True
+
+    def check(self, timeout):
+        """Takes a token like acquire(), raising RateLimited instead of returning False."""
+        if not self.acquire(timeout):
+            raise RateLimited(f"no upstream rate limit token within {timeout:.2f}s")
+
+    def stats(self):
+        with self._lock:
+            return {"rate": self.rate, "burst": self.burst, "granted": self.granted, "delayed": self.delayed,
+                    "refused": self.refused, "wait_seconds": round(self.waited, 3)}
+
+
+class BatchScheduler:
+    """
+    Merges concurrent station lookups for one product into batched calls.
+
+    Args:
+        product (str): Label in stats and metrics, e.g. "metar".
+        fetch_batch (callable): Called as fetch_batch(stations) on a
+            scheduler thread, under the latest deadline of the lookups
+            waiting on the batch; returns {station: report}.
+        window (float): Seconds a batch collects stations.
+        max_batch (int): Most stations per call; a full batch is sent at once.
+    """
+
+    def __init__(self, product, fetch_batch, window=BATCH_WINDOW_MS / 1000, max_batch=BATCH_MAX_STATIONS, workers=8):
+        self.product = product
+        self.fetch_batch = fetch_batch
+        self.window = window
+        self.max_batch = max_batch
+        self.workers = workers
+        self._pending = collections.OrderedDict()
+        # pending station -> latest expiry (monotonic) among its waiters
+        self._expires = {}
+        self._in_flight = {}
+        self._opened = None
+        self._ready = threading.Condition()
+        self._dispatcher = None
+        self._executor = None
+        self.lookups = 0
+        self.stations = 0
+        self.shared = 0
+        self.batches = 0
+        self.batched_stations = 0
+
+    def fetch(self, stations, missing):
+        """
+        Looks stations up through the next batches.
+
+        Args:
+            stations (list): Normalized ICAO codes.
+            missing (callable): Called as missing(station, reason) for a
+                station whose batch did not answer before the current
+                deadline; returns the text reported for it.
+
+        Returns:
+            dict: {station: report} for every station given.
+        """
+        futures = {}
+        deadline = current_deadline()
+        expires = deadline.expires if deadline is not None else time.monotonic() + BATCH_WAIT
+        with self._ready:
+            if stations:
+                self.lookups += 1
+            for station in stations:
+                future = self._pending.get(station) or self._in_flight.get(station)
+                if future is not None:
+                    self.shared += 1
+                else:
+                    future = concurrent.futures.Future()
+                    self._pending[station] = future
+                    if self._opened is None:
+                        self._opened = time.monotonic()
+                if station in self._pending:
+                    self._expires[station] = max(self._expires.get(station, expires), expires)
+                futures[station] = future
+                self.stations += 1
+            self._ready.notify()
+        self._start()
+
+        try:
+            timeout = remaining(BATCH_WAIT)
+        except DeadlineExceeded:
+            timeout = 0
+        concurrent.futures.wait(futures.values(), timeout=timeout)
+        result = {}
+        for station, future in futures.items():
+            if not future.done():
+                result[station] = missing(station, "deadline")
+            elif future.exception() is not None:
+                result[station] = missing(station, "error")
+            else:
+                result[station] = future.result()
+        return result
+
+    def stats(self):
+        with self._ready:
+            return {
+                "window_ms": self.window * 1000,
+                "max_batch": self.max_batch,
+                "lookups": self.lookups,
+                "stations": self.stations,
+                "shared_stations": self.shared,
+                "batches": self.batches,
+                "batched_stations": self.batched_stations,
+                "calls_saved": max(self.lookups - self.batches, 0),
+                "pending": len(self._pending),
+                "in_flight": len(self._in_flight),
+            }
+
+    def _start(self):
+        if self._dispatcher is not None:
+            return
+        with self._ready:
+            if self._dispatcher is None:
+                self._executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix=f'flightwx-batch-{self.product}')
+                self._dispatcher = threading.Thread(target=self._dispatch, name=f'flightwx-batcher-{self.product}',
+                                                    daemon=True)
+                self._dispatcher.start()
+
+    def _dispatch(self):
+        while True:
+            with self._ready:
+                while not self._pending:
+                    self._ready.wait()
+                due = self._opened + self.window - time.monotonic()
+                if due > 0 and len(self._pending) < self.max_batch:
+                    self._ready.wait(due)
+                    continue
+                batch = {}
+                expires = 0.0
+                while self._pending and len(batch) < self.max_batch:
+                    station, future = self._pending.popitem(last=False)
+                    batch[station] = future
+                    expires = max(expires, self._expires.pop(station))
+                self._in_flight.update(batch)
+                # Stations left over have waited a window already.
+                self._opened = time.monotonic() - self.window if self._pending else None
+                self.batches += 1
+                self.batched_stations += len(batch)
+            self._executor.submit(self._send, batch, expires)
+
+    def _send(self, batch, expires):
+        try:
+            # The waiter that can wait longest bounds the call; the others
+            # stop waiting at their own deadlines.
+            with within(Deadline(expires - time.monotonic())):
+                reports = self.fetch_batch(list(batch))
+            for station, future in batch.items():
+                future.set_result(reports.get(station))
+        except Exception as e:
+            for future in batch.values():
+                future.set_exception(e)
+        finally:
+            with self._ready:
+                for station in batch:
+                    self._in_flight.pop(station, None)
+
+
+RATE_LIMITER = TokenBucket()
+_schedulers = {}
+
+
+def register_scheduler(scheduler):
+    """Makes a scheduler's counters part of batching_stats() and /metrics."""
+    _schedulers[scheduler.product] = scheduler
+    return scheduler
+
+
+def batching_stats():
+    stats = {product: scheduler.stats() for product, scheduler in sorted(_schedulers.items())}
+    stats["rate_limit"] = RATE_LIMITER.stats()
+    return stats
+
+
+def _batching_metrics():
+    schedulers = sorted(_schedulers.items())
+    stats = [(product, scheduler.stats()) for product, scheduler in schedulers]
+    lines = exposition('flightwx_upstream_batches_total', 'counter', "Batched data API calls sent per product.",
+                       [({"product": product}, values["batches"]) for product, values in stats])
+    lines += exposition('flightwx_upstream_batch_lookups_total', 'counter',
+                        "Station lookups merged into batches per product.",
+                        [({"product": product}, values["lookups"]) for product, values in stats])
+    lines += exposition('flightwx_upstream_batch_shared_stations_total', 'counter',
+                        "Stations answered by a batch another lookup had already queued.",
+                        [({"product": product}, values["shared_stations"]) for product, values in stats])
+    limiter = RATE_LIMITER.stats()
+    lines += exposition('flightwx_upstream_rate_limited_total', 'counter',
+                        "Data API calls delayed or refused by the rate limit.",
+                        [({"result": "delayed"}, limiter["delayed"]), ({"result": "refused"}, limiter["refused"])])
+    return lines
+
+
+register_collector(_batching_metrics)
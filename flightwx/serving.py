@@ -0,0 +1,86 @@
+"""Production serving of the Flask app on gunicorn."""
+import logging
+import os
+import time
+
+from flightwx.airports import load_airports
+from flightwx.fetcher import REQUEST_DEADLINE, shutdown
+from flightwx.resolver import get_resolver
+from flightwx.route_table import get_route_table
+from flightwx.routing import get_graph
+from flightwx.spatial import get_station_index
+
+# Worker processes, and request threads in each. Upstream calls are I/O
+# bound, so threads carry most of the concurrency.
+SERVER_WORKERS = int(os.environ.get('SERVER_WORKERS', min(os.cpu_count() or 1, 4)))
+SERVER_THREADS = int(os.environ.get('SERVER_THREADS', 8))
+# Request threads of a process serving subscription streams only
+# (server.py --sse). Each open stream holds one while it waits for updates.
+SSE_THREADS = int(os.environ.get('SSE_THREADS', 256))
+# Seconds a silent worker lives before it is restarted, and seconds workers
+# get to finish in-flight requests on shutdown.
+SERVER_TIMEOUT = int(os.environ.get('SERVER_TIMEOUT', REQUEST_DEADLINE + 30))
+SERVER_GRACEFUL_TIMEOUT = int(os.environ.get('SERVER_GRACEFUL_TIMEOUT', REQUEST_DEADLINE + 5))
+SERVER_KEEPALIVE = int(os.environ.get('SERVER_KEEPALIVE', 5))
+
+
+def warm_up():
+    """
+    Builds the airport table, resolver indexes, route graph and station
+    index, and loads the precomputed route table.
+
+    Runs in the master before workers fork, so every worker starts with them
+    in place and shares their memory.
+    """
+    started = time.monotonic()
+    airports = load_airports()
+    get_resolver()
+    get_graph()
+    get_station_index()
+    get_route_table()
+    # Loading stations from an http(s) STATIONS_URL opens the shared
+    # session; close it so each worker creates its own after the fork.
+    shutdown()
+    logging.info(f"Warmed up {len(airports)} airports in {(time.monotonic() - started) * 1000:.0f} ms")
+
+
+def serve(app, host, port, workers=None, threads=None, worker_init=None):
+    """
+    Serves a WSGI app with gunicorn's threaded workers until shut down.
+
+    Args:
+        app: The WSGI application.
+        host (str): Interface to bind.
+        port (int): Port to bind.
+        workers (int): Worker processes. Defaults to SERVER_WORKERS.
+        threads (int): Threads per worker. Defaults to SERVER_THREADS.
+        worker_init (callable): Called in each worker after it forks, for
+            clients that must not be shared across processes.
+    """
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        raise RuntimeError("gunicorn is not installed; pip install gunicorn or run with --dev")
+
+    options = {
+        'bind': f"{host}:{port}",
+        'workers': workers or SERVER_WORKERS,
+        'threads': threads or SERVER_THREADS,
+        'worker_class': 'gthread',
+        'timeout': SERVER_TIMEOUT,
+        'graceful_timeout': SERVER_GRACEFUL_TIMEOUT,
+        'keepalive': SERVER_KEEPALIVE,
+        'preload_app': True,
+        'post_worker_init': lambda worker: worker_init and worker_init(),
+        'worker_exit': lambda server, worker: shutdown(),
+    }
+
+    class Application(BaseApplication):
+        def load_config(self):
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return app
+
+    Application().run()
@@ -0,0 +1,210 @@
+"""
+Grid index over reporting stations and great-circle corridor queries.
+
+Stations are bucketed into CELL_DEG x CELL_DEG latitude/longitude cells. A
+corridor query walks the track between two airports, collects the cells
+within reach of it, and only tests the stations in those cells exactly, so
+its cost follows the corridor's area rather than the number of stations.
+
+The index holds the bundled airports and, when STATIONS_URL is set, every
+station in an aviationweather.gov stations cache file (smaller airfields
+included).
+"""
+import collections
+import logging
+import math
+import os
+import re
+import threading
+
+from flightwx.airports import EARTH_RADIUS_NM, cross, dot, load_airports, normalize, unit_vector
+from flightwx.resolver import resolve
+
+# Extra stations: an aviationweather.gov stations.cache.xml(.gz) URL or
+# local path, e.g. https://aviationweather.gov/data/cache/stations.cache.xml.gz.
+STATIONS_URL = os.environ.get('STATIONS_URL')
+CELL_DEG = 1.0
+# Corridor queries kept in the memo, least recently used dropped first.
+CORRIDOR_MEMO_SIZE = 4096
+
+_ICAO_RE = re.compile(r'^[A-Z0-9]{4}$')
+
+Station = collections.namedtuple('Station', 'icao name lat lon')
+CorridorStation = collections.namedtuple('CorridorStation', 'station along_nm cross_nm')
+CorridorStation.__doc__ = """A station in a corridor: its along-track distance from the origin
+(negative behind it) and unsigned cross-track distance, in nautical miles."""
+
+
+class StationIndex:
+    """Grid of stations by latitude/longitude cell, with their unit vectors."""
+
+    def __init__(self, stations, cell_deg=CELL_DEG):
+        self.stations = tuple(stations)
+        self.cell_deg = cell_deg
+        self.vectors = [unit_vector(station.lat, station.lon) for station in self.stations]
+        self.by_icao = {}
+        for station in self.stations:
+            self.by_icao.setdefault(station.icao, station)
+        self.cells = {}
+        for i, station in enumerate(self.stations):
+            self.cells.setdefault(self._cell(station.lat, station.lon), []).append(i)
+        self._corridors = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def locate(self, icao):
+        """Returns the Station with an ICAO code, or None."""
+        return self.by_icao.get(icao)
+
+    def corridor(self, origin, destination, width_nm):
+        """
+        Finds every station within width_nm of the great-circle track.
+
+        Args:
+            origin (Station): Start of the track.
+            destination (Station): End of the track.
+            width_nm (float): Half-width of the corridor. The corridor also
+                reaches width_nm behind the origin and past the destination.
+                When both are the same airport, the stations within
+                width_nm of it are returned, nearest first.
+
+        Returns:
+            list: CorridorStation records ordered by along-track distance.
+        """
+        key = (origin.icao, destination.icao, width_nm)
+        with self._lock:
+            found = self._corridors.get(key)
+            if found is not None:
+                self._corridors.move_to_end(key)
+        if found is None:
+            found = self._search(origin, destination, width_nm)
+            with self._lock:
+                self._corridors[key] = found
+                if len(self._corridors) > CORRIDOR_MEMO_SIZE:
+                    self._corridors.popitem(last=False)
+        return list(found)
+
+    def _search(self, origin, destination, width_nm):
+        a = unit_vector(origin.lat, origin.lon)
+        b = unit_vector(destination.lat, destination.lon)
+        length_nm = math.acos(max(-1.0, min(1.0, dot(a, b)))) * EARTH_RADIUS_NM
+        normal = cross(a, b)
+        coincident = dot(normal, normal) < 1e-18
+        if coincident:
+            # Any great circle through the point works for finding candidates.
+            normal = cross(a, (0.0, 0.0, 1.0)) if abs(a[2]) < 0.9 else cross(a, (1.0, 0.0, 0.0))
+        normal = normalize(normal)
+        toward = cross(normal, a)
+
+        found = []
+        for i in self._candidates(a, toward, length_nm, width_nm):
+            p = self.vectors[i]
+            if coincident:
+                # No track: a circle of radius width_nm, ordered by distance.
+                distance_nm = math.acos(max(-1.0, min(1.0, dot(p, a)))) * EARTH_RADIUS_NM
+                if distance_nm <= width_nm:
+                    found.append(CorridorStation(self.stations[i], distance_nm, 0.0))
+                continue
+            cross_nm = math.asin(min(1.0, abs(dot(p, normal)))) * EARTH_RADIUS_NM
+            if cross_nm > width_nm:
+                continue
+            along_nm = math.atan2(dot(p, toward), dot(p, a)) * EARTH_RADIUS_NM
+            if -width_nm <= along_nm <= length_nm + width_nm:
+                found.append(CorridorStation(self.stations[i], along_nm, cross_nm))
+        found.sort(key=lambda item: (item.along_nm, item.cross_nm, item.station.icao))
+        return tuple(found)
+
+    def _candidates(self, a, toward, length_nm, width_nm):
+        # Sample the track at most half a cell apart; every cell within
+        # width_nm of a sample, widened by the sampling gap, may hold a
+        # station in the corridor. Per row only the column span is kept.
+        step_nm = self.cell_deg * 30
+        reach_deg = (width_nm + step_nm) / 60
+        samples = max(int((length_nm + 2 * width_nm) / step_nm) + 1, 1)
+        spans = {}
+        # Rows past the poles hold no stations.
+        first_row, last_row = self._cell_row(-90.0), self._cell_row(90.0 - 1e-9)
+        for k in range(samples + 1):
+            angle = (-width_nm + k * (length_nm + 2 * width_nm) / samples) / EARTH_RADIUS_NM
+            point = tuple(math.cos(angle) * a[n] + math.sin(angle) * toward[n] for n in range(3))
+            lat = math.degrees(math.asin(max(-1.0, min(1.0, point[2]))))
+            lon = math.degrees(math.atan2(point[1], point[0]))
+            scale = math.cos(math.radians(min(abs(lat) + reach_deg, 89.9)))
+            lon_reach = min(reach_deg / scale, 180.0)
+            lon_lo, lon_hi = self._cell_col(lon - lon_reach), self._cell_col(lon + lon_reach)
+            for row in range(max(self._cell_row(lat - reach_deg), first_row),
+                             min(self._cell_row(lat + reach_deg), last_row) + 1):
+                span = spans.get(row)
+                spans[row] = (lon_lo, lon_hi) if span is None else (min(span[0], lon_lo), max(span[1], lon_hi))
+        columns = int(round(360 / self.cell_deg))
+        for row, (lon_lo, lon_hi) in spans.items():
+            for col in range(lon_lo, min(lon_hi, lon_lo + columns - 1) + 1):
+                yield from self.cells.get((row, col % columns), ())
+
+    def _cell(self, lat, lon):
+        return self._cell_row(lat), self._cell_col(lon) % int(round(360 / self.cell_deg))
+
+    def _cell_row(self, lat):
+        return math.floor(lat / self.cell_deg)
+
+    def _cell_col(self, lon):
+        return math.floor((lon + 180) / self.cell_deg)
+
+
+def load_stations(source=STATIONS_URL):
+    """
+    Returns the bundled airports as Station records, followed by the
+    stations of the cache file at source (if any) not already among them.
+    """
+    stations = [Station(airport.icao, airport.city, airport.lat, airport.lon) for airport in load_airports()]
+    if not source:
+        return stations
+    from flightwx.aviationweather import iter_cache_elements
+
+    known = {station.icao for station in stations}
+    try:
+        for element in iter_cache_elements(source, 'Station'):
+            icao = (element.findtext('station_id') or '').strip().upper()
+            try:
+                lat, lon = float(element.findtext('latitude')), float(element.findtext('longitude'))
+            except (TypeError, ValueError):
+                continue
+            if _ICAO_RE.match(icao) and icao not in known:
+                known.add(icao)
+                stations.append(Station(icao, (element.findtext('site') or icao).strip(), lat, lon))
+    except Exception as e:
+        logging.error(f"Error loading stations from {source}: {e}")
+    return stations
+
+
+_lock = threading.Lock()
+_index = None
+
+
+def get_station_index():
+    """Returns the index over load_stations(), building it once."""
+    global _index
+    if _index is None:
+        with _lock:
+            if _index is None:
+                _index = StationIndex(load_stations())
+    return _index
+
+
+def corridor_stations(start, destination, width_nm):
+    """
+    Stations within width_nm of the track between two airports.
+
+    Args:
+        start (str): IATA/ICAO code or city of the origin.
+        destination (str): IATA/ICAO code or city of the destination.
+        width_nm (float): Corridor half-width in nautical miles.
+
+    Returns:
+        list: CorridorStation records ordered by along-track distance, or
+        None when either airport is not in the bundled table.
+    """
+    origin, target = resolve(start), resolve(destination)
+    if origin is None or target is None:
+        return None
+    return get_station_index().corridor(Station(origin.icao, origin.city, origin.lat, origin.lon),
+                                        Station(target.icao, target.city, target.lat, target.lon), width_nm)
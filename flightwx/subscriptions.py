@@ -0,0 +1,315 @@
+"""
+Route subscriptions with per-station delta updates.
+
+A client subscribes to a route (its stations in order) once. When a newer
+METAR or TAF for a subscribed station arrives, the station is re-scored
+once, its update is serialized once, and the same event is queued for
+every subscriber of every route containing the station. The hub keeps a
+fan-out index from station to subscribed routes and from route to
+subscribers, so change detection only looks at subscribed stations and an
+update costs one scoring per station, not one per subscriber.
+
+Updates come from the network poller's table swaps when NETWORK_POLL is
+on. Otherwise the hub refreshes every subscribed station itself with one
+bulk call per product every SUBSCRIPTION_REFRESH seconds, however many
+clients watch them.
+"""
+import collections
+import json
+import logging
+import os
+import threading
+import time
+
+from flightwx.aviationweather import NO_METAR_DATA, NO_TAF_DATA
+from flightwx.cache import report_time
+from flightwx.metrics import exposition, register_collector
+from flightwx.poller import NETWORK
+from flightwx.report import is_degraded, station_weather
+
+# Seconds between refreshes of subscribed stations when the network poller
+# is not running.
+SUBSCRIPTION_REFRESH = float(os.environ.get('SUBSCRIPTION_REFRESH', 60))
+# Most open subscriptions per process. Served processes lower it further
+# to fit their request threads; see subscription_limit().
+SUBSCRIPTIONS_MAX = int(os.environ.get('SUBSCRIPTIONS_MAX', 1000))
+# Request threads a subscription-only process keeps free of streams, for
+# the route snapshot of new subscribers and /metrics.
+SSE_SPARE_THREADS = 4
+
+_PRODUCTS = ("METAR", "TAF")
+
+
+class Subscription:
+    """
+    One client's view of a route: the update events not yet sent to it.
+
+    Pending events are kept per station and a newer update replaces an
+    unsent older one, so a slow client holds at most one event per station
+    of its route and always catches up to the latest state.
+    """
+
+    def __init__(self, route):
+        self.route = route
+        self.closed = False
+        self._pending = collections.OrderedDict()
+        self._ready = threading.Condition()
+        self.sent = 0
+        self.coalesced = 0
+
+    def push(self, station, event):
+        with self._ready:
+            if station in self._pending:
+                self.coalesced += 1
+                del self._pending[station]
+            self._pending[station] = event
+            self._ready.notify()
+
+    def next(self, timeout):
+        """Returns the oldest pending event, or None after timeout seconds or once closed."""
+        with self._ready:
+            if not self._pending and not self.closed:
+                self._ready.wait(timeout)
+            if not self._pending:
+                return None
+            self.sent += 1
+            return self._pending.popitem(last=False)[1]
+
+    def close(self):
+        with self._ready:
+            self.closed = True
+            self._ready.notify_all()
+
+
+class SubscriptionHub:
+    """Fan-out index from stations to subscribed routes, and the latest reports of those stations."""
+
+    def __init__(self, refresh=SUBSCRIPTION_REFRESH, max_subscriptions=SUBSCRIPTIONS_MAX):
+        self.refresh = refresh
+        self.max_subscriptions = max_subscriptions
+        # route -> subscriptions, station -> routes containing it
+        self._routes = {}
+        self._stations = {}
+        # station -> {"METAR": raw, "TAF": raw} last scored
+        self._latest = {}
+        self._lock = threading.Lock()
+        self._refresher = None
+        self._stop = threading.Event()
+        self._sequence = 0
+        self.updates = 0
+        self.deliveries = 0
+
+    def subscribe(self, stations, metars=None, tafs=None):
+        """
+        Registers a subscription on a route.
+
+        Args:
+            stations (list): ICAO codes of the route, in order.
+            metars (dict): Reports the client already has, as sent in its
+                initial snapshot; updates start from these. Stations the
+                hub holds a strictly newer report of are queued for it at
+                once; a report newer than the hub's replaces it and is sent
+                to the station's other subscribers.
+            tafs (dict): Likewise for TAFs.
+
+        Returns:
+            Subscription: The new subscription, or None when the process
+            already holds max_subscriptions.
+        """
+        route = tuple(dict.fromkeys(stations))
+        stale = []
+        adopted = []
+        with self._lock:
+            if sum(len(subscriptions) for subscriptions in self._routes.values()) >= self.max_subscriptions:
+                return None
+            subscription = Subscription(route)
+            subscriptions = self._routes.setdefault(route, set())
+            if not subscriptions:
+                for station in route:
+                    self._stations.setdefault(station, set()).add(route)
+            subscriptions.add(subscription)
+            for station in route:
+                latest = self._latest.setdefault(station, {})
+                for product, reports in (("METAR", metars), ("TAF", tafs)):
+                    report = (reports or {}).get(station)
+                    if report is None or is_degraded(report):
+                        continue
+                    if product not in latest:
+                        latest[product] = report
+                    elif _newer(report, latest[product]):
+                        latest[product] = report
+                        adopted.append((station, product, latest.get("METAR"), latest.get("TAF")))
+                    elif _newer(latest[product], report):
+                        stale.append((station, product, latest.get("METAR"), latest.get("TAF")))
+        for station, product, metar, taf in stale:
+            subscription.push(station, self._event(station, product, metar, taf, self._next_sequence()))
+        for station, product, metar, taf in adopted:
+            self._publish(station, product, metar, taf, skip=subscription)
+        self._start_refresher()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        subscription.close()
+        with self._lock:
+            subscriptions = self._routes.get(subscription.route)
+            if subscriptions is None:
+                return
+            subscriptions.discard(subscription)
+            if subscriptions:
+                return
+            del self._routes[subscription.route]
+            for station in subscription.route:
+                routes = self._stations.get(station)
+                routes.discard(subscription.route)
+                if not routes:
+                    del self._stations[station]
+                    self._latest.pop(station, None)
+
+    def stations(self):
+        """Returns the ICAO codes with at least one subscriber."""
+        with self._lock:
+            return list(self._stations)
+
+    def observe(self, product, reports):
+        """
+        Takes in reports of one product and pushes an update for every
+        subscribed station whose report changed. A report older than the
+        one the hub holds is ignored.
+
+        Args:
+            product (str): "METAR" or "TAF".
+            reports (dict): {station: raw_text}; any stations, unsubscribed
+                ones and fetch failures are ignored.
+
+        Returns:
+            int: Number of stations updated.
+        """
+        changed = []
+        with self._lock:
+            for station in self._stations:
+                report = reports.get(station)
+                if report is None or is_degraded(report):
+                    continue
+                latest = self._latest.setdefault(station, {})
+                current = latest.get(product)
+                if current != report and not (current is not None and _newer(current, report)):
+                    latest[product] = report
+                    changed.append((station, latest.get("METAR"), latest.get("TAF")))
+        for station, metar, taf in changed:
+            self._publish(station, product, metar, taf)
+        return len(changed)
+
+    def _publish(self, station, product, metar, taf, skip=None):
+        # Queues one update event for every subscriber of the station but skip.
+        event = self._event(station, product, metar, taf, self._next_sequence())
+        with self._lock:
+            subscribers = [subscription for route in self._stations.get(station, ())
+                           for subscription in self._routes.get(route, ()) if subscription is not skip]
+            self.updates += 1
+            self.deliveries += len(subscribers)
+        for subscription in subscribers:
+            subscription.push(station, event)
+
+    def _next_sequence(self):
+        with self._lock:
+            self._sequence += 1
+            return self._sequence
+
+    def _event(self, station, product, metar, taf, sequence):
+        # Scored and serialized once, then shared by every subscriber.
+        weather = station_weather(station, metar or NO_METAR_DATA, taf or NO_TAF_DATA)
+        return sequence, json.dumps({"event": "station", "id": sequence, "icao_code": station,
+                                     "product": product, "weather": weather})
+
+    def on_table(self, product, previous, table):
+        """NETWORK listener: feeds each swapped table's subscribed stations to observe()."""
+        self.observe(product, table.reports)
+
+    def refresh_once(self):
+        """Fetches every subscribed station in one bulk call per product and observes the results."""
+        from flightwx.cache import cached_metars, cached_tafs
+        from flightwx.fetcher import gather
+
+        stations = self.stations()
+        if not stations:
+            return 0
+        reports = gather({"METAR": (cached_metars, stations), "TAF": (cached_tafs, stations)})
+        return sum(self.observe(product, reports.get(product, {})) for product in _PRODUCTS)
+
+    def stop(self, timeout=None):
+        with self._lock:
+            thread, self._refresher = self._refresher, None
+        if thread is not None:
+            self._stop.set()
+            thread.join(timeout)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "subscriptions": sum(len(subscriptions) for subscriptions in self._routes.values()),
+                "routes": len(self._routes),
+                "stations": len(self._stations),
+                "updates": self.updates,
+                "deliveries": self.deliveries,
+                "refreshing": self._refresher is not None,
+            }
+
+    def _start_refresher(self):
+        # The network poller already delivers every table swap.
+        if NETWORK.stats()["running"]:
+            return
+        with self._lock:
+            if self._refresher is not None:
+                return
+            self._stop.clear()
+            self._refresher = threading.Thread(target=self._run, name='flightwx-subscriptions', daemon=True)
+            self._refresher.start()
+
+    def _run(self):
+        while not self._stop.wait(self.refresh):
+            started = time.monotonic()
+            try:
+                updated = self.refresh_once()
+            except Exception as e:
+                logging.error(f"Error refreshing subscribed stations: {e}")
+                continue
+            if updated:
+                logging.info(f"Pushed {updated} station updates in {(time.monotonic() - started) * 1000:.0f} ms")
+
+
+def _newer(report, than):
+    """True when report carries a later DDHHMMZ time than than; False when either has none."""
+    time_of_report, time_of_than = report_time(report), report_time(than)
+    return time_of_report is not None and time_of_than is not None and time_of_report > time_of_than
+
+
+def subscription_limit(threads, dedicated=False):
+    """
+    Most open subscriptions a process with threads request threads can hold.
+
+    Each open stream keeps a request thread busy. A process that also
+    serves /api/weather gives streams at most half its threads; one
+    serving only streams (server.py --sse) all but SSE_SPARE_THREADS.
+    Neither goes above SUBSCRIPTIONS_MAX.
+    """
+    streams = threads - SSE_SPARE_THREADS if dedicated else threads // 2
+    return max(min(SUBSCRIPTIONS_MAX, streams), 1)
+
+
+HUB = SubscriptionHub()
+NETWORK.subscribe(HUB.on_table)
+
+
+def _subscription_metrics():
+    stats = HUB.stats()
+    lines = exposition('flightwx_subscriptions', 'gauge', "Open route subscriptions.",
+                       [({}, stats["subscriptions"])])
+    lines += exposition('flightwx_subscribed_stations', 'gauge', "Stations with at least one subscriber.",
+                        [({}, stats["stations"])])
+    lines += exposition('flightwx_subscription_updates_total', 'counter',
+                        "Station updates scored, and the events delivered for them.",
+                        [({"kind": "update"}, stats["updates"]), ({"kind": "delivery"}, stats["deliveries"])])
+    return lines
+
+
+register_collector(_subscription_metrics)
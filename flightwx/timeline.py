@@ -0,0 +1,278 @@
+"""
+TAF interval index and forecast lookup at each waypoint's ETA.
+
+A decoded TAF is cut into consecutive intervals. In each interval one group
+prevails (BASE, FM, or a BECMG once its transition has ended), and any
+number of temporary groups may apply (TEMPO and PROB groups, and BECMG
+groups during their transition). Hazard flags and a risk score are worked
+out per interval when the index is built. A lookup is then a binary search,
+and a departure slot sweep is one vectorized search per station.
+
+Indexes are kept per station and rebuilt only when its TAF text changes.
+NumPy is only imported for slot sweeps.
+"""
+import bisect
+import collections
+import datetime
+import math
+import os
+import threading
+
+from flightwx.airports import EARTH_RADIUS_NM, cross, dot, normalize, unit_vector
+from flightwx.cache import report_time
+from flightwx.decoder import decode_taf
+from flightwx.risk import hazard_details, hazard_flags, is_report
+from flightwx.spatial import get_station_index
+
+# Ground speed assumed when a request gives a departure time but no speed.
+GROUND_SPEED_KT = float(os.environ.get('GROUND_SPEED_KT', 420))
+
+Interval = collections.namedtuple('Interval', 'start end prevailing temporary flags temporary_flags risk_score')
+Interval.__doc__ = """One stretch of a TAF with constant groups. start/end are epoch seconds;
+prevailing is a ChangeGroup and temporary a tuple of them; risk_score is
+2 when the prevailing conditions are hazardous, 1 when only temporary
+groups are, else 0."""
+
+
+class TafTimeline:
+    """Interval index over one decoded TAF."""
+
+    def __init__(self, forecast, issued):
+        """
+        Args:
+            forecast (Forecast): Decoded TAF.
+            issued (datetime): Aware UTC issue time, which anchors the
+                day/hour times inside the forecast.
+        """
+        self.station = forecast.station
+        self.intervals = _intervals(forecast, issued)
+        self.starts = [interval.start for interval in self.intervals]
+        self.valid_from = self.intervals[0].start if self.intervals else None
+        self.valid_to = self.intervals[-1].end if self.intervals else None
+
+    def at(self, when):
+        """Returns the Interval covering epoch seconds when, or None outside the forecast."""
+        if not self.intervals or not self.valid_from <= when < self.valid_to:
+            return None
+        return self.intervals[bisect.bisect_right(self.starts, when) - 1]
+
+    def risk_scores(self, times):
+        """Vectorized at(): risk score per epoch second in times, -1 outside the forecast."""
+        import numpy as np
+
+        times = np.asarray(times, dtype=np.float64)
+        if not self.intervals:
+            return np.full(times.shape, -1, dtype=np.int8)
+        scores = np.array([interval.risk_score for interval in self.intervals] + [-1], dtype=np.int8)
+        index = np.searchsorted(np.asarray(self.starts, dtype=np.float64), times, side='right') - 1
+        index[(times < self.valid_from) | (times >= self.valid_to)] = len(self.intervals)
+        return scores[index]
+
+
+def _intervals(forecast, issued):
+    changes = []
+    temporary = []
+    for order, group in enumerate(forecast.groups):
+        start = _absolute(group.start, issued)
+        end = _absolute(group.end, issued)
+        if group.kind in ("BASE", "FM"):
+            changes.append((start, order, group))
+        elif group.kind == "BECMG":
+            # Conditions change some time within the window: either may apply
+            # during it, the new ones prevail after it.
+            changes.append((end or start, order, group))
+            if start is not None and end is not None:
+                temporary.append((start, end, group))
+        elif start is not None and end is not None:
+            temporary.append((start, end, group))
+
+    valid_from, valid_to = _absolute(forecast.valid_from, issued), _absolute(forecast.valid_to, issued)
+    changes = sorted(change for change in changes if change[0] is not None)
+    if valid_from is None or valid_to is None or valid_to <= valid_from or not changes:
+        return []
+
+    bounds = {valid_from, valid_to}
+    bounds.update(time for time, _, _ in changes)
+    for start, end, _ in temporary:
+        bounds.update((start, end))
+    bounds = sorted(time for time in bounds if valid_from <= time <= valid_to)
+
+    intervals = []
+    for start, end in zip(bounds, bounds[1:]):
+        prevailing = changes[0][2]
+        for time, _, group in changes:
+            if time > start:
+                break
+            prevailing = group
+        active = tuple(group for group_start, group_end, group in temporary if group_start <= start < group_end)
+        flags = hazard_flags(prevailing)
+        temporary_flags = 0
+        for group in active:
+            temporary_flags |= hazard_flags(group)
+        risk_score = 2 if flags else 1 if temporary_flags else 0
+        intervals.append(Interval(start, end, prevailing, active, flags, temporary_flags, risk_score))
+    return intervals
+
+
+def _absolute(day_time, issued):
+    """Epoch seconds of a TAF (day, hour, minute), taken as the first such time from a day before issue."""
+    if day_time is None:
+        return None
+    day, hour, minute = day_time
+    year, month = issued.year, issued.month
+    for _ in range(2):
+        try:
+            moment = datetime.datetime(year, month, day, tzinfo=datetime.timezone.utc) + \
+                datetime.timedelta(hours=hour, minutes=minute)
+        except ValueError:
+            moment = None
+        if moment is not None and moment >= issued - datetime.timedelta(days=1):
+            return int(moment.timestamp())
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return None
+
+
+class TimelineStore:
+    """Per-station TafTimeline, rebuilt when the station's TAF text changes."""
+
+    def __init__(self):
+        self._timelines = {}
+        self._lock = threading.Lock()
+        self.builds = 0
+
+    def get(self, station, taf, now=None):
+        """Returns the TafTimeline of a raw TAF, or None when taf is not a forecast."""
+        stored = self._timelines.get(station)
+        if stored is not None and stored[0] == taf:
+            return stored[1]
+        if not is_report(taf, "TAF"):
+            return None
+        issued = report_time(taf, now)
+        if issued is None:
+            return None
+        timeline = TafTimeline(decode_taf(taf), issued)
+        with self._lock:
+            self._timelines[station] = (taf, timeline)
+            self.builds += 1
+        return timeline
+
+
+TIMELINES = TimelineStore()
+
+
+def route_offsets(stations):
+    """
+    Nautical miles from the first station to the point abeam each station on
+    the great-circle track from the first to the last station, in one pass.
+    Stations without known coordinates map to None.
+    """
+    index = get_station_index()
+    located = [index.locate(station) for station in stations]
+    known = [station for station in located if station is not None]
+    if not known:
+        return [None] * len(stations)
+    a = unit_vector(known[0].lat, known[0].lon)
+    b = unit_vector(known[-1].lat, known[-1].lon)
+    length_nm = EARTH_RADIUS_NM * math.acos(max(-1.0, min(1.0, dot(a, b))))
+    normal = cross(a, b)
+    if dot(normal, normal) < 1e-18:
+        return [0.0 if station is not None else None for station in located]
+    toward = cross(normalize(normal), a)
+    offsets = []
+    for station in located:
+        if station is None:
+            offsets.append(None)
+            continue
+        p = unit_vector(station.lat, station.lon)
+        along_nm = EARTH_RADIUS_NM * math.atan2(dot(p, toward), dot(p, a))
+        offsets.append(min(max(along_nm, 0.0), length_nm))
+    return offsets
+
+
+def forecast_at_etas(stations, tafs, departure, ground_speed_kt=GROUND_SPEED_KT):
+    """
+    Looks up the forecast valid at each station's ETA.
+
+    Args:
+        stations (list): ICAO codes in route order.
+        tafs (dict): Raw TAF per ICAO code.
+        departure (datetime): Aware UTC departure time.
+        ground_speed_kt (float): Average ground speed.
+
+    Returns:
+        dict: {icao: {"eta", "distance_nm", "forecast"}} where eta is an
+        ISO 8601 time and forecast describes the TAF interval valid then
+        (see describe_interval), or None when no forecast covers the ETA.
+    """
+    result = {}
+    start = departure.timestamp()
+    for station, offset in zip(stations, route_offsets(stations)):
+        if station in result:
+            continue
+        if offset is None:
+            result[station] = {"eta": None, "distance_nm": None, "forecast": None}
+            continue
+        eta = start + offset / ground_speed_kt * 3600
+        timeline = TIMELINES.get(station, tafs.get(station))
+        interval = timeline.at(eta) if timeline is not None else None
+        result[station] = {
+            "eta": _iso(eta),
+            "distance_nm": round(offset, 1),
+            "forecast": describe_interval(interval) if interval is not None else None,
+        }
+    return result
+
+
+def describe_interval(interval):
+    """JSON-ready summary of a TAF interval: prevailing conditions, temporary groups and risk."""
+    prevailing = interval.prevailing
+    return {
+        "valid_from": _iso(interval.start),
+        "valid_to": _iso(interval.end),
+        "group": prevailing.kind,
+        "flight_category": prevailing.flight_category,
+        "visibility_m": prevailing.visibility_m,
+        "ceiling_ft": prevailing.ceiling_ft,
+        "wind_speed": prevailing.wind_speed,
+        "wind_gust": prevailing.wind_gust,
+        "weather": list(prevailing.weather),
+        "temporary": [{"kind": group.kind, "probability": group.probability,
+                       "flight_category": group.flight_category, "weather": list(group.weather)}
+                      for group in interval.temporary],
+        "risk_score": interval.risk_score,
+        "risk_details": hazard_details(interval.flags, "TAF at ETA") +
+        hazard_details(interval.temporary_flags & ~interval.flags, "TAF TEMPO/PROB at ETA"),
+    }
+
+
+def slot_sweep(stations, tafs, departures, ground_speed_kt=GROUND_SPEED_KT):
+    """
+    Evaluates a route's forecast risk for many departure times at once.
+
+    Args:
+        stations (list): ICAO codes in route order.
+        tafs (dict): Raw TAF per ICAO code.
+        departures (list): Departure times as epoch seconds.
+        ground_speed_kt (float): Average ground speed.
+
+    Returns:
+        tuple: (stations, scores) with stations deduplicated in route order
+        and scores an int8 array of shape (len(departures), len(stations)):
+        the risk score at each station's ETA, -1 where no forecast covers it.
+    """
+    import numpy as np
+
+    stations = list(dict.fromkeys(stations))
+    departures = np.asarray(departures, dtype=np.float64)
+    scores = np.full((len(departures), len(stations)), -1, dtype=np.int8)
+    for column, (station, offset) in enumerate(zip(stations, route_offsets(stations))):
+        timeline = TIMELINES.get(station, tafs.get(station))
+        if offset is None or timeline is None:
+            continue
+        scores[:, column] = timeline.risk_scores(departures + offset / ground_speed_kt * 3600)
+    return stations, scores
+
+
+def _iso(epoch):
+    return datetime.datetime.fromtimestamp(epoch, datetime.timezone.utc).isoformat(timespec='minutes').replace(
+        '+00:00', 'Z')
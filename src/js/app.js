@@ -1,5 +1,5 @@
 import { updateUTCTime, initThemeToggle } from './uiHelpers.js';
-import { fetchWeatherData } from './weatherService.js';
+import { streamWeatherData } from './weatherService.js';
 import { updateWeatherDisplay, showLoading, hideLoading, showError, updateProgressTracker } from './uiUpdater.js';
 import { generatePDF } from './pdfGenerator.js';
 
@@ -53,19 +53,24 @@ async function handleWeatherRequest() {
     try {
         showLoading();
         
-        // Fetch weather data from the backend
-        const data = await fetchWeatherData(srcCity, destCity);
+        // Stream weather data from the backend, showing the route as soon as
+        // it is known and filling in each station as its weather arrives
+        let shown = false;
+        const data = await streamWeatherData(srcCity, destCity, (partial) => {
+            if (!shown) {
+                hideLoading();
+                shown = true;
+            }
+            updateWeatherDisplay(partial, srcCity, destCity);
+            checkForSevereWeather(partial);
+        });
         
         // Store data for PDF generation
         window.weatherData = data;
         
-        // Update the UI with the weather data
-        updateWeatherDisplay(data, srcCity, destCity);
-        
-        // Check for severe weather and show alert if needed
-        checkForSevereWeather(data);
-        
-        hideLoading();
+        if (!shown) {
+            hideLoading();
+        }
     } catch (error) {
         console.error('Error fetching weather data:', error);
         hideLoading();
@@ -91,8 +96,14 @@ function checkForSevereWeather(data) {
     const alertBanner = document.getElementById('alertBanner');
     const alertMessage = document.getElementById('alertMessage');
     
+    // Nothing to judge until the first station's weather has arrived
+    const arrived = data.filter(location => !location.weather.pending);
+    if (!arrived.length) {
+        return;
+    }
+    
     // Check if any location has high risk
-    const severeWeather = data.find(location => location.weather.risk_score > 0);
+    const severeWeather = arrived.find(location => location.weather.risk_score > 0);
     
     if (severeWeather) {
         alertMessage.textContent = `⚠ Severe Weather Alert: Hazardous conditions detected near ${severeWeather.city} (${severeWeather.icao_code})`;
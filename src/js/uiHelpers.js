@@ -60,7 +60,10 @@ export function getWeatherIconClass(description) {
 export function getRiskLevel(riskScore) {
     let riskClass, riskText;
     
-    if (riskScore > 0) {
+    if (riskScore === null || riskScore === undefined) {
+        riskClass = 'badge-pending';
+        riskText = 'Loading';
+    } else if (riskScore > 0) {
         riskClass = 'badge-danger';
         riskText = 'High Risk';
     } else if (riskScore === 0) {
@@ -76,7 +79,9 @@ export function getRiskLevel(riskScore) {
 
 // Get color for risk based on risk score
 export function getRiskColor(riskScore) {
-    if (riskScore > 0) {
+    if (riskScore === null || riskScore === undefined) {
+        return 'var(--primary)';
+    } else if (riskScore > 0) {
         return 'var(--danger)';
     } else if (riskScore === 0) {
         return 'var(--warning)';
@@ -97,6 +102,10 @@ export function formatMetarData(metar) {
 
 // Extract relevant weather information from METAR
 export function extractWeatherInfo(metar) {
+    if (metar === null) {
+        return 'Loading...';
+    }
+    
     if (!metar || metar.includes('failed') || metar.includes('No METAR')) {
         return 'Weather data unavailable';
     }
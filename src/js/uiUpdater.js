@@ -35,9 +35,10 @@ export function updateWeatherDisplay(data, srcCity, destCity) {
     // Update summary information
     document.getElementById('cityCount').textContent = data.length;
     
-    // Calculate overall risk level
-    const riskScores = data.map(item => item.weather.risk_score);
-    const maxRiskScore = Math.max(...riskScores);
+    // Calculate overall risk level from the stations that have arrived;
+    // until the first one has, the summary shows them as pending
+    const riskScores = data.filter(item => !item.weather.pending).map(item => item.weather.risk_score);
+    const maxRiskScore = riskScores.length ? Math.max(...riskScores) : null;
     
     updateRiskSummary(maxRiskScore);
     
@@ -56,7 +57,12 @@ function updateRiskSummary(maxRiskScore) {
     const weatherStatus = document.getElementById('weatherStatus');
     const riskAssessment = document.getElementById('riskAssessment');
     
-    if (maxRiskScore > 0) {
+    if (maxRiskScore === null) {
+        weatherStatus.textContent = 'Pending';
+        riskAssessment.textContent = 'Awaiting Weather Data';
+        weatherStatus.style.color = 'var(--primary)';
+        riskAssessment.style.color = 'var(--primary)';
+    } else if (maxRiskScore > 0) {
         weatherStatus.textContent = 'Hazardous';
         riskAssessment.textContent = 'Not Recommended';
         weatherStatus.style.color = 'var(--danger)';
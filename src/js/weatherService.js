@@ -23,7 +23,7 @@ export async function fetchWeatherData(srcCity, destCity) {
         console.error('Error fetching weather data:', error);
         
         // If we're in development mode, return mock data for testing
-        if (window.location.hostname === 'localhost' || window.location.hostname === '127.0.0.1') {
+        if (isDevelopmentHost()) {
             console.log('Returning mock data for development');
             return getMockData(srcCity, destCity);
         }
@@ -32,6 +32,92 @@ export async function fetchWeatherData(srcCity, destCity) {
     }
 }
 
+// Stream weather data from the backend. onUpdate is called with the route
+// as soon as it is known and again each time a station's weather arrives;
+// stations still loading have weather.pending set. Resolves to the final data.
+export async function streamWeatherData(srcCity, destCity, onUpdate) {
+    let response;
+    try {
+        response = await fetch('/api/weather/stream', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json'
+            },
+            body: JSON.stringify({ 
+                start_airport: srcCity,
+                destination_airport: destCity
+            })
+        });
+    } catch (error) {
+        // No backend to stream from; /api/weather falls back to mock data in development
+        console.error('Error opening weather stream:', error);
+        const data = await fetchWeatherData(srcCity, destCity);
+        onUpdate(data);
+        return data;
+    }
+    
+    if (!response.ok || !response.body) {
+        // Older servers without the stream endpoint still answer /api/weather
+        if (response.status === 404 && !response.headers.get('Content-Type')?.includes('json')) {
+            const data = await fetchWeatherData(srcCity, destCity);
+            onUpdate(data);
+            return data;
+        }
+        const errorText = await response.text();
+        const error = new Error(`API Error: ${errorText || response.statusText}`);
+        console.error('Error streaming weather data:', error);
+        
+        // If we're in development mode, return mock data for testing
+        if (isDevelopmentHost()) {
+            console.log('Returning mock data for development');
+            const data = getMockData(srcCity, destCity);
+            onUpdate(data);
+            return data;
+        }
+        
+        throw error;
+    }
+    
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let data = [];
+    let buffer = '';
+    
+    const handleEvent = (event) => {
+        if (event.event === 'route') {
+            data = event.route.map(stop => ({
+                ...stop,
+                weather: { metar: null, taf: null, risk_score: null, risk_details: [], pending: true }
+            }));
+        } else if (event.event === 'station') {
+            data[event.index] = { city: event.city, icao_code: event.icao_code, weather: event.weather };
+        } else if (event.event === 'error') {
+            throw new Error(`API Error: ${event.error}`);
+        } else {
+            return;
+        }
+        onUpdate([...data]);
+    };
+    
+    while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const lines = buffer.split('\n');
+        buffer = lines.pop();
+        lines.filter(line => line.trim()).forEach(line => handleEvent(JSON.parse(line)));
+    }
+    if (buffer.trim()) {
+        handleEvent(JSON.parse(buffer));
+    }
+    return data;
+}
+
+// True when the page is served from this machine, as in local development
+function isDevelopmentHost() {
+    return window.location.hostname === 'localhost' || window.location.hostname === '127.0.0.1';
+}
+
 // Generate mock data for development/testing
 function getMockData(srcCity, destCity) {
     // Generate a path between the two airports with random cities
@@ -0,0 +1,13 @@
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+# Keep the route cache, observation archive and route table out of the
+# working tree, and every upstream out of reach.
+_scratch = tempfile.mkdtemp(prefix='flightwx-tests-')
+os.environ.setdefault('ROUTE_CACHE_PATH', os.path.join(_scratch, 'routes.sqlite3'))
+os.environ.setdefault('ROUTE_TABLE_PATH', os.path.join(_scratch, 'route_table.json'))
+os.environ.setdefault('HISTORY_ENABLED', '0')
+os.environ.setdefault('AWC_BASE_URL', 'http://127.0.0.1:9/api/data')
@@ -0,0 +1,92 @@
+import gzip
+import time
+
+from flightwx.poller import NetworkPoller
+
+METARS = {
+    "VIDP": "VIDP 180830Z 29006KT 3500 HZ NSC 31/12 Q1009 NOSIG",
+    "VABB": "VABB 180830Z 27010KT 4000 HZ FEW020 32/24 Q1008 NOSIG",
+}
+TAF = "TAF VIDP 180500Z 1806/1912 30008KT 3000 HZ NSC"
+
+
+def cache_file(path, tag, reports, compress=False):
+    elements = ''.join(f"<{tag}><raw_text>{raw}</raw_text><station_id>{station}</station_id></{tag}>"
+                       for station, raw in reports)
+    content = f'<?xml version="1.0"?><response><data num_results="{len(reports)}">{elements}</data></response>'
+    if compress:
+        path.write_bytes(gzip.compress(content.encode()))
+    else:
+        path.write_text(content)
+    return str(path)
+
+
+def test_poll_reads_local_cache_files(tmp_path):
+    metar_path = cache_file(tmp_path / 'metars.cache.xml.gz', 'METAR', METARS.items(), compress=True)
+    taf_path = cache_file(tmp_path / 'tafs.cache.xml', 'TAF', [("VIDP", TAF)])
+    poller = NetworkPoller({"METAR": metar_path, "TAF": taf_path})
+
+    poller.poll()
+
+    assert poller.reports("METAR") == METARS
+    assert poller.reports("TAF") == {"VIDP": TAF}
+    assert poller.stats()["polls"] == 2
+
+
+def test_poll_keeps_first_report_per_station(tmp_path):
+    newer = "VIDP 180900Z 29006KT 3000 HZ NSC 32/12 Q1009 NOSIG"
+    path = cache_file(tmp_path / 'metars.xml', 'METAR', [("VIDP", newer), ("VIDP", METARS["VIDP"])])
+    poller = NetworkPoller({"METAR": path})
+
+    poller.poll()
+
+    assert poller.reports("METAR") == {"VIDP": newer}
+
+
+def test_failed_poll_keeps_previous_table(tmp_path):
+    path = tmp_path / 'metars.xml'
+    poller = NetworkPoller({"METAR": cache_file(path, 'METAR', METARS.items())})
+    poller.poll()
+
+    path.unlink()
+    poller.poll()
+
+    assert poller.reports("METAR") == METARS
+    assert poller.stats()["failures"] == 1
+
+
+def test_listeners_see_each_swap(tmp_path):
+    path = tmp_path / 'metars.xml'
+    poller = NetworkPoller({"METAR": cache_file(path, 'METAR', [("VIDP", METARS["VIDP"])])})
+    swaps = []
+    poller.subscribe(lambda product, previous, table: swaps.append((product, previous, table)))
+
+    poller.poll()
+    cache_file(path, 'METAR', METARS.items())
+    poller.poll()
+
+    assert [product for product, _, _ in swaps] == ["METAR", "METAR"]
+    assert swaps[0][1] is None
+    assert swaps[1][1] is swaps[0][2]
+    assert swaps[1][2].reports == METARS
+
+
+def test_old_table_is_not_served(tmp_path):
+    poller = NetworkPoller({"METAR": cache_file(tmp_path / 'metars.xml', 'METAR', METARS.items())}, max_age=60)
+    poller.poll()
+
+    assert poller.reports("METAR") == METARS
+    assert poller.reports("METAR", now=time.time() + 61) is None
+
+
+def test_cached_lookups_are_served_from_the_polled_table(tmp_path, monkeypatch):
+    from flightwx import cache
+    from flightwx.aviationweather import upstream_calls
+
+    poller = NetworkPoller({"METAR": cache_file(tmp_path / 'metars.xml', 'METAR', METARS.items())})
+    poller.poll()
+    monkeypatch.setattr(cache, 'network_reports', poller.reports)
+    calls = upstream_calls()
+
+    assert cache.cached_metars(["VIDP", "VABB"]) == METARS
+    assert upstream_calls() == calls
@@ -0,0 +1,53 @@
+import json
+
+from api import server
+from flightwx.response_cache import encode, encoding_etag, entry_etags
+
+BODY = json.dumps([{"city": "Delhi", "icao_code": "VIDP", "weather": {"metar": "VIDP 180830Z " * 40}}]).encode()
+
+
+def test_each_encoding_has_its_own_strong_etag():
+    entry = encode(BODY)
+
+    tags = entry_etags(entry)
+
+    assert tags[0] == entry.etag == encoding_etag(entry)
+    assert encoding_etag(entry, 'gzip') == entry.etag[:-1] + '-gzip"'
+    assert len(set(tags)) == len(tags) >= 2
+    assert all(tag.startswith('"') and tag.endswith('"') for tag in tags)
+
+
+def test_small_bodies_are_only_sent_as_identity():
+    entry = encode(b'[]')
+
+    assert entry_etags(entry) == [entry.etag]
+
+
+def respond(entry, **headers):
+    with server.app.test_request_context('/api/weather', method='POST', headers=headers):
+        return server.cached_response(entry)
+
+
+def test_cached_response_sends_the_etag_of_the_body_it_sends():
+    entry = encode(BODY)
+
+    identity = respond(entry)
+    gzipped = respond(entry, **{"Accept-Encoding": "gzip"})
+
+    assert identity.headers["ETag"] == entry.etag
+    assert identity.get_data() == BODY
+    assert gzipped.headers["Content-Encoding"] == "gzip"
+    assert gzipped.headers["ETag"] == encoding_etag(entry, 'gzip')
+
+
+def test_any_of_the_routes_etags_gets_not_modified():
+    entry = encode(BODY)
+    gzip_etag = encoding_etag(entry, 'gzip')
+
+    same = respond(entry, **{"Accept-Encoding": "gzip", "If-None-Match": gzip_etag})
+    other = respond(entry, **{"If-None-Match": gzip_etag})
+    stale = respond(entry, **{"If-None-Match": '"0123"'})
+
+    assert same.status_code == other.status_code == 304
+    assert same.headers["ETag"] == other.headers["ETag"] == gzip_etag
+    assert stale.status_code == 200
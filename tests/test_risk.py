@@ -0,0 +1,75 @@
+import pytest
+
+from flightwx.decoder import decode_metar, decode_taf, weather_codes
+from flightwx.risk import FOG, SEVERE_WEATHER, THUNDERSTORM, assess_station, forecast_flags, weather_flags
+
+
+def metar(weather):
+    return decode_metar(f"VIDP 181030Z 29006KT 2500 {weather} NSC 31/12 Q1008")
+
+
+@pytest.mark.parametrize("group, codes", [
+    ("+TSRA", ("+", "TS", ("RA",))),
+    ("VCFG", ("VC", "", ("FG",))),
+    ("TSSN", ("", "TS", ("SN",))),
+    ("-SHRASN", ("-", "SH", ("RA", "SN"))),
+    ("FZFG", ("", "FZ", ("FG",))),
+    ("TS", ("", "TS", ())),
+    ("SS", ("", "", ("SS",))),
+    ("+FC", ("+", "", ("FC",))),
+])
+def test_weather_codes_split_intensity_descriptor_and_phenomena(group, codes):
+    assert weather_codes(group) == codes
+
+
+def test_decoder_keeps_weather_groups_whole():
+    observation = decode_metar("VIDP 181030Z 29006KT 0800 +TSRA BCFG NSC 31/12 Q1008 RMK TSSN")
+
+    assert observation.weather == ("+TSRA", "BCFG")
+
+
+@pytest.mark.parametrize("weather, flags", [
+    ("TS", THUNDERSTORM),
+    ("VCTS", THUNDERSTORM),
+    ("+TSRA", THUNDERSTORM),
+    ("TSSN", THUNDERSTORM),
+    ("TSSG", THUNDERSTORM),
+    ("TSGR", THUNDERSTORM | SEVERE_WEATHER),
+    ("FG", FOG),
+    ("FZFG", FOG),
+    ("MIFG", 0),
+    ("PRFG", 0),
+    ("BCFG", 0),
+    ("VCFG", 0),
+    ("SS", SEVERE_WEATHER),
+    ("+DS", SEVERE_WEATHER),
+    ("VCSS", SEVERE_WEATHER),
+    ("SQ", SEVERE_WEATHER),
+    ("HZ", 0),
+    ("-RA", 0),
+])
+def test_weather_flags_compare_whole_codes(weather, flags):
+    assert weather_flags(metar(weather)) == flags
+
+
+def test_cumulonimbus_counts_as_thunderstorm():
+    observation = decode_metar("VIDP 181030Z 29006KT 6000 SCT030CB 31/12 Q1008")
+
+    assert weather_flags(observation) == THUNDERSTORM
+
+
+def test_thunderstorm_with_snow_is_not_scored_as_severe_weather():
+    score, details, category = assess_station("VIDP 181030Z 29006KT 2500 TSSN NSC 31/12 Q1008",
+                                              "TAF VIDP 181100Z 1812/1918 30008KT 6000 NSC")
+
+    assert details == ["Thunderstorm in METAR", "IFR conditions in METAR"]
+    assert score == 1
+    assert category == "IFR"
+
+
+def test_taf_flags_cover_every_group():
+    forecast = decode_taf("TAF VIDP 181100Z 1812/1918 30008KT 6000 NSC TEMPO 1902/1906 0800 BCFG "
+                          "BECMG 1908/1910 1500 FG")
+
+    assert forecast_flags(forecast) & FOG
+    assert not weather_flags(forecast.groups[1]) & FOG
@@ -0,0 +1,59 @@
+import pytest
+
+from bench.bench_decoder import METARS, TAFS
+from flightwx.risk import assess_station
+from flightwx.riskboard import board_rows, build_columns, score_columns
+
+# Category and wind thresholds, weather codes that share letters, and
+# everything that is not a report.
+EDGE_METARS = [
+    "VIDP 181030Z 29020KT 1600 BR BKN005 25/20 Q1008",
+    "VIDP 181030Z 29019G25KT 4800 HZ OVC010 25/20 Q1008",
+    "VIDP 181030Z 29010MPS 8000 SCT030 BKN031 25/20 Q1008",
+    "KJFK 181030Z 18010KT 1/2SM FZFG VV002 M02/M03 A2992",
+    "KJFK 181030Z 18010KT 1 1/2SM TSSN BKN008 M02/M03 A2992",
+    "VIDP 181030Z 29006KT 2500 BCFG VCFG MIFG PRFG NSC 31/12 Q1008",
+    "VIDP 181030Z 29006KT CAVOK 31/12 Q1008",
+    "VIDP 181030Z 29006KT 9999 VCSS NSC 31/12 Q1008",
+    "No METAR data found",
+    "METAR fetch failed: timeout",
+    None,
+    42,
+]
+EDGE_TAFS = [
+    "TAF VIDP 181100Z 1812/1918 30008KT 9999 NSC BECMG 1900/1902 0400 FG VV002",
+    "TAF VIDP 181100Z 1812/1918 30008KT 9999 NSC TEMPO 1900/1902 TSSG BKN010CB",
+    "TAF KJFK 181100Z 1812/1918 18010KT P6SM SKC FM190600 18025G40KT 2SM -SN OVC006",
+    "No TAF data found",
+    "TAF fetch failed: timeout",
+    None,
+]
+
+
+def network():
+    metars = METARS + EDGE_METARS
+    tafs = TAFS + EDGE_TAFS
+    pairs = [(metar, taf) for metar in metars for taf in tafs]
+    stations = [f"S{i:04d}" for i in range(len(pairs))]
+    return stations, dict(zip(stations, (metar for metar, _ in pairs))), dict(zip(stations, (taf for _, taf in pairs)))
+
+
+def test_vectorized_board_matches_assess_station_for_every_sample():
+    stations, metars, tafs = network()
+    columns = build_columns(stations, metars, tafs)
+
+    rows = board_rows(score_columns(columns), columns)
+
+    for station in stations:
+        risk_score, risk_details, flight_category = assess_station(metars[station], tafs[station])
+        expected = {"flight_category": flight_category, "risk_score": risk_score, "risk_details": risk_details}
+        assert rows[station] == expected, (metars[station], tafs[station])
+
+
+@pytest.mark.parametrize("metar", METARS[:3])
+def test_single_station_board_matches_assess_station(metar):
+    columns = build_columns(["VIDP"], {"VIDP": metar}, {})
+
+    [row] = board_rows(score_columns(columns), columns).values()
+
+    assert (row["risk_score"], row["risk_details"], row["flight_category"]) == assess_station(metar, None)
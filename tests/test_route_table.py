@@ -0,0 +1,144 @@
+import json
+import re
+import types
+
+import pytest
+
+from flightwx import flightpath
+from flightwx.airports import load_airports
+from flightwx.flightpath import parse_routes
+from flightwx.resolver import resolve
+from flightwx.route_table import (ROUTE_TABLE_VERSION, RouteTable, airport_pairs, precompute, read_route_table,
+                                  write_route_table)
+
+_FLIGHT_RE = re.compile(r'^\s*- (\S+) to (\S+)\s*$', re.MULTILINE)
+
+
+class StubModel:
+    """Answers the flight path prompt from a fixed {(origin, destination): cities} map."""
+
+    def __init__(self, routes, skip_first=0, fail_first=0):
+        self.routes = routes
+        self.skip_first = skip_first
+        self.fail_first = fail_first
+        self.prompts = []
+
+    def __call__(self, prompt):
+        self.prompts.append(prompt)
+        if len(self.prompts) <= self.fail_first:
+            raise RuntimeError("stub model unavailable")
+        flights = _FLIGHT_RE.findall(prompt.rsplit('Flights:', 1)[-1])
+        if len(self.prompts) <= self.skip_first:
+            flights = flights[::2]
+        answer = {"routes": [{"origin": origin, "destination": destination,
+                              "cities": self.routes.get((origin, destination), [])}
+                             for origin, destination in flights]}
+        return json.dumps(answer)
+
+
+def airports(*codes):
+    return [resolve(code) for code in codes]
+
+
+def test_parse_routes_reads_fenced_json_and_keeps_city_names_whole():
+    text = '```json\n{"routes": [{"origin": "del", "destination": "BOM", "cities": ["Nonesuch", " Jaipur ", ""]},' \
+           ' {"origin": 1}]}\n```'
+
+    assert parse_routes(text) == {("DEL", "BOM"): ["Nonesuch", "Jaipur"]}
+
+
+@pytest.mark.parametrize("text", ["None", "Delhi,Jaipur", "[]", '{"routes": {}}'])
+def test_parse_routes_rejects_answers_off_schema(text):
+    with pytest.raises(ValueError):
+        parse_routes(text)
+
+
+def test_precompute_keeps_only_resolvable_en_route_cities():
+    delhi, mumbai = airports("DEL", "BOM")
+    model = StubModel({("DEL", "BOM"): ["Delhi", "Jaipur", "Atlantis", "Jaipur", "Udaipur", "Mumbai"]})
+
+    routes, stats = precompute([(delhi, mumbai)], model)
+
+    assert routes == {"VIDP-VABB": ["VIJP", "VIUD"]}
+    assert stats["answered"] == 1
+    assert stats["dropped_cities"] == 4
+
+
+def test_precompute_batches_pairs_and_retries_left_out_ones():
+    pairs = airport_pairs(load_airports()[:6])
+    model = StubModel({}, skip_first=1)
+
+    routes, stats = precompute(pairs, model, batch_size=10)
+
+    assert len(routes) == len(pairs) == 15
+    assert stats["calls"] == len(model.prompts) == 3
+    assert stats["missing"] == 0
+
+
+def test_precompute_reports_pairs_still_missing_after_retries():
+    pairs = airport_pairs(load_airports()[:3])
+    model = StubModel({}, fail_first=2)
+
+    routes, stats = precompute(pairs, model, retries=1)
+
+    assert routes == {}
+    assert stats["failed_calls"] == 2
+    assert stats["missing"] == len(pairs)
+
+
+def test_precompute_skips_pairs_already_in_the_table():
+    delhi, mumbai, chennai = airports("DEL", "BOM", "MAA")
+    model = StubModel({})
+
+    routes, stats = precompute([(delhi, mumbai), (delhi, chennai)], model, routes={"VIDP-VABB": ["VIJP"]})
+
+    assert routes["VIDP-VABB"] == ["VIJP"]
+    assert "VIDP-VOMM" in routes
+    assert _FLIGHT_RE.findall(model.prompts[0].rsplit('Flights:', 1)[-1]) == [("DEL", "MAA")]
+
+
+def test_table_round_trip_and_lookup_both_directions(tmp_path):
+    path = str(tmp_path / 'route_table.json')
+    write_route_table({"VIDP-VABB": ["VIJP", "VIUD"]}, path, model='stub')
+    data = read_route_table(path)
+    table = RouteTable(data.pop("routes"), data)
+
+    assert data["version"] == ROUTE_TABLE_VERSION
+    assert table.lookup("DEL", "BOM") == {"Jaipur": "VIJP", "Udaipur": "VIUD"}
+    assert table.lookup("VABB", "delhi") == {"Udaipur": "VIUD", "Jaipur": "VIJP"}
+    assert table.lookup("DEL", "MAA") is None
+    assert table.stats()["hits"] == 2
+    assert table.stats()["misses"] == 1
+
+
+def test_tables_of_another_version_are_ignored(tmp_path):
+    path = tmp_path / 'route_table.json'
+    path.write_text(json.dumps({"version": ROUTE_TABLE_VERSION + 1, "routes": {"VIDP-VABB": []}}))
+
+    assert read_route_table(str(path)) is None
+
+
+def test_llm_routes_come_from_the_table_with_their_endpoints(monkeypatch):
+    monkeypatch.setattr(flightpath, 'get_route_table', lambda: RouteTable({"VIDP-VABB": ["VIJP"]}))
+
+    def no_gemini(*args):
+        raise AssertionError("Gemini asked for a route in the table")
+
+    monkeypatch.setattr(flightpath, 'get_common_flight_path', no_gemini)
+
+    assert flightpath.get_flight_path_icao_codes("BOM", "DEL", "llm") == \
+        {"Mumbai": "VABB", "Jaipur": "VIJP", "Delhi": "VIDP"}
+
+
+def test_llm_misses_ask_the_model_once_with_the_structured_prompt(monkeypatch):
+    from flightwx import gemini
+
+    model = StubModel({("DEL", "MAA"): ["Nagpur", "Hyderabad", "Chennai", "Mumbai None"]})
+    monkeypatch.setattr(flightpath, 'get_route_table', lambda: RouteTable())
+    monkeypatch.setattr(gemini, 'get_model', lambda api_key: model)
+    monkeypatch.setattr(gemini, 'generate_content', lambda stub, prompt: types.SimpleNamespace(text=stub(prompt)))
+
+    assert flightpath.get_flight_path_icao_codes("DEL", "MAA", "llm", api_key="stub") == \
+        {"Delhi": "VIDP", "Nagpur": "VANP", "Hyderabad": "VOHS", "Mumbai None": "Unknown", "Chennai": "VOMM"}
+    assert flightpath.get_flight_path_icao_codes("DEL", "MAA", "llm", api_key="stub")["Nagpur"] == "VANP"
+    assert len(model.prompts) == 1
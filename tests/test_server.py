@@ -0,0 +1,66 @@
+import pytest
+
+from api import server
+
+
+@pytest.fixture
+def client():
+    return server.app.test_client()
+
+
+@pytest.mark.parametrize("body", [
+    {"start_airport": 123, "destination_airport": "BOM"},
+    {"start_airport": "DEL", "destination_airport": ["BOM"]},
+    {"start_airport": " ", "destination_airport": "BOM"},
+])
+def test_route_codes_must_be_non_empty_strings(client, body):
+    response = client.post('/api/weather', json=body)
+
+    assert response.status_code == 400
+    assert "non-empty strings" in response.get_json()["error"]
+
+
+def test_a_bad_batch_entry_fails_alone(client):
+    response = client.post('/api/weather/batch', json={"routes": [
+        {"start_airport": 123, "destination_airport": "BOM"},
+        {"start_airport": "DEL", "destination_airport": "BOM", "route_mode": "offline"},
+    ]})
+
+    assert response.status_code == 200
+    bad, good = response.get_json()["routes"]
+    assert bad["status"] == 400
+    assert bad["start_airport"] == 123
+    assert good["route"][0] == {"city": "Delhi", "icao_code": "VIDP"}
+    assert good["route"][-1] == {"city": "Mumbai", "icao_code": "VABB"}
+
+
+@pytest.mark.parametrize("days", ["nan", "inf", "-inf", "1e12", "0", "-1", "367", "week"])
+def test_history_days_must_be_finite_and_bounded(client, days):
+    response = client.get(f'/api/history?stations=VIDP&days={days}')
+
+    assert response.status_code == 400
+    assert "days must be" in response.get_json()["error"]
+
+
+def test_history_accepts_days_up_to_the_maximum(client):
+    response = client.get('/api/history?stations=VIDP&days=366')
+
+    assert response.status_code == 200
+    assert response.get_json()[0]["icao_code"] == "VIDP"
+
+
+@pytest.mark.parametrize("corridor_nm", [True, False, "50", 0, -5, 1e9])
+def test_corridor_width_must_be_a_number_in_range(client, corridor_nm):
+    response = client.post('/api/weather', json={"start_airport": "DEL", "destination_airport": "BOM",
+                                                 "route_mode": "corridor", "corridor_nm": corridor_nm})
+
+    assert response.status_code == 400
+    assert "corridor_nm must be" in response.get_json()["error"]
+
+
+def test_batch_routes_with_a_bool_corridor_fail_alone(client):
+    response = client.post('/api/weather/batch', json={"routes": [
+        {"start_airport": "DEL", "destination_airport": "BOM", "route_mode": "corridor", "corridor_nm": True},
+    ]})
+
+    assert response.get_json()["routes"][0]["status"] == 400
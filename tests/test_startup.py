@@ -0,0 +1,100 @@
+import io
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from flightwx.cli import iter_route_pairs, run_batch
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+# Generous on purpose: a cold interpreter on a busy CI box, not a benchmark.
+MAX_IMPORT_SECONDS = 5
+
+_PROBE = """
+import json, runpy, sys, time
+began = time.perf_counter()
+sys.argv = [{path!r}]
+runpy.run_path({path!r}, run_name='probe')
+print(json.dumps({{"seconds": time.perf_counter() - began, "modules": sorted(sys.modules)}}))
+"""
+
+
+def probe(path):
+    path = os.path.join(ROOT, path)
+    completed = subprocess.run([sys.executable, '-c', _PROBE.format(path=path)], cwd=ROOT,
+                               capture_output=True, text=True, check=True)
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def city(*args, stdin=None):
+    return subprocess.run([sys.executable, 'city.py', *args], cwd=ROOT, input=stdin, capture_output=True, text=True)
+
+
+@pytest.mark.parametrize("path, not_loaded", [
+    ("app.py", ("google.generativeai", "numpy", "flask")),
+    ("city.py", ("google.generativeai", "numpy", "flask", "requests")),
+    ("api/server.py", ("google.generativeai", "numpy")),
+])
+def test_entry_points_start_without_heavy_modules(path, not_loaded):
+    loaded = probe(path)
+
+    assert [name for name in not_loaded if name in loaded["modules"]] == []
+    assert loaded["seconds"] < MAX_IMPORT_SECONDS
+
+
+def test_city_batch_answers_every_line_format_and_fails_on_a_bad_line():
+    lines = 'DEL BOM\n# comment\n\nDEL,BOM\n{"start_airport": "del", "destination_airport": "bom"}\nDEL\n'
+
+    completed = city('--route-mode', 'offline', '--batch', '-', stdin=lines)
+
+    records = [json.loads(line) for line in completed.stdout.splitlines()]
+    assert completed.returncode == 1
+    assert [record.get("error") is None for record in records] == [True, True, True, False]
+    assert records[0]["cities"] == records[1]["cities"] == records[2]["cities"]
+    assert records[3]["error"] == "line 6: expected a start and a destination airport"
+
+
+def test_city_batch_exits_zero_when_every_route_is_answered():
+    completed = city('--route-mode', 'offline', '--batch', '-', stdin="DEL BOM\nBOM, MAA\n")
+
+    assert completed.returncode == 0
+    assert len(completed.stdout.splitlines()) == 2
+
+
+@pytest.mark.parametrize("line, pair", [
+    ("DEL BOM", ("DEL", "BOM", None)),
+    ("  del\tbom  ", ("DEL", "BOM", None)),
+    ("DEL,BOM", ("DEL", "BOM", None)),
+    ("del , bom", ("DEL", "BOM", None)),
+    ('{"start_airport": "del", "destination_airport": "VABB"}', ("DEL", "VABB", None)),
+])
+def test_iter_route_pairs_reads_space_comma_and_json_lines(line, pair):
+    assert list(iter_route_pairs([line])) == [pair]
+
+
+@pytest.mark.parametrize("line", ["DEL", "DEL BOM MAA", '{"start_airport": "DEL"}',
+                                  '{"start_airport": 1, "destination_airport": "BOM"}', '{not json', '["DEL"]'])
+def test_iter_route_pairs_reports_bad_lines(line):
+    assert list(iter_route_pairs(["# header", "", line])) == \
+        [(None, None, "line 3: expected a start and a destination airport")]
+
+
+def test_run_batch_counts_failed_routes(tmp_path):
+    path = tmp_path / 'routes.txt'
+    path.write_text("DEL BOM\nDEL\nBOM MAA\n")
+    output = io.StringIO()
+
+    def handle(start, destination):
+        if destination == "MAA":
+            raise RuntimeError("no route")
+        return {"cities": [start, destination]}
+
+    failed = run_batch(str(path), handle, output)
+
+    records = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert failed == 2
+    assert records[0] == {"start_airport": "DEL", "destination_airport": "BOM", "cities": ["DEL", "BOM"]}
+    assert records[1]["error"].startswith("line 2")
+    assert records[2]["error"] == "no route"
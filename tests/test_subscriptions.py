@@ -0,0 +1,58 @@
+import json
+
+import pytest
+
+from flightwx.subscriptions import SubscriptionHub
+
+OLDER = "VIDP 180800Z 29006KT 3500 HZ NSC 31/12 Q1009 NOSIG"
+NEWER = "VIDP 180830Z 00000KT 0200 FG VV001 18/18 Q1010 NOSIG"
+TAF = "TAF VIDP 180500Z 1806/1912 30008KT 3000 HZ NSC"
+
+
+@pytest.fixture
+def hub():
+    hub = SubscriptionHub(refresh=3600)
+    yield hub
+    hub.stop()
+
+
+def events(subscription):
+    sent = []
+    while True:
+        event = subscription.next(0)
+        if event is None:
+            return sent
+        sent.append(json.loads(event[1]))
+
+
+def test_new_subscriber_gets_the_hubs_strictly_newer_report(hub):
+    hub.subscribe(["VIDP"], {"VIDP": NEWER}, {"VIDP": TAF})
+
+    late = hub.subscribe(["VIDP", "VABB"], {"VIDP": OLDER}, {"VIDP": TAF})
+
+    [event] = events(late)
+    assert event["product"] == "METAR"
+    assert event["weather"]["metar"] == NEWER
+
+
+def test_newer_report_from_a_subscriber_is_adopted_and_fanned_out(hub):
+    first = hub.subscribe(["VIDP"], {"VIDP": OLDER}, {"VIDP": TAF})
+    other_route = hub.subscribe(["VABB", "VIDP"], {"VIDP": OLDER})
+
+    late = hub.subscribe(["VIDP"], {"VIDP": NEWER}, {"VIDP": TAF})
+
+    assert events(late) == []
+    for subscription in (first, other_route):
+        [event] = events(subscription)
+        assert event["weather"]["metar"] == NEWER
+        assert "Fog in METAR" in event["weather"]["risk_details"]
+    assert hub.stats()["deliveries"] == 2
+
+
+def test_observe_ignores_reports_older_than_the_hubs(hub):
+    subscription = hub.subscribe(["VIDP"], {"VIDP": NEWER})
+
+    assert hub.observe("METAR", {"VIDP": OLDER}) == 0
+    assert events(subscription) == []
+    assert hub.observe("METAR", {"VIDP": NEWER.replace("180830Z", "180900Z")}) == 1
+    assert len(events(subscription)) == 1